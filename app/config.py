@@ -0,0 +1,141 @@
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from app.utils.instancia_unica import instancia_unica
+
+
+def _texto(nome, padrao=None):
+    return os.getenv(nome, padrao)
+
+
+def _inteiro(nome, padrao):
+    return int(os.getenv(nome, str(padrao)))
+
+
+def _booleano(nome, padrao="false"):
+    return os.getenv(nome, padrao).lower() == "true"
+
+
+@dataclass(frozen=True)
+class Configuracao:
+    """
+    Configuração da aplicação, lida do ambiente (.env) uma única vez por processo.
+
+    Os módulos obtêm os valores daqui em vez de chamar load_dotenv()/os.getenv()
+    cada um por conta própria. Use obter_config() para acessar a instância.
+    """
+
+    # X
+    api_key: Optional[str]
+    api_key_secret: Optional[str]
+    access_token: Optional[str]
+    access_token_secret: Optional[str]
+    x_upload_segmento_mb: int
+    x_upload_paralelo: int
+
+    # Telegram
+    telegram_api_id: Optional[str]
+    telegram_api_hash: Optional[str]
+    telegram_upload_workers: int
+    telegram_upload_part_kb: int
+    nome_grupo_telegram: Optional[str]
+    nome_canal_telegram: Optional[str]
+    upload_concorrencia: int
+    link_canal: Optional[str]
+    link_grupo: Optional[str]
+
+    # Redis
+    redis_host: Optional[str]
+    redis_port: Optional[str]
+    redis_db: Optional[str]
+    redis_user: Optional[str]
+    redis_password: Optional[str]
+
+    # Drive
+    drive_folder: Optional[str]
+    drive_remote: Optional[str]
+    folder_id: Optional[str]
+    drive_download_url: str
+    drive_download_workers: int
+    drive_download_chunk_mb: int
+    drive_stream_buffer_mb: int
+    streaming_upload: bool
+
+    # Vídeos
+    modo_corte: str
+    previas_limite_mb: int
+    videos_limite_mb: int
+
+    # Pipeline e daemon
+    modo_pipeline: bool
+    seletor_drive: str
+    pipeline_videos: int
+    prefetch_videos: int
+    pipeline_concorrencia: str
+    agenda: str
+    daemon_host: str
+    daemon_porta: int
+
+    # Métricas
+    metricas_arquivo: str
+    metricas_resumo: str
+
+    @classmethod
+    def do_ambiente(cls):
+        """Carrega o .env (sem sobrescrever variáveis já definidas) e lê os valores."""
+        load_dotenv()
+        return cls(
+            api_key=_texto("API_KEY"),
+            api_key_secret=_texto("API_KEY_SECRET"),
+            access_token=_texto("ACCESS_TOKEN"),
+            access_token_secret=_texto("ACCESS_TOKEN_SECRET"),
+            x_upload_segmento_mb=_inteiro("X_UPLOAD_SEGMENTO_MB", 4),
+            x_upload_paralelo=_inteiro("X_UPLOAD_PARALELO", 3),
+            telegram_api_id=_texto("TELEGRAM_API_ID"),
+            telegram_api_hash=_texto("TELEGRAM_API_HASH"),
+            telegram_upload_workers=_inteiro("TELEGRAM_UPLOAD_WORKERS", 4),
+            telegram_upload_part_kb=_inteiro("TELEGRAM_UPLOAD_PART_KB", 512),
+            nome_grupo_telegram=_texto("NOME_GRUPO_TELEGRAM"),
+            nome_canal_telegram=_texto("NOME_CANAL_TELEGRAM"),
+            upload_concorrencia=_inteiro("UPLOAD_CONCORRENCIA", 1),
+            link_canal=_texto("LINK_CANAL"),
+            link_grupo=_texto("LINK_GRUPO"),
+            redis_host=_texto("REDIS_HOST"),
+            redis_port=_texto("REDIS_PORT"),
+            redis_db=_texto("REDIS_DB"),
+            redis_user=_texto("REDIS_USER"),
+            redis_password=_texto("REDIS_PASSWORD"),
+            drive_folder=_texto("DRIVE_FOLDER"),
+            drive_remote=_texto("DRIVE_REMOTE"),
+            folder_id=_texto("FOLDER_ID"),
+            drive_download_url=_texto(
+                "DRIVE_DOWNLOAD_URL",
+                "https://www.googleapis.com/drive/v3/files/{file_id}?alt=media",
+            ),
+            drive_download_workers=_inteiro("DRIVE_DOWNLOAD_WORKERS", 4),
+            drive_download_chunk_mb=_inteiro("DRIVE_DOWNLOAD_CHUNK_MB", 16),
+            drive_stream_buffer_mb=_inteiro("DRIVE_STREAM_BUFFER_MB", 64),
+            streaming_upload=_booleano("STREAMING_UPLOAD"),
+            modo_corte=_texto("MODO_CORTE", "auto"),
+            previas_limite_mb=_inteiro("PREVIAS_LIMITE_MB", 2048),
+            videos_limite_mb=_inteiro("VIDEOS_LIMITE_MB", 10240),
+            modo_pipeline=_booleano("MODO_PIPELINE"),
+            seletor_drive=_texto("SELETOR_DRIVE", ""),
+            pipeline_videos=_inteiro("PIPELINE_VIDEOS", 1),
+            prefetch_videos=_inteiro("PREFETCH_VIDEOS", 0),
+            pipeline_concorrencia=_texto("PIPELINE_CONCORRENCIA", ""),
+            agenda=_texto("AGENDA", "18:50=paid,02:00=free"),
+            daemon_host=_texto("DAEMON_HOST", "127.0.0.1"),
+            daemon_porta=_inteiro("DAEMON_PORTA", 8765),
+            metricas_arquivo=_texto("METRICAS_ARQUIVO", ""),
+            metricas_resumo=_texto("METRICAS_RESUMO", ""),
+        )
+
+
+@instancia_unica
+def obter_config():
+    """Retorna a configuração do processo, carregando-a na primeira chamada."""
+    return Configuracao.do_ambiente()
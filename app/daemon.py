@@ -0,0 +1,203 @@
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlparse
+
+from app.config import obter_config
+from app.main import verificar_sessao_telegram_completa
+from app.src.pipeline import Pipeline
+from app.src.telegram_client import executar
+from app.utils.logger import ColorLogger
+from app.utils.metricas import obter_metricas
+
+config = obter_config()
+logger = ColorLogger()
+
+# Horários das execuções no formato "HH:MM=paid,HH:MM=free" (os mesmos do cronjob)
+AGENDA = config.agenda
+# Endpoint local de controle (só escuta na interface informada)
+DAEMON_HOST = config.daemon_host
+DAEMON_PORTA = config.daemon_porta
+
+
+def ler_agenda(agenda=AGENDA):
+    """
+    Converte a AGENDA do .env em uma lista de (hora, minuto, paid).
+
+    :raises ValueError: Se algum item não estiver no formato HH:MM=paid|free.
+    """
+    horarios = []
+    for item in filter(None, (parte.strip() for parte in agenda.split(","))):
+        horario, _, tipo = item.partition("=")
+        if tipo not in ("paid", "free"):
+            raise ValueError(f"Tipo inválido na AGENDA: '{item}' (use paid ou free).")
+        hora, minuto = (int(valor) for valor in horario.split(":"))
+        horarios.append((hora, minuto, tipo == "paid"))
+    return horarios
+
+
+def proximo_horario(horarios, agora=None):
+    """Retorna (datetime, paid) da próxima execução agendada."""
+    agora = agora or datetime.now()
+    candidatos = []
+    for hora, minuto, paid in horarios:
+        quando = agora.replace(hour=hora, minute=minuto, second=0, microsecond=0)
+        if quando <= agora:
+            quando += timedelta(days=1)
+        candidatos.append((quando, paid))
+    return min(candidatos)
+
+
+class Daemon:
+    """
+    Processo residente que substitui o cron: agenda interna, clientes quentes e um
+    endpoint HTTP local para disparar execuções sob demanda.
+
+    O cliente do Telegram, o serviço do Drive, a conexão com o Redis e o publicador do
+    X são criados uma vez e reaproveitados por todas as execuções. Cada execução é uma
+    rodada do pipeline em etapas (Pipeline.executar); as rodadas são serializadas,
+    e pedidos feitos durante uma rodada entram na fila de disparos.
+    """
+
+    def __init__(self, horarios):
+        self.horarios = horarios
+        self.pipeline = Pipeline()
+        self.disparos = asyncio.Queue()
+        self.executando = None
+        self.ultima_execucao = None
+        self.proxima_execucao = None
+
+    async def _agendador(self):
+        """Coloca uma execução na fila em cada horário da agenda."""
+        while True:
+            quando, paid = proximo_horario(self.horarios)
+            self.proxima_execucao = {"horario": quando.isoformat(), "paid": paid}
+            logger.info(
+                f"Próxima execução agendada: {quando:%d/%m %H:%M} ({'paid' if paid else 'free'})."
+            )
+            await asyncio.sleep((quando - datetime.now()).total_seconds())
+            await self.disparos.put(("agenda", paid))
+
+    async def _executor(self):
+        """Executa os disparos em ordem, um por vez."""
+        while True:
+            origem, paid = await self.disparos.get()
+            tipo = "paid" if paid else "free"
+            self.executando = {"origem": origem, "paid": paid, "inicio": time.time()}
+            logger.info(f"🚀 Iniciando execução {tipo} (origem: {origem}).")
+            obter_metricas().nova_execucao()
+
+            try:
+                await self.pipeline.executar(paid=paid)
+                resultado = "sucesso"
+            except Exception as e:
+                logger.error(f"Erro inesperado na execução {tipo}: {e}")
+                resultado = f"erro: {e}"
+
+            self.ultima_execucao = {
+                **self.executando,
+                "fim": time.time(),
+                "resultado": resultado,
+                "metricas": obter_metricas().exportar(),
+            }
+            self.executando = None
+            logger.info(f"Execução {tipo} finalizada ({resultado}).")
+
+    def status(self):
+        """Estado atual do daemon, servido em GET /status."""
+        return {
+            "executando": self.executando,
+            "ultima_execucao": self.ultima_execucao,
+            "proxima_execucao": self.proxima_execucao,
+            "disparos_pendentes": self.disparos.qsize(),
+            "fila": self.pipeline.fila.resumo(),
+            "falhas": self.pipeline.fila.falhas(),
+        }
+
+    async def _atender(self, leitor, escritor):
+        """
+        Atende uma requisição HTTP do endpoint de controle.
+
+        - GET /status: estado do daemon e resumo da fila de jobs;
+        - GET /metrics: tempo e vazão por etapa, no formato texto do Prometheus;
+        - POST /executar?tipo=paid|free: enfileira uma execução imediata;
+        - POST /retentar[?id=...]: devolve à fila os jobs com falha (todos ou um).
+        """
+        try:
+            linha = (await leitor.readline()).decode("latin-1").split()
+            # Descarta os cabeçalhos; o endpoint não usa corpo
+            while (await leitor.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+
+            metodo, alvo = (linha + ["", ""])[:2]
+            url = urlparse(alvo)
+            tipo_conteudo = "application/json"
+            if metodo == "GET" and url.path == "/status":
+                codigo, corpo = 200, self.status()
+            elif metodo == "GET" and url.path == "/metrics":
+                codigo, corpo = 200, obter_metricas().prometheus()
+                tipo_conteudo = "text/plain; version=0.0.4; charset=utf-8"
+            elif metodo == "POST" and url.path == "/executar":
+                tipo = parse_qs(url.query).get("tipo", ["free"])[0]
+                if tipo not in ("paid", "free"):
+                    codigo, corpo = 400, {"erro": "tipo deve ser paid ou free"}
+                else:
+                    await self.disparos.put(("manual", tipo == "paid"))
+                    codigo, corpo = 202, {
+                        "enfileirado": tipo,
+                        "posicao": self.disparos.qsize(),
+                    }
+            elif metodo == "POST" and url.path == "/retentar":
+                job_id = parse_qs(url.query).get("id", [None])[0]
+                codigo, corpo = 200, {"devolvidos": self.pipeline.fila.retentar(job_id)}
+            else:
+                codigo, corpo = 404, {
+                    "erro": "use GET /status, GET /metrics, POST /executar ou POST /retentar"
+                }
+
+            if isinstance(corpo, str):
+                dados = corpo.encode()
+            else:
+                dados = json.dumps(corpo, default=str).encode()
+            escritor.write(
+                f"HTTP/1.1 {codigo} {'OK' if codigo < 400 else 'Erro'}\r\n"
+                f"Content-Type: {tipo_conteudo}\r\n"
+                f"Content-Length: {len(dados)}\r\n"
+                f"Connection: close\r\n\r\n".encode()
+                + dados
+            )
+            await escritor.drain()
+        except Exception as e:
+            logger.warning(f"Falha ao atender requisição de controle: {e}")
+        finally:
+            escritor.close()
+
+    async def executar_para_sempre(self):
+        """Inicia o endpoint de controle, o agendador e o executor."""
+        servidor = await asyncio.start_server(self._atender, DAEMON_HOST, DAEMON_PORTA)
+        logger.info(f"Endpoint de controle em http://{DAEMON_HOST}:{DAEMON_PORTA}")
+
+        async with servidor:
+            await asyncio.gather(self._agendador(), self._executor())
+
+
+if __name__ == "__main__":
+    logger.info("🚀 INICIANDO DAEMON")
+
+    try:
+        horarios = ler_agenda()
+    except ValueError as e:
+        logger.error(f"AGENDA inválida: {e}")
+        sys.exit(1)
+
+    # A verificação completa roda uma vez; o cliente conectado fica quente para as rodadas
+    if not verificar_sessao_telegram_completa():
+        logger.error("❌ FALHA NA VERIFICAÇÃO DO TELEGRAM. O daemon não será iniciado.")
+        sys.exit(1)
+
+    try:
+        executar(Daemon(horarios).executar_para_sempre())
+    except KeyboardInterrupt:
+        logger.info("Daemon encerrado.")
@@ -176,6 +176,13 @@ else
 fi
 
 echo "=== CONFIGURAÇÃO CONCLUÍDA ==="
+
+# Modo daemon: processo residente com agenda interna (AGENDA no .env) no lugar do cron
+if [ "$1" = "daemon" ]; then
+    echo "Iniciando o daemon residente (agenda: ${AGENDA:-18:50=paid,02:00=free})..."
+    exec python3 /app/daemon.py
+fi
+
 echo "Iniciando o serviço cron em modo daemon..."
 
 # Criar um script wrapper para garantir que o ambiente seja carregado
@@ -1,36 +1,42 @@
+import asyncio
 import os
 import random
 import sys
+import time
 import traceback
 from datetime import date
-from random import randint
 
-from dotenv import load_dotenv
-from telethon.sync import TelegramClient
-
-from app.src.cache_maneger import CacheManeger
-from app.src.drive_maneger import DriveManeger
-from app.src.editor_de_videos import cortar_video
-from app.src.subir_video import subir_video_para_telegram
-from app.src.X_poster import postar_video_no_twitter
+from app.config import obter_config
 from app.utils.logger import ColorLogger
+from app.utils.metricas import obter_metricas
 
-# Configuração inicial
-load_dotenv()
+# Configuração inicial (lida uma única vez). Os clientes pesados (Telegram, Drive, X,
+# Redis) são importados dentro das rotinas que os usam, para que comandos curtos como
+# a verificação de sessão não paguem o import de todos eles.
+config = obter_config()
 logger = ColorLogger()
 
 # Constantes do projeto
 PASTA_DOWNLOADS = os.path.join(os.path.dirname(__file__), "videos_brutos")
 PASTA_PROCESSADOS = os.path.join(os.path.dirname(__file__), "videos_processados")
-NOME_GRUPO_TELEGRAM = os.getenv("NOME_GRUPO_TELEGRAM", "")
-LINK_CANAL = os.getenv("LINK_CANAL")
-LINK_GRUPO = os.getenv("LINK_GRUPO")
-DRIVE_REMOTE = os.getenv("DRIVE_REMOTE")
-DRIVE_FOLDER = os.getenv("DRIVE_FOLDER")
-API_KEY = os.getenv("API_KEY")
-API_KEY_SECRET = os.getenv("API_KEY_SECRET")
-ACCESS_TOKEN = os.getenv("ACCESS_TOKEN")
-ACCESS_TOKEN_SECRET = os.getenv("ACCESS_TOKEN_SECRET")
+NOME_GRUPO_TELEGRAM = config.nome_grupo_telegram or ""
+LINK_CANAL = config.link_canal
+LINK_GRUPO = config.link_grupo
+DRIVE_REMOTE = config.drive_remote
+DRIVE_FOLDER = config.drive_folder
+API_KEY = config.api_key
+API_KEY_SECRET = config.api_key_secret
+ACCESS_TOKEN = config.access_token
+ACCESS_TOKEN_SECRET = config.access_token_secret
+# Envia vídeos gratuitos do Drive direto para o Telegram, sem cópia em videos_brutos
+# (só na execução 'sem_x', que não corta a prévia do X)
+STREAMING_UPLOAD = config.streaming_upload
+# Usa o pipeline em etapas (fila persistente) no lugar das rotinas em sequência
+MODO_PIPELINE = config.modo_pipeline
+# Vídeos mantidos baixados à frente do upload (0 desliga o prefetch)
+PREFETCH_VIDEOS = config.prefetch_videos
+# Política do seletor por páginas do Drive (vazio usa o índice local da pasta)
+SELETOR_DRIVE = config.seletor_drive
 
 
 if not all(
@@ -59,15 +65,14 @@ def verificar_sessao_telegram_completa(logger=None):
     if logger is None:
         logger = ColorLogger()
 
-    logger.info("=== TESTE DE CONFIGURAÇÃO DO TELEGRAM ===")
+    from app.src.telegram_client import SESSION_FILE, com_peers, executar, obter_cliente
 
-    # Carregar variáveis de ambiente
-    load_dotenv()
+    logger.info("=== TESTE DE CONFIGURAÇÃO DO TELEGRAM ===")
 
     # Verificar variáveis de ambiente
-    API_ID = os.getenv("TELEGRAM_API_ID")
-    API_HASH = os.getenv("TELEGRAM_API_HASH")
-    NOME_DO_GRUPO = os.getenv("NOME_GRUPO_TELEGRAM")
+    API_ID = config.telegram_api_id
+    API_HASH = config.telegram_api_hash
+    NOME_DO_GRUPO = config.nome_grupo_telegram
 
     logger.info("1. Verificando variáveis de ambiente...")
 
@@ -94,9 +99,9 @@ def verificar_sessao_telegram_completa(logger=None):
 
     # Verificar arquivos de sessão
     logger.info("\n3. Verificando arquivos de sessão...")
-    session_file = "sessao_telegram"
-    session_file_with_ext = "sessao_telegram.session"
-    journal_file = "sessao_telegram.session-journal"
+    # Mesma sessão usada pelo cliente compartilhado das rotinas de upload
+    session_file_with_ext = SESSION_FILE
+    journal_file = f"{SESSION_FILE}-journal"
 
     logger.info(f"Procurando por arquivos de sessão em {os.getcwd()}...")
 
@@ -132,41 +137,45 @@ def verificar_sessao_telegram_completa(logger=None):
     # Tentar conectar ao Telegram
     logger.info("\n5. Testando conexão com o Telegram...")
     try:
-        with TelegramClient(session_file, API_ID, API_HASH) as client:
-            logger.info("✅ Conexão estabelecida com sucesso!")
+        # O cliente fica conectado e é reaproveitado pelas rotinas seguintes
+        client = obter_cliente()
+        logger.info("✅ Conexão estabelecida com sucesso!")
 
-            # Obter informações do usuário logado
-            me = client.get_me()
-            logger.info(
-                f"   Usuário logado: {me.first_name} {me.last_name or ''} (@{me.username or 'sem_username'})"
-            )
+        # Obter informações do usuário logado
+        me = client.get_me()
+        logger.info(
+            f"   Usuário logado: {me.first_name} {me.last_name or ''} (@{me.username or 'sem_username'})"
+        )
 
-            # Tentar encontrar o grupo
-            logger.info(f"\n6. Tentando acessar o grupo '{NOME_DO_GRUPO}'...")
-            try:
-                entidade_grupo = client.get_entity(NOME_DO_GRUPO)
-                logger.info(f"✅ Grupo encontrado: {entidade_grupo.title}")
-                logger.info(f"   ID do grupo: {entidade_grupo.id}")
-                logger.info(f"   Tipo: {type(entidade_grupo).__name__}")
+        # Tentar encontrar o grupo
+        logger.info(f"\n6. Tentando acessar o grupo '{NOME_DO_GRUPO}'...")
+        try:
+            # Um access_hash salvo que não vale mais é descartado e resolvido de novo
+            entidade_grupo = executar(
+                com_peers(client, (NOME_DO_GRUPO,), client.get_entity, f"grupo {NOME_DO_GRUPO}")
+            )
+            logger.info(f"✅ Grupo encontrado: {entidade_grupo.title}")
+            logger.info(f"   ID do grupo: {entidade_grupo.id}")
+            logger.info(f"   Tipo: {type(entidade_grupo).__name__}")
 
-                # Contar mensagens recentes
-                message_count = 0
-                for _ in client.iter_messages(entidade_grupo, limit=10):
-                    message_count += 1
+            # Contar mensagens recentes
+            message_count = 0
+            for _ in client.iter_messages(entidade_grupo, limit=10):
+                message_count += 1
 
-                logger.info(f"   Últimas mensagens acessíveis: {message_count}")
+            logger.info(f"   Últimas mensagens acessíveis: {message_count}")
 
-            except ValueError:
-                logger.error(
-                    f"❌ Grupo '{NOME_DO_GRUPO}' não encontrado ou não acessível"
-                )
-                logger.error(
-                    "   Verifique se o nome está correto e se você tem acesso ao grupo"
-                )
-                return False
-            except Exception as e:
-                logger.error(f"❌ Erro ao acessar grupo: {e}")
-                return False
+        except ValueError:
+            logger.error(
+                f"❌ Grupo '{NOME_DO_GRUPO}' não encontrado ou não acessível"
+            )
+            logger.error(
+                "   Verifique se o nome está correto e se você tem acesso ao grupo"
+            )
+            return False
+        except Exception as e:
+            logger.error(f"❌ Erro ao acessar grupo: {e}")
+            return False
 
     except Exception as e:
         logger.error(f"❌ Erro na conexão com Telegram: {e}")
@@ -181,13 +190,48 @@ def verificar_sessao_telegram_completa(logger=None):
     return True
 
 
+async def rotina_upload_async(caminhos_videos=None):
+    """
+    Envia para o Telegram os vídeos informados ou, sem 'caminhos_videos', todos os
+    vídeos da pasta de downloads.
+
+    Os envios são feitos em paralelo até o limite de UPLOAD_CONCORRENCIA (.env).
+    """
+    from app.src.armazem_maneger import ENVIADO, obter_armazem
+    from app.src.cache_maneger import CacheManeger
+    from app.src.historico_maneger import HistoricoManeger
+    from app.src.subir_video import subir_videos_para_telegram_async
+
+    if caminhos_videos is None:
+        caminhos_videos = []
+        for video in os.listdir(PASTA_DOWNLOADS):
+            caminho_video = os.path.join(PASTA_DOWNLOADS, video)
+            if os.path.isfile(caminho_video) and video.endswith(
+                (".mp4", ".avi", ".mov", ".mkv", ".wmv", ".flv", ".webm", ".m4v")
+            ):
+                caminhos_videos.append(caminho_video)
+
+    # Arquivos com o mesmo conteúdo de um vídeo já enviado não sobem de novo
+    historico = HistoricoManeger(CacheManeger(db=0))
+    novos = await asyncio.to_thread(historico.filtrar_arquivos_novos, caminhos_videos)
+    resultados = await subir_videos_para_telegram_async(list(novos))
+
+    enviados = [chave for chave, ok in zip(novos.values(), resultados) if ok]
+    if enviados:
+        historico.registrar_locais(enviados, f"Video enviado em {date.today()}")
+
+    # Vídeos já enviados passam a ser os primeiros removidos se faltar espaço
+    armazem = obter_armazem()
+    for caminho_video, ok in zip(novos, resultados):
+        if ok:
+            armazem.marcar(caminho_video, ENVIADO)
+
+
 def rotina_upload():
-    for video in os.listdir(PASTA_DOWNLOADS):
-        caminho_video = os.path.join(PASTA_DOWNLOADS, video)
-        if os.path.isfile(caminho_video) and video.endswith(
-            (".mp4", ".avi", ".mov", ".mkv", ".wmv", ".flv", ".webm", ".m4v")
-        ):
-            subir_video_para_telegram(caminho_video)
+    """Versão síncrona de rotina_upload_async()."""
+    from app.src.telegram_client import executar
+
+    executar(rotina_upload_async())
 
 
 def rotina_download_telegram():
@@ -197,8 +241,16 @@ def rotina_download_telegram():
     logger.info("--- ROTINA DE DOWNLOAD CONCLUÍDA ---")
 
 
-def rotina_postagem():
-    """Rotina 2: Escolhe um vídeo, corta e posta no X."""
+async def rotina_postagem_async(aguardar_antes_de_remover=None, caminho_video=None):
+    """
+    Rotina 2: Escolhe um vídeo (ou usa 'caminho_video'), corta e posta no X.
+
+    Enquanto o X processa a prévia, o loop fica livre para outras rotinas (ex.: o
+    upload para o Telegram). Se 'aguardar_antes_de_remover' for informado (uma tarefa
+    que ainda usa os arquivos da pasta), o vídeo original só é removido depois dela.
+    """
+    from app.src.armazem_maneger import obter_armazem
+    from app.src.X_poster import obter_publicador
 
     if not os.path.exists(PASTA_DOWNLOADS):
         logger.error(
@@ -206,99 +258,205 @@ def rotina_postagem():
         )
         return
 
-    # 1. Escolher um vídeo aleatório que ainda não foi processado
-    videos_disponiveis = [
-        f for f in os.listdir(PASTA_DOWNLOADS) if f.endswith((".mp4", ".mov", ".mkv"))
-    ]
-    if not videos_disponiveis:
-        logger.warning("Nenhum vídeo novo para processar na pasta de downloads.")
+    # O publicador (e suas conexões) é reaproveitado entre postagens; se o limite de
+    # requisições do X estiver esgotado, a postagem fica para a próxima execução
+    publicador = obter_publicador(API_KEY, API_KEY_SECRET, ACCESS_TOKEN, ACCESS_TOKEN_SECRET)
+    if publicador is None:
+        return
+    liberacao = publicador.proxima_postagem_permitida()
+    if liberacao > time.time():
+        logger.warning(
+            f"Limite do X esgotado. Postagem adiada; próxima permitida em {time.ctime(liberacao)}."
+        )
         return
 
-    video_escolhido = random.choice(videos_disponiveis)
-    caminho_video_original = os.path.join(PASTA_DOWNLOADS, video_escolhido)
-    caminho_video_cortado = os.path.join(
-        PASTA_DOWNLOADS, f"previa_temp_{randint(1, 100)}.mp4"
-    )
+    # 1. Escolher um vídeo aleatório que ainda não foi processado
+    if caminho_video is not None:
+        caminho_video_original = caminho_video
+        logger.info(f"Vídeo selecionado: {os.path.basename(caminho_video)}")
+    else:
+        videos_disponiveis = [
+            f for f in os.listdir(PASTA_DOWNLOADS) if f.endswith((".mp4", ".mov", ".mkv"))
+        ]
+        if not videos_disponiveis:
+            logger.warning("Nenhum vídeo novo para processar na pasta de downloads.")
+            return
+
+        video_escolhido = random.choice(videos_disponiveis)
+        caminho_video_original = os.path.join(PASTA_DOWNLOADS, video_escolhido)
+
+        logger.info(f"Vídeo aleatório selecionado: {video_escolhido}")
+
+    # O original não pode ser removido para liberar espaço enquanto é cortado e postado
+    armazem = obter_armazem()
+    armazem.fixar(caminho_video_original)
+    try:
+        await _cortar_e_postar(
+            publicador, caminho_video_original, aguardar_antes_de_remover
+        )
+    finally:
+        armazem.soltar(caminho_video_original)
+
+    logger.info("--- ROTINA DE POSTAGEM CONCLUÍDA ---")
+
 
-    logger.info(f"Vídeo aleatório selecionado: {video_escolhido}")
+async def _cortar_e_postar(publicador, caminho_video_original, aguardar_antes_de_remover):
+    """Corta a prévia do vídeo, posta no X e remove o original (etapas 2 a 4)."""
+    from app.src.armazem_maneger import obter_armazem
+    from app.src.previa_maneger import obter_previas
 
-    # 2. Cortar o vídeo
-    status_corte = cortar_video(caminho_video_original, caminho_video_cortado)
+    # 2. Cortar o vídeo (ou reaproveitar a prévia já cortada para o Telegram)
+    previas = obter_previas()
+    status_corte, caminho_video_cortado, _ = await asyncio.to_thread(
+        previas.obter, caminho_video_original, fixar=True
+    )
 
     if status_corte == "SUCESSO":
         logger.info("Corte do vídeo bem-sucedido. Preparando para postar.")
 
-        # 3. Postar o vídeo cortado no X
+        # 3. Postar o vídeo cortado no X (a prévia fica fixada durante o upload)
         texto_tweet = f"Novo video postado! 🔥\n\nPara ver o vídeo completo e muito mais, acesse nosso canal: {LINK_GRUPO}"
-        status_postagem = postar_video_no_twitter(
-            API_KEY,
-            API_KEY_SECRET,
-            ACCESS_TOKEN,
-            ACCESS_TOKEN_SECRET,
-            caminho_video_cortado,
-            texto_tweet,
-        )
+        try:
+            status_postagem = await publicador.postar_video_async(
+                caminho_video_cortado, texto_tweet
+            )
+        finally:
+            previas.soltar(caminho_video_cortado)
 
         if status_postagem:
             logger.info(
                 "Postagem no X concluída. Removendo vídeo original para economizar espaço."
             )
             # 4. Remover o vídeo original para evitar duplicatas e otimizar espaço
-            os.remove(caminho_video_original)
+            if aguardar_antes_de_remover is not None:
+                await asyncio.gather(aguardar_antes_de_remover, return_exceptions=True)
+            obter_armazem().remover(caminho_video_original)
         else:
             logger.error("Falha ao postar no X. O vídeo original será mantido.")
 
-        # 5. Limpar o arquivo de prévia temporário
-        if os.path.exists(caminho_video_cortado):
-            os.remove(caminho_video_cortado)
+        # 5. A prévia fica no armazém de prévias, que controla o espaço ocupado
 
     elif status_corte == "IGNORADO":
         logger.warning(
             "O vídeo foi ignorado pela rotina de corte (curto demais). Removendo vídeo original."
         )
-        os.remove(caminho_video_original)
+        if aguardar_antes_de_remover is not None:
+            await asyncio.gather(aguardar_antes_de_remover, return_exceptions=True)
+        obter_armazem().remover(caminho_video_original)
     else:  # ERRO
         logger.error(
             "Falha na rotina de corte. O processo para este vídeo foi abortado."
         )
 
-    logger.info("--- ROTINA DE POSTAGEM CONCLUÍDA ---")
 
+def rotina_postagem():
+    """Versão síncrona de rotina_postagem_async()."""
+    from app.src.telegram_client import executar
+
+    executar(rotina_postagem_async())
 
-def rotina_baixar_drive(select_video_name=None, paid=False):
+
+async def rotina_upload_e_postagem_async(caminhos_videos=None):
     """
-    Baixa um vídeo do Google Drive, tratando os seguintes casos:
-    1. Baixa um vídeo aleatório que ainda não esteja no cache.
-    2. Lida com erros como vídeo não encontrado ou todos os vídeos já baixados.
+    Executa o upload para o Telegram e a postagem no X ao mesmo tempo.
+
+    O tempo em que o X processa a prévia deixa de ser ocioso: os uploads seguem no
+    mesmo loop, e a remoção do vídeo original espera os uploads terminarem. Com
+    'caminhos_videos', só esses vídeos sobem e a prévia é do primeiro deles.
     """
-    logger.info("-------INICIANDO ROTINA DE DOWNLOAD DO DRIVE---------")
+    upload = asyncio.ensure_future(rotina_upload_async(caminhos_videos))
+    await asyncio.gather(
+        upload,
+        rotina_postagem_async(
+            aguardar_antes_de_remover=upload,
+            caminho_video=caminhos_videos[0] if caminhos_videos else None,
+        ),
+    )
 
-    driver = DriveManeger()
-    cache = CacheManeger(db=0)
-    service = driver.authenticate_google_drive()
-    video_list_drive = driver.find_videos_in_folder(service)
 
-    if not video_list_drive:
-        logger.warning("Nenhum vídeo foi encontrado na pasta do Drive. Encerrando.")
-        logger.info("-------ROTINA DE DOWNLOAD FINALIZADA---------")
-        return
+async def rotina_com_prefetch_async(paid=False, prefetch=PREFETCH_VIDEOS):
+    """
+    Envia o próximo vídeo já baixado enquanto os seguintes descem do Drive.
 
-    logger.info("Buscando um vídeo aleatório que ainda não foi baixado...")
+    O upload para o Telegram (uplink) e o download do Drive (downlink) se sobrepõem:
+    a execução usa o vídeo mais antigo baixado com antecedência (ou baixa um, se não
+    houver) e, ao mesmo tempo, mantém até 'prefetch' vídeos do mesmo tipo (pago ou
+    gratuito) na fila, dentro da cota de videos_brutos.
+    """
+    from app.src.armazem_maneger import BAIXADO, obter_armazem
 
-    # 1. Filtra a lista, removendo vídeos que já estão no cache e buscando apenas vídeos pagos ou não baseado na flag 'paid'.
-    if paid:
-        videos_disponiveis = [
-            video
-            for video in video_list_drive
-            if not cache.get_data(video["name"]) and video["name"].startswith("paid_")
-        ]
+    pendentes = [
+        caminho
+        for caminho in obter_armazem().listar(BAIXADO)
+        if os.path.basename(caminho).startswith("paid_") == paid
+    ]
+    if not pendentes:
+        pendentes = await asyncio.to_thread(rotina_baixar_drive, paid=paid)
+        if not pendentes:
+            return
+
+    atual = pendentes[0]
+    faltam = prefetch - (len(pendentes) - 1)
+    logger.info(
+        f"Enviando '{os.path.basename(atual)}'; {len(pendentes) - 1} vídeo(s) já na fila, "
+        f"{max(0, faltam)} a baixar com antecedência."
+    )
+
+    # O vídeo atual vira ENVIADO assim que chega ao Telegram, o primeiro estado a ser
+    # removido quando o prefetch precisa de espaço; fixado, ele só sai depois do X
+    armazem = obter_armazem()
+    armazem.fixar(atual)
+    try:
+        tarefas = [rotina_upload_e_postagem_async([atual])]
+        if faltam > 0:
+            tarefas.append(
+                asyncio.to_thread(
+                    rotina_baixar_drive, paid=paid, quantidade=faltam, prefetch=True
+                )
+            )
+        await asyncio.gather(*tarefas)
+    finally:
+        armazem.soltar(atual)
+
+
+def _selecionar_do_drive(driver, service, historico, armazem, paid, quantidade):
+    """
+    Escolhe até 'quantidade' vídeos novos do Drive (pagos ou gratuitos), retomando
+    antes os downloads interrompidos.
+
+    Returns:
+        list: Os vídeos escolhidos (metadados do Drive), ou [] se não houver nenhum.
+    """
+    from app.src.seletor import SeletorVideos, descartar_inelegiveis, escolher
+
+    if SELETOR_DRIVE:
+        # Percorre a pasta página por página, com memória limitada
+        logger.info(f"Selecionando vídeo(s) novo(s) no Drive (política '{SELETOR_DRIVE}')...")
+        videos_disponiveis = SeletorVideos(driver, historico).selecionar(
+            service,
+            paid=paid,
+            quantidade=max(1, quantidade),
+            politica=SELETOR_DRIVE,
+            preferir=armazem.downloads_interrompidos(),
+        )
     else:
-        videos_disponiveis = [
-            video
-            for video in video_list_drive
-            if not cache.get_data(video["name"])
-            and not video["name"].startswith("paid_")
-        ]
+        video_list_drive = driver.find_videos_in_folder(service)
+
+        if not video_list_drive:
+            logger.warning("Nenhum vídeo foi encontrado na pasta do Drive. Encerrando.")
+            return []
+
+        logger.info("Buscando um vídeo aleatório que ainda não foi baixado...")
+
+        # 1. Filtra a lista, removendo vídeos que já estão no cache e buscando apenas vídeos pagos ou não baseado na flag 'paid'.
+        historico.migrar_chaves_de_nome(video_list_drive)
+        videos_disponiveis = descartar_inelegiveis(
+            driver,
+            historico,
+            historico.filtrar_novos(
+                [video for video in video_list_drive if video["name"].startswith("paid_") == paid]
+            ),
+        )
 
     logger.debug(videos_disponiveis)
 
@@ -313,25 +471,136 @@ def rotina_baixar_drive(select_video_name=None, paid=False):
         logger.warning(
             "Todos os vídeos da pasta do Drive já foram baixados. Nada a fazer."
         )
-        logger.info("-------ROTINA DE DOWNLOAD FINALIZADA---------")
-        return
+        return []
 
-    # 3. Escolhe aleatoriamente da lista de vídeos JÁ FILTRADA
-    video_selecionado = random.choice(videos_disponiveis)
+    # 3. Escolhe da lista JÁ FILTRADA, retomando antes os downloads interrompidos. O
+    # seletor já devolve os vídeos escolhidos, na ordem da política
+    if SELETOR_DRIVE:
+        selecionados = videos_disponiveis
+    else:
+        selecionados = escolher(
+            videos_disponiveis, max(1, quantidade), armazem.downloads_interrompidos()
+        )
 
-    # --- LÓGICA DE DOWNLOAD ---
-    # Neste ponto, `video_selecionado` é garantidamente um objeto de vídeo válido para download.
+    # Neste ponto, `selecionados[0]` é garantidamente um objeto de vídeo válido para download.
     logger.info(
-        f"Vídeo selecionado para download: {video_selecionado['name']} (ID: {video_selecionado['id']})"
+        f"Vídeo selecionado para download: {selecionados[0]['name']} (ID: {selecionados[0]['id']})"
     )
+    return selecionados
+
+
+def rotina_baixar_drive(select_video_name=None, paid=False, quantidade=1, prefetch=False):
+    """
+    Baixa vídeos do Google Drive, tratando os seguintes casos:
+    1. Baixa até 'quantidade' vídeos aleatórios que ainda não estejam no cache.
+    2. Lida com erros como vídeo não encontrado ou todos os vídeos já baixados.
+
+    Com prefetch=True (download antecipado), um vídeo só é baixado se couber em
+    videos_brutos sem remover vídeos que ainda não foram enviados ao Telegram.
+
+    Returns:
+        list: Caminhos dos vídeos baixados para o disco.
+    """
+    from app.src.armazem_maneger import obter_armazem
+    from app.src.cache_maneger import CacheManeger
+    from app.src.drive_maneger import DriveManeger
+    from app.src.historico_maneger import HistoricoManeger
+
+    logger.info("-------INICIANDO ROTINA DE DOWNLOAD DO DRIVE---------")
+
+    driver = DriveManeger()
+    cache = CacheManeger(db=0)
+    service = driver.authenticate_google_drive()
+    # O histórico é indexado pelo md5/id do Drive, então renomear ou trocar o prefixo
+    # de um vídeo não faz com que ele seja baixado de novo.
+    historico = HistoricoManeger(cache)
+    armazem = obter_armazem()
 
-    # Baixa o vídeo
-    driver.download(service, video_selecionado, PASTA_DOWNLOADS)
+    selecionados = _selecionar_do_drive(driver, service, historico, armazem, paid, quantidade)
 
-    # Salva o nome do vídeo no cache para não baixá-lo novamente
-    cache.set_data(video_selecionado["name"], f"Video baixado em {date.today()}")
+    baixados = []
+    for video_selecionado in selecionados:
+        if prefetch and not armazem.tem_espaco(
+            video_selecionado["name"], video_selecionado.get("size")
+        ):
+            logger.info(
+                f"Sem espaço livre na cota para baixar '{video_selecionado['name']}' com antecedência. Prefetch encerrado."
+            )
+            break
+
+        # Baixa o vídeo (liberando espaço em videos_brutos antes, se necessário)
+        if not driver.download(service, video_selecionado, PASTA_DOWNLOADS, armazem):
+            logger.error(
+                f"O download de '{video_selecionado['name']}' não foi concluído. O vídeo não será marcado como baixado."
+            )
+            continue
+
+        # Registra o md5/id do vídeo no histórico para não baixá-lo novamente
+        historico.registrar_drive(video_selecionado, f"Video baixado em {date.today()}")
+        baixados.append(os.path.join(PASTA_DOWNLOADS, video_selecionado["name"]))
 
     logger.info("-------ROTINA DE DOWNLOAD FINALIZADA---------")
+    return baixados
+
+
+async def rotina_streaming_async():
+    """
+    Envia um vídeo gratuito do Drive direto para o grupo do Telegram, sem cópia em
+    videos_brutos (o DriveStream alimenta o upload em partes).
+
+    Returns:
+        bool: False se o vídeo escolhido não puder ser lido em streaming (o chamador
+        baixa para o disco); True nos demais casos, inclusive sem vídeo novo.
+    """
+    from app.src.armazem_maneger import obter_armazem
+    from app.src.cache_maneger import CacheManeger
+    from app.src.drive_maneger import DriveManeger
+    from app.src.historico_maneger import HistoricoManeger
+    from app.src.subir_video import subir_stream_para_telegram_async
+
+    logger.info("-------INICIANDO ENVIO EM STREAMING DO DRIVE---------")
+
+    driver = DriveManeger()
+    service = await asyncio.to_thread(driver.authenticate_google_drive)
+    historico = HistoricoManeger(CacheManeger(db=0))
+    selecionados = await asyncio.to_thread(
+        _selecionar_do_drive, driver, service, historico, obter_armazem(), False, 1
+    )
+    if not selecionados:
+        return True
+
+    video_selecionado = selecionados[0]
+    stream = await asyncio.to_thread(driver.open_stream, video_selecionado)
+    if stream is None:
+        logger.warning("Streaming indisponível para este vídeo. Baixando para o disco.")
+        return False
+
+    if await subir_stream_para_telegram_async(stream):
+        historico.registrar_drive(
+            video_selecionado, f"Video enviado via streaming em {date.today()}"
+        )
+    else:
+        logger.error(
+            f"O envio em streaming de '{video_selecionado['name']}' falhou. O vídeo não será marcado como enviado."
+        )
+    logger.info("-------ENVIO EM STREAMING FINALIZADO---------")
+    return True
+
+
+async def rotina_sem_x_async(paid=False):
+    """
+    Envia um vídeo ao Telegram sem postar a prévia no X.
+
+    Sem o corte da prévia do X, um vídeo gratuito não precisa do arquivo local: com
+    STREAMING_UPLOAD ele vai direto do Drive para o grupo. Os vídeos pagos (cuja
+    prévia do Telegram é cortada do arquivo) são baixados e enviados normalmente.
+    """
+    if STREAMING_UPLOAD and not paid and await rotina_streaming_async():
+        return
+
+    caminhos = await asyncio.to_thread(rotina_baixar_drive, paid=paid)
+    if caminhos:
+        await rotina_upload_async(caminhos)
 
 
 if __name__ == "__main__":
@@ -360,17 +629,33 @@ if __name__ == "__main__":
 
         logger.info("✅ Verificação do Telegram passou! Iniciando rotinas...")
 
-        # Recebe o parâmetro paid como um argumento de linha de comando
-        paid = sys.argv[1].lower() == "paid" if len(sys.argv) > 1 else False
-
-        # Baixa o video do drive
-        rotina_baixar_drive(paid=paid)
-        logger.info("-------INICIANDO ROTINA DE UPLOAD")
-        # Faz o upload do video para o telegram
-        rotina_upload()
-        logger.info("-------ROTINA DE UPLOAD POSTAGEM")
-        # Posta o video no X
-        rotina_postagem()
+        # Recebe os parâmetros 'paid', 'pipeline' e 'sem_x' como argumentos de linha de comando
+        argumentos = [argumento.lower() for argumento in sys.argv[1:]]
+        paid = "paid" in argumentos
+
+        from app.src.telegram_client import executar
+
+        if "pipeline" in argumentos or MODO_PIPELINE:
+            from app.src.fila_jobs import FilaJobs
+            from app.src.pipeline import executar_pipeline
+
+            if "retentar" in argumentos:
+                # Devolve à fila os jobs que esgotaram as tentativas em execuções anteriores
+                FilaJobs().retentar()
+            # Fila persistente em etapas: retoma vídeos interrompidos e sobrepõe etapas
+            executar(executar_pipeline(paid=paid))
+        elif "sem_x" in argumentos:
+            # Só o Telegram: vídeos gratuitos podem ir do Drive direto (STREAMING_UPLOAD)
+            executar(rotina_sem_x_async(paid=paid))
+        elif PREFETCH_VIDEOS > 0:
+            # Envia um vídeo já baixado enquanto os próximos descem do Drive
+            executar(rotina_com_prefetch_async(paid=paid))
+        else:
+            # Baixa o video do drive (a prévia do X é cortada do arquivo local)
+            rotina_baixar_drive(paid=paid)
+            logger.info("-------INICIANDO ROTINAS DE UPLOAD E POSTAGEM")
+            # Faz o upload do video para o telegram e posta a prévia no X em paralelo
+            executar(rotina_upload_e_postagem_async())
         logger.info("🎉 APLICAÇÃO FINALIZADA COM SUCESSO")
 
     except Exception as e:
@@ -381,3 +666,6 @@ if __name__ == "__main__":
         # Log final antes de sair
         logger.error("A aplicação será encerrada.")
         sys.exit(1)
+    finally:
+        # Tempo e vazão de cada etapa desta execução (Prometheus + resumo JSON)
+        obter_metricas().exportar()
@@ -1,16 +1,55 @@
+import asyncio
+import json
+import mimetypes
 import os
+import threading
 import time
+from urllib.parse import urlparse
 
 import backoff
+import requests
 import tweepy
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
+from app.config import obter_config
+from app.utils.gravacao import gravar_json_atomico
+from app.utils.hash_arquivo import md5_arquivo
 from app.utils.logger import ColorLogger
+from app.utils.metricas import obter_metricas
 
+config = obter_config()
 logger = ColorLogger()
-load_dotenv()
 
-logger = ColorLogger()
+# Espera entre consultas quando o X não informa check_after_secs
+ESPERA_PADRAO_PROCESSAMENTO = 5
+# Tempo máximo aguardando o X processar um vídeo
+TEMPO_MAXIMO_PROCESSAMENTO = 15 * 60
+
+# Upload em partes (INIT/APPEND/FINALIZE): tamanho de cada segmento (o X aceita até 5 MB)
+# e quantos segmentos sobem ao mesmo tempo
+X_SEGMENTO_MB = config.x_upload_segmento_mb
+X_UPLOAD_PARALELO = config.x_upload_paralelo
+ETAPA_TENTATIVAS = 3
+
+# Estado dos uploads em andamento/postados, para retomar após uma falha ou reinício
+X_UPLOAD_STATE_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "banco_dados",
+    "x_uploads.json",
+)
+# Por quanto tempo uma prévia já postada é lembrada (evita postagem dupla)
+VALIDADE_POSTAGEM = 30 * 24 * 60 * 60
+
+# Últimos limites de requisição informados pelo X (cabeçalhos x-rate-limit-*)
+X_LIMITES_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "banco_dados",
+    "x_limites.json",
+)
+# Endpoints que uma postagem de vídeo consome
+ENDPOINTS_POSTAGEM = ("/1.1/media/upload.json", "/2/tweets")
+
+_publicadores = {}
 
 # --- NOSSOS NOVOS HANDLERS DE LOG ---
 
@@ -25,6 +64,8 @@ def log_backoff_attempt(details):
     delay = details["wait"]
     args_chamada = details["args"]
 
+    etapa = "x_tweet" if details["target"].__name__ == "_criar_tweet" else "x_upload"
+    obter_metricas().registrar_tentativa(etapa)
     logger.warning(
         f"BACKOFF: Tentativa nº {tentativa} falhou. "
         f"Erro: [{type(erro).__name__}: {erro}]. "
@@ -48,79 +89,434 @@ def log_giveup(details):
     )
 
 
-@backoff.on_exception(
+def _erro_definitivo(erro):
+    """Erros do cliente (400/401/403/404/429) não melhoram com uma nova tentativa."""
+    return isinstance(
+        erro,
+        (
+            tweepy.errors.BadRequest,
+            tweepy.errors.Unauthorized,
+            tweepy.errors.Forbidden,
+            tweepy.errors.NotFound,
+            # Com limite esgotado, esperar o backoff não adianta: o horário de
+            # liberação fica em PublicadorX.proxima_postagem_permitida()
+            tweepy.errors.TooManyRequests,
+        ),
+    )
+
+
+# Cada etapa do upload/postagem é refeita isoladamente, sem repetir as já concluídas
+retentativa_x = backoff.on_exception(
     backoff.expo,  # Estratégia de backoff exponencial
-    exception=tweepy.errors.TweepyException,  # Tupla de exceções que acionam a retentativa
-    max_tries=3,  # Número máximo de tentativas
-    jitter=backoff.full_jitter,  # Adiciona um fator aleatório ao delay (boa prática)
+    exception=tweepy.errors.TweepyException,
+    max_tries=ETAPA_TENTATIVAS,
+    jitter=backoff.full_jitter,
+    giveup=_erro_definitivo,
     on_backoff=log_backoff_attempt,
     on_giveup=log_giveup,
 )
-def postar_video_no_twitter(
-    API_KEY,
-    API_KEY_SECRET,
-    ACCESS_TOKEN,
-    ACCESS_TOKEN_SECRET,
-    caminho_do_video,
-    texto_do_tweet,
-):
+
+
+@retentativa_x
+def _iniciar_upload(api_v1, tamanho, mime_type):
+    """INIT: reserva um media_id para o upload em partes."""
+    return api_v1.chunked_upload_init(
+        tamanho, mime_type, media_category="tweet_video"
+    )
+
+
+@retentativa_x
+def _enviar_segmento(api_v1, media_id, caminho_do_video, indice, tamanho_segmento):
+    """APPEND: envia um único segmento do arquivo."""
+    with open(caminho_do_video, "rb") as f:
+        f.seek(indice * tamanho_segmento)
+        dados = f.read(tamanho_segmento)
+    api_v1.chunked_upload_append(media_id, dados, indice)
+
+
+@retentativa_x
+def _finalizar_upload(api_v1, media_id):
+    """FINALIZE: fecha o upload e inicia o processamento no X."""
+    return api_v1.chunked_upload_finalize(media_id)
+
+
+@retentativa_x
+def _criar_tweet(client_v2, texto_do_tweet, media_id):
+    """Publica o tweet com a mídia já processada."""
+    return client_v2.create_tweet(text=texto_do_tweet, media_ids=[media_id])
+
+
+def _carregar_estados():
+    """Carrega o estado dos uploads, descartando entradas vencidas."""
+    try:
+        with open(X_UPLOAD_STATE_FILE, "r") as f:
+            estados = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+    agora = time.time()
+    return {
+        chave: estado
+        for chave, estado in estados.items()
+        if (estado.get("postado_em") or 0) + VALIDADE_POSTAGEM > agora
+        or (not estado.get("tweet_id") and estado["expira_em"] > agora)
+    }
+
+
+def _salvar_estados(estados):
+    """Grava o estado dos uploads no disco de forma atômica."""
+    gravar_json_atomico(X_UPLOAD_STATE_FILE, estados)
+
+
+async def _enviar_midia(api_v1, caminho_do_video, chave, estados):
     """
-    Faz o upload de um vídeo (API v1.1) e o posta (API v2).
+    Faz o upload em partes, retomando de onde parou se houver estado salvo.
 
-    :param caminho_do_video: O caminho completo para o arquivo de vídeo.
-    :param texto_do_tweet: O texto que acompanhará o vídeo.
-    :return: True se foi bem-sucedido, False caso contrário.
+    O media_id e os índices dos segmentos já aceitos ficam em X_UPLOAD_STATE_FILE; uma
+    falha num segmento só refaz aquele segmento, e um reinício envia apenas os que
+    faltam. Até X_UPLOAD_PARALELO segmentos sobem ao mesmo tempo.
+
+    :return: O objeto Media devolvido pelo FINALIZE (ou pelo STATUS, se já finalizado).
     """
-    if not all([API_KEY, API_KEY_SECRET, ACCESS_TOKEN, ACCESS_TOKEN_SECRET]):
-        logger.error(
-            "Uma ou mais chaves da API do Twitter não foram encontradas no arquivo .env."
+    estado = estados.get(chave)
+
+    if estado is None:
+        tamanho = os.path.getsize(caminho_do_video)
+        tamanho_segmento = X_SEGMENTO_MB * 1024 * 1024
+        mime_type = mimetypes.guess_type(caminho_do_video)[0] or "video/mp4"
+        media = await asyncio.to_thread(_iniciar_upload, api_v1, tamanho, mime_type)
+        estado = {
+            "media_id": media.media_id,
+            "expira_em": time.time() + getattr(media, "expires_after_secs", 24 * 60 * 60),
+            "tamanho_segmento": tamanho_segmento,
+            "total_segmentos": (tamanho + tamanho_segmento - 1) // tamanho_segmento,
+            "segmentos_concluidos": [],
+            "finalizado": False,
+            "tweet_id": None,
+            "postado_em": None,
+        }
+        estados[chave] = estado
+        _salvar_estados(estados)
+    else:
+        logger.info(
+            f"Retomando upload para o X (media_id {estado['media_id']}): "
+            f"{len(estado['segmentos_concluidos'])} de {estado['total_segmentos']} segmento(s) já enviados."
         )
-        return False
 
-    if not os.path.exists(caminho_do_video):
-        logger.error(f"Arquivo de vídeo não encontrado em '{caminho_do_video}'")
-        return False
+    media_id = estado["media_id"]
+    concluidos = set(estado["segmentos_concluidos"])
+    semaforo = asyncio.Semaphore(X_UPLOAD_PARALELO)
 
-    # ---- MUDANÇA PRINCIPAL AQUI ----
-    # 1. Autenticação v1.1 para UPLOAD de mídia
-    auth = tweepy.OAuth1UserHandler(
-        API_KEY, API_KEY_SECRET, ACCESS_TOKEN, ACCESS_TOKEN_SECRET
-    )
-    api_v1 = tweepy.API(auth)
-    logger.info("Autenticado na API v1.1 para upload de mídia.")
-
-    # 2. Cliente v2 para PUBLICAR o tweet
-    client_v2 = tweepy.Client(
-        consumer_key=API_KEY,
-        consumer_secret=API_KEY_SECRET,
-        access_token=ACCESS_TOKEN,
-        access_token_secret=ACCESS_TOKEN_SECRET,
-    )
-    logger.info("Cliente da API v2 criado para publicação.")
-    # ---- FIM DA MUDANÇA ----
+    async def enviar(indice):
+        async with semaforo:
+            await asyncio.to_thread(
+                _enviar_segmento,
+                api_v1,
+                media_id,
+                caminho_do_video,
+                indice,
+                estado["tamanho_segmento"],
+            )
+        estado["segmentos_concluidos"].append(indice)
+        _salvar_estados(estados)
 
-    logger.info(f"Iniciando upload do vídeo '{caminho_do_video}' via API v1.1...")
-    media = api_v1.media_upload(
-        filename=caminho_do_video, chunked=True, media_category="tweet_video"
+    await asyncio.gather(
+        *(
+            enviar(indice)
+            for indice in range(estado["total_segmentos"])
+            if indice not in concluidos
+        )
     )
-    logger.info("Upload do vídeo concluído. Aguardando processamento...")
 
-    while media.processing_info["state"] == "pending":
-        logger.info("Vídeo ainda está pendente, aguardando 10 segundos...")
-        time.sleep(10)
-        media = api_v1.get_media_status(media.media_id)
+    if estado["finalizado"]:
+        return await asyncio.to_thread(api_v1.get_media_upload_status, media_id)
+
+    media = await asyncio.to_thread(_finalizar_upload, api_v1, media_id)
+    estado["finalizado"] = True
+    _salvar_estados(estados)
+    return media
+
+
+async def aguardar_processamento(api_v1, media):
+    """
+    Aguarda o X terminar de processar um vídeo enviado com upload em partes.
+
+    Segue o check_after_secs devolvido pela API em vez de um intervalo fixo, e a espera
+    é um asyncio.sleep: enquanto o X processa, o loop continua livre para outros
+    trabalhos (ex.: uploads para o Telegram).
+
+    :return: Latência do processamento em segundos, ou None se ele falhou.
+    """
+    inicio = time.monotonic()
+    info = getattr(media, "processing_info", None)
+
+    while info and info.get("state") in ("pending", "in_progress"):
+        if time.monotonic() - inicio > TEMPO_MAXIMO_PROCESSAMENTO:
+            logger.error(
+                f"O X não terminou de processar o vídeo em {TEMPO_MAXIMO_PROCESSAMENTO}s. Desistindo."
+            )
+            return None
+
+        espera = info.get("check_after_secs", ESPERA_PADRAO_PROCESSAMENTO)
+        logger.info(
+            f"Processamento no X: {info.get('progress_percent', 0)}% ({info['state']}). "
+            f"Nova consulta em {espera}s..."
+        )
+        await asyncio.sleep(espera)
+        media = await asyncio.to_thread(api_v1.get_media_upload_status, media.media_id)
+        info = getattr(media, "processing_info", None)
+
+    latencia = time.monotonic() - inicio
+    if info and info.get("state") == "failed":
+        logger.error(f"O processamento do vídeo pelo Twitter falhou: {info.get('error')}")
+        return None
+
+    logger.info(f"Vídeo processado com sucesso! Latência de processamento no X: {latencia:.1f}s.")
+    return latencia
+
+
+class PublicadorX:
+    """
+    Publicador do X de vida longa: mantém os clientes e as conexões entre postagens.
+
+    Os clientes v1.1 (upload) e v2 (tweet) compartilham uma única sessão HTTP com pool
+    de conexões, então postagens seguidas reaproveitam o TLS. Um hook da sessão lê os
+    cabeçalhos x-rate-limit-* de toda resposta e guarda os limites por endpoint (também
+    em X_LIMITES_FILE, para a próxima execução), expostos em proxima_postagem_permitida().
+    """
+
+    def __init__(self, api_key, api_key_secret, access_token, access_token_secret):
+        self.sessao = requests.Session()
+        adaptador = HTTPAdapter(
+            pool_connections=2, pool_maxsize=X_UPLOAD_PARALELO + 2
+        )
+        self.sessao.mount("https://", adaptador)
+        self.sessao.hooks["response"].append(self._registrar_limites)
+
+        self._trava = threading.Lock()
+        try:
+            with open(X_LIMITES_FILE, "r") as f:
+                self.limites = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.limites = {}
+
+        # 1. Autenticação v1.1 para UPLOAD de mídia
+        auth = tweepy.OAuth1UserHandler(
+            api_key, api_key_secret, access_token, access_token_secret
+        )
+        self.api_v1 = tweepy.API(auth)
+        self.api_v1.session = self.sessao
+
+        # 2. Cliente v2 para PUBLICAR o tweet
+        self.client_v2 = tweepy.Client(
+            consumer_key=api_key,
+            consumer_secret=api_key_secret,
+            access_token=access_token,
+            access_token_secret=access_token_secret,
+        )
+        self.client_v2.session = self.sessao
+        logger.info("Clientes da API do X (v1.1 e v2) criados com sessão compartilhada.")
+
+    def _registrar_limites(self, resposta, *args, **kwargs):
+        """Hook da sessão: guarda os limites informados pelo X para o endpoint."""
+        cabecalhos = resposta.headers
+        if "x-rate-limit-remaining" not in cabecalhos and resposta.status_code != 429:
+            return
+
+        endpoint = urlparse(resposta.url).path
+        limite = {
+            "limite": int(cabecalhos.get("x-rate-limit-limit", 0)),
+            "restantes": int(cabecalhos.get("x-rate-limit-remaining", 0)),
+            "reset": int(cabecalhos.get("x-rate-limit-reset", 0)),
+        }
+        if resposta.status_code == 429:
+            limite["restantes"] = 0
+        # Limite diário por usuário, informado na criação de tweets
+        if cabecalhos.get("x-user-limit-24hour-remaining") == "0":
+            limite["restantes"] = 0
+            limite["reset"] = max(
+                limite["reset"], int(cabecalhos.get("x-user-limit-24hour-reset", 0))
+            )
+
+        with self._trava:
+            self.limites[endpoint] = limite
+            gravar_json_atomico(X_LIMITES_FILE, self.limites)
+
+        if limite["restantes"] == 0:
+            logger.warning(
+                f"Limite do X esgotado em {endpoint} até {time.ctime(limite['reset'])}."
+            )
+
+    def proxima_postagem_permitida(self):
+        """
+        Retorna o timestamp a partir do qual uma postagem de vídeo não deve receber 429.
+
+        Se nenhum endpoint usado na postagem estiver com o limite esgotado, é agora.
+        """
+        agora = time.time()
+        with self._trava:
+            bloqueios = [
+                self.limites[endpoint]["reset"]
+                for endpoint in ENDPOINTS_POSTAGEM
+                if endpoint in self.limites
+                and self.limites[endpoint]["restantes"] == 0
+                and self.limites[endpoint]["reset"] > agora
+            ]
+        return max(bloqueios, default=agora)
 
-    if media.processing_info["state"] == "failed":
+    async def postar_video_async(self, caminho_do_video, texto_do_tweet):
+        """
+        Faz o upload de um vídeo (API v1.1) e o posta (API v2), sem bloquear o loop.
+
+        As chamadas HTTP rodam em threads e a espera pelo processamento do vídeo segue o
+        check_after_secs do X (veja aguardar_processamento). Upload e publicação são
+        etapas separadas, cada uma com suas próprias retentativas: uma falha ao criar o
+        tweet não reenvia o vídeo, e uma prévia já postada não é postada de novo.
+
+        :param caminho_do_video: O caminho completo para o arquivo de vídeo.
+        :param texto_do_tweet: O texto que acompanhará o vídeo.
+        :return: True se foi bem-sucedido, False caso contrário.
+        """
+        if not os.path.exists(caminho_do_video):
+            logger.error(f"Arquivo de vídeo não encontrado em '{caminho_do_video}'")
+            return False
+
+        liberacao = self.proxima_postagem_permitida()
+        if liberacao > time.time():
+            logger.warning(
+                f"Limite de requisições do X esgotado. Próxima postagem permitida em {time.ctime(liberacao)}."
+            )
+            return False
+
+        # O estado é indexado pelo md5 do arquivo inteiro (uma prévia tem poucos MB)
+        chave = await asyncio.to_thread(md5_arquivo, caminho_do_video)
+        estados = _carregar_estados()
+        if (estados.get(chave) or {}).get("tweet_id"):
+            logger.warning(
+                f"Esta prévia já foi postada (tweet {estados[chave]['tweet_id']}). Nada a fazer."
+            )
+            return True
+
+        metricas = obter_metricas()
+        # Numa retomada, só os segmentos que faltam contam para a vazão
+        estado = estados.get(chave)
+        bytes_pendentes = os.path.getsize(caminho_do_video) - (
+            len(estado["segmentos_concluidos"]) * estado["tamanho_segmento"] if estado else 0
+        )
+
+        try:
+            logger.info(f"Iniciando upload do vídeo '{caminho_do_video}' via API v1.1...")
+            with metricas.span("x_upload", bytes=max(0, bytes_pendentes)):
+                media = await _enviar_midia(self.api_v1, caminho_do_video, chave, estados)
+            logger.info("Upload do vídeo concluído. Aguardando processamento...")
+
+            with metricas.span("x_processamento") as span:
+                latencia = await aguardar_processamento(self.api_v1, media)
+                if latencia is None:
+                    span.erro = "processamento"
+            if latencia is None:
+                # A mídia não pode mais ser usada; o próximo envio recomeça do INIT
+                estados.pop(chave, None)
+                _salvar_estados(estados)
+                return False
+
+            logger.info("Publicando o tweet via API v2...")
+            # Usa o cliente v2 para criar o tweet, passando o ID da mídia
+            with metricas.span("x_tweet"):
+                resposta = await asyncio.to_thread(
+                    _criar_tweet, self.client_v2, texto_do_tweet, media.media_id
+                )
+        except tweepy.errors.TooManyRequests:
+            logger.error(
+                f"Limite de requisições do X atingido. Próxima postagem permitida em "
+                f"{time.ctime(self.proxima_postagem_permitida())}. O progresso do upload foi salvo."
+            )
+            return False
+        except tweepy.errors.BadRequest as e:
+            # O media_id salvo foi recusado (expirado ou inválido); o próximo envio recomeça do INIT
+            logger.error(f"O X recusou a mídia: {e}. O upload será refeito na próxima tentativa.")
+            estados.pop(chave, None)
+            _salvar_estados(estados)
+            return False
+        except tweepy.errors.TweepyException as e:
+            logger.error(
+                f"Falha ao postar no X: {e}. O progresso do upload foi salvo para a próxima tentativa."
+            )
+            return False
+
+        estados[chave]["tweet_id"] = resposta.data["id"]
+        estados[chave]["postado_em"] = time.time()
+        _salvar_estados(estados)
+
+        logger.info("✅ SUCESSO! Vídeo postado no Twitter.")
+        return True
+
+
+def obter_publicador(
+    API_KEY=None,
+    API_KEY_SECRET=None,
+    ACCESS_TOKEN=None,
+    ACCESS_TOKEN_SECRET=None,
+):
+    """
+    Retorna o PublicadorX do processo para as credenciais informadas (sem elas, as
+    da configuração, lidas na chamada).
+
+    :return: O publicador, ou None se alguma chave estiver ausente.
+    """
+    config = obter_config()
+    credenciais = (
+        API_KEY or config.api_key,
+        API_KEY_SECRET or config.api_key_secret,
+        ACCESS_TOKEN or config.access_token,
+        ACCESS_TOKEN_SECRET or config.access_token_secret,
+    )
+    if not all(credenciais):
         logger.error(
-            f"O processamento do vídeo pelo Twitter falhou: {media.processing_info['error']}"
+            "Uma ou mais chaves da API do Twitter não foram encontradas no arquivo .env."
         )
-        return False
+        return None
 
-    logger.info("Vídeo processado com sucesso!")
+    if credenciais not in _publicadores:
+        _publicadores[credenciais] = PublicadorX(*credenciais)
+    return _publicadores[credenciais]
 
-    logger.info("Publicando o tweet via API v2...")
-    # Usa o cliente v2 para criar o tweet, passando o ID da mídia
-    client_v2.create_tweet(text=texto_do_tweet, media_ids=[media.media_id])
 
-    logger.info("✅ SUCESSO! Vídeo postado no Twitter.")
-    return True
+async def postar_video_no_twitter_async(
+    API_KEY,
+    API_KEY_SECRET,
+    ACCESS_TOKEN,
+    ACCESS_TOKEN_SECRET,
+    caminho_do_video,
+    texto_do_tweet,
+):
+    """
+    Posta um vídeo no X usando o PublicadorX compartilhado (veja postar_video_async).
+
+    :return: True se foi bem-sucedido, False caso contrário.
+    """
+    publicador = obter_publicador(API_KEY, API_KEY_SECRET, ACCESS_TOKEN, ACCESS_TOKEN_SECRET)
+    if publicador is None:
+        return False
+    return await publicador.postar_video_async(caminho_do_video, texto_do_tweet)
+
+
+def postar_video_no_twitter(
+    API_KEY,
+    API_KEY_SECRET,
+    ACCESS_TOKEN,
+    ACCESS_TOKEN_SECRET,
+    caminho_do_video,
+    texto_do_tweet,
+):
+    """Versão síncrona de postar_video_no_twitter_async()."""
+    return asyncio.run(
+        postar_video_no_twitter_async(
+            API_KEY,
+            API_KEY_SECRET,
+            ACCESS_TOKEN,
+            ACCESS_TOKEN_SECRET,
+            caminho_do_video,
+            texto_do_tweet,
+        )
+    )
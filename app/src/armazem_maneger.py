@@ -0,0 +1,322 @@
+import json
+import os
+import shutil
+import threading
+import time
+
+from app.config import obter_config
+from app.utils.gravacao import gravar_json_atomico
+from app.utils.hash_arquivo import md5_arquivo
+from app.utils.instancia_unica import instancia_unica
+from app.utils.logger import ColorLogger
+
+config = obter_config()
+logger = ColorLogger()
+
+PASTA_VIDEOS_BRUTOS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "videos_brutos",
+)
+ARMAZEM_INDEX_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "banco_dados",
+    "videos_brutos.json",
+)
+# Espaço máximo ocupado pelos vídeos baixados do Drive
+VIDEOS_LIMITE_BYTES = config.videos_limite_mb * 1024 * 1024
+# Espaço que sempre fica livre no disco, além da cota (banco, sessões, prévias...)
+MARGEM_DISCO_BYTES = 512 * 1024 * 1024
+
+EXTENSOES_VIDEO = (".mp4", ".avi", ".mov", ".mkv", ".wmv", ".flv", ".webm", ".m4v")
+
+# Estados de um vídeo na pasta
+BAIXANDO = "baixando"  # Download em andamento ou interrompido (arquivo .part)
+BAIXADO = "baixado"  # Ainda não enviado ao Telegram
+ENVIADO = "enviado"  # Já está no Telegram; só falta a postagem da prévia no X
+
+# Ordem de remoção quando falta espaço: primeiro o que já foi enviado, depois downloads
+# parados. Vídeos BAIXADO nunca são removidos: o histórico já registrou o id/md5 do
+# Drive e eles não seriam baixados de novo (se perderiam sem envio)
+PRIORIDADE_REMOCAO = {ENVIADO: 0, BAIXANDO: 1}
+
+
+def _ocupado(caminho):
+    """Bytes realmente ocupados no disco (o .part pré-alocado é esparso)."""
+    try:
+        info = os.stat(caminho)
+    except OSError:
+        return 0
+    blocos = getattr(info, "st_blocks", None)
+    return blocos * 512 if blocos is not None else info.st_size
+
+
+class ArmazemManeger:
+    """
+    Controle de espaço da pasta de vídeos baixados (videos_brutos).
+
+    Guarda o tamanho, o estado, o último uso e o md5 de cada vídeo, e mantém a pasta dentro
+    de VIDEOS_LIMITE_BYTES. Antes de um download, reservar() confere se o vídeo cabe
+    na cota e no disco e, se preciso, remove os vídeos menos importantes: os já
+    enviados ao Telegram e depois os downloads interrompidos, sempre dos usados há
+    mais tempo para os mais recentes (LRU). Vídeos ainda não enviados nunca são
+    removidos: sem espaço, o download não é feito.
+    """
+
+    def __init__(self, pasta=PASTA_VIDEOS_BRUTOS, index_path=ARMAZEM_INDEX_FILE, limite_bytes=VIDEOS_LIMITE_BYTES):
+        self.pasta = pasta
+        self.index_path = index_path
+        self.limite_bytes = limite_bytes
+        self._trava = threading.Lock()
+        self._em_uso = set()
+        self._fixados = {}
+        try:
+            with open(self.index_path, "r") as f:
+                self.entradas = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.entradas = {}
+
+    def _salvar(self):
+        """Grava o índice no disco de forma atômica (chamado com a trava)."""
+        gravar_json_atomico(self.index_path, self.entradas)
+
+    def _caminhos(self, nome):
+        caminho = os.path.join(self.pasta, nome)
+        return caminho, f"{caminho}.part", f"{caminho}.part.json"
+
+    def _sincronizar(self):
+        """
+        Ajusta o índice ao conteúdo da pasta (chamado com a trava): adota arquivos
+        que chegaram por fora do armazém e esquece os que foram apagados.
+        """
+        os.makedirs(self.pasta, exist_ok=True)
+        for arquivo in os.listdir(self.pasta):
+            nome = arquivo[: -len(".part")] if arquivo.endswith(".part") else arquivo
+            if nome in self.entradas or not nome.lower().endswith(EXTENSOES_VIDEO):
+                continue
+            caminho = os.path.join(self.pasta, arquivo)
+            self.entradas[nome] = {
+                "tamanho": os.path.getsize(caminho),
+                "estado": BAIXANDO if arquivo.endswith(".part") else BAIXADO,
+                "ultimo_uso": os.path.getmtime(caminho),
+            }
+
+        for nome in list(self.entradas):
+            caminho, part_path, _ = self._caminhos(nome)
+            if nome not in self._em_uso and not (
+                os.path.exists(caminho) or os.path.exists(part_path)
+            ):
+                del self.entradas[nome]
+
+    def usado(self):
+        """Bytes reservados pelos vídeos da pasta (tamanho final de cada um)."""
+        with self._trava:
+            self._sincronizar()
+            return sum(entrada["tamanho"] for entrada in self.entradas.values())
+
+    def reservar(self, nome, tamanho, md5=None):
+        """
+        Reserva espaço para o download de 'nome', liberando espaço se necessário.
+
+        O 'md5' (md5Checksum do Drive) fica guardado com o vídeo e identifica o seu
+        conteúdo nos caches de upload e de prévias (veja md5()).
+
+        O vídeo fica protegido contra remoção até marcar() ou liberar().
+
+        Returns:
+            bool: True se o vídeo cabe, False se nem removendo os outros haveria espaço.
+        """
+        tamanho = int(tamanho or 0)
+        with self._trava:
+            self._sincronizar()
+            _, part_path, _ = self._caminhos(nome)
+            # O que já foi baixado de um download interrompido não precisa de espaço novo
+            falta_no_disco = max(0, tamanho - _ocupado(part_path))
+
+            if not self._liberar_espaco(nome, tamanho, falta_no_disco):
+                return False
+
+            self.entradas[nome] = {
+                "tamanho": tamanho,
+                "estado": BAIXANDO,
+                "ultimo_uso": time.time(),
+                "md5": md5,
+            }
+            self._em_uso.add(nome)
+            self._salvar()
+        return True
+
+    def listar(self, estado):
+        """Caminhos dos vídeos completos no 'estado', do usado há mais tempo ao mais recente."""
+        with self._trava:
+            self._sincronizar()
+            nomes = sorted(
+                (
+                    nome
+                    for nome, entrada in self.entradas.items()
+                    if entrada["estado"] == estado
+                    and os.path.exists(os.path.join(self.pasta, nome))
+                ),
+                key=lambda nome: self.entradas[nome]["ultimo_uso"],
+            )
+        return [os.path.join(self.pasta, nome) for nome in nomes]
+
+    def md5(self, caminho):
+        """
+        md5 do conteúdo do vídeo: o md5Checksum do Drive guardado no download ou, na
+        falta dele, o md5 do arquivo inteiro, calculado uma vez e guardado no índice.
+        Arquivos fora da pasta têm o md5 calculado a cada chamada.
+        """
+        nome = os.path.basename(caminho)
+        na_pasta = os.path.dirname(os.path.abspath(caminho)) == os.path.abspath(self.pasta)
+        tamanho = os.path.getsize(caminho)
+
+        with self._trava:
+            entrada = self.entradas.get(nome) if na_pasta else None
+            if entrada and entrada.get("md5") and entrada.get("tamanho") == tamanho:
+                return entrada["md5"]
+
+        md5 = md5_arquivo(caminho)
+        if na_pasta:
+            with self._trava:
+                self._sincronizar()
+                entrada = self.entradas.get(nome)
+                if entrada is not None and entrada.get("tamanho") == tamanho:
+                    entrada["md5"] = md5
+                    self._salvar()
+        return md5
+
+    def downloads_interrompidos(self):
+        """Nomes dos vídeos com download parcial retomável (com sidecar '.part.json')."""
+        if not os.path.isdir(self.pasta):
+            return set()
+        return {
+            arquivo[: -len(".part.json")]
+            for arquivo in os.listdir(self.pasta)
+            if arquivo.endswith(".part.json")
+        }
+
+    def tem_espaco(self, nome, tamanho):
+        """
+        Diz se reservar() aceitaria 'nome', sem remover nada (usado pelo prefetch).
+        """
+        tamanho = int(tamanho or 0)
+        with self._trava:
+            self._sincronizar()
+            _, part_path, _ = self._caminhos(nome)
+            return self._cabe(
+                nome, tamanho, max(0, tamanho - _ocupado(part_path)), self._candidatos(nome)
+            )
+
+    def marcar(self, caminho, estado):
+        """Atualiza o estado (e o último uso) do vídeo e libera a proteção de reservar()."""
+        nome = os.path.basename(caminho)
+        with self._trava:
+            self._em_uso.discard(nome)
+            entrada = self.entradas.setdefault(nome, {"tamanho": 0})
+            if os.path.exists(caminho):
+                entrada["tamanho"] = os.path.getsize(caminho)
+            entrada["estado"] = estado
+            entrada["ultimo_uso"] = time.time()
+            self._salvar()
+
+    def liberar(self, nome):
+        """Libera a proteção de um download que não terminou (ele pode ser retomado)."""
+        with self._trava:
+            self._em_uso.discard(os.path.basename(nome))
+
+    def fixar(self, caminho):
+        """
+        Protege o vídeo contra remoção para liberar espaço até soltar(), mesmo depois
+        de marcado como ENVIADO (ex.: enquanto a prévia do X ainda é cortada dele).
+        As proteções se acumulam: cada fixar() precisa do seu soltar().
+        """
+        nome = os.path.basename(caminho)
+        with self._trava:
+            self._fixados[nome] = self._fixados.get(nome, 0) + 1
+
+    def soltar(self, caminho):
+        """Desfaz um fixar()."""
+        nome = os.path.basename(caminho)
+        with self._trava:
+            restantes = self._fixados.get(nome, 0) - 1
+            if restantes > 0:
+                self._fixados[nome] = restantes
+            else:
+                self._fixados.pop(nome, None)
+
+    def remover(self, caminho):
+        """Apaga o vídeo (e um eventual download parcial) e o tira do índice."""
+        nome = os.path.basename(caminho)
+        with self._trava:
+            self._remover(nome)
+            self._salvar()
+
+    def _remover(self, nome):
+        self._em_uso.discard(nome)
+        self.entradas.pop(nome, None)
+        for caminho in self._caminhos(nome):
+            if os.path.exists(caminho):
+                os.remove(caminho)
+
+    def _candidatos(self, manter):
+        """
+        Vídeos que podem ser removidos, na ordem de remoção (chamado com a trava).
+        Downloads em andamento, vídeos fixados e vídeos ainda não enviados nunca entram.
+        """
+        return sorted(
+            (
+                nome
+                for nome, entrada in self.entradas.items()
+                if entrada["estado"] in PRIORIDADE_REMOCAO
+                and nome != manter
+                and nome not in self._em_uso
+                and nome not in self._fixados
+            ),
+            key=lambda nome: (
+                PRIORIDADE_REMOCAO[self.entradas[nome]["estado"]],
+                self.entradas[nome]["ultimo_uso"],
+            ),
+        )
+
+    def _cabe(self, manter, tamanho, falta_no_disco, removiveis=()):
+        """Diz se 'manter' cabe na cota e no disco sem os vídeos 'removiveis'."""
+        usado = sum(
+            entrada["tamanho"]
+            for nome, entrada in self.entradas.items()
+            if nome != manter and nome not in removiveis
+        )
+        livre = shutil.disk_usage(self.pasta).free + sum(
+            _ocupado(caminho) for nome in removiveis for caminho in self._caminhos(nome)
+        )
+        return (
+            usado + tamanho <= self.limite_bytes
+            and livre - falta_no_disco >= MARGEM_DISCO_BYTES
+        )
+
+    def _liberar_espaco(self, manter, tamanho, falta_no_disco):
+        """
+        Remove vídeos até 'tamanho' caber na cota e 'falta_no_disco' caber no disco
+        (chamado com a trava). Só saem os vídeos de _candidatos(), nunca 'manter'.
+        """
+        candidatos = self._candidatos(manter)
+        # Se nem removendo tudo o vídeo caberia, nada é apagado à toa
+        if not self._cabe(manter, tamanho, falta_no_disco, candidatos):
+            logger.error(
+                f"Sem espaço para '{manter}' ({tamanho / (1024 * 1024):.0f} MB): "
+                f"cota de {self.limite_bytes / (1024 * 1024):.0f} MB ou disco cheio."
+            )
+            return False
+
+        for nome in candidatos:
+            if self._cabe(manter, tamanho, falta_no_disco):
+                return True
+            estado = self.entradas[nome]["estado"]
+            logger.info(f"Vídeo '{nome}' ({estado}) removido para liberar espaço.")
+            self._remover(nome)
+        return True
+
+
+@instancia_unica
+def obter_armazem():
+    """Retorna o armazém de vídeos baixados do processo (carregado uma vez)."""
+    return ArmazemManeger()
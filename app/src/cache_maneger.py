@@ -1,11 +1,9 @@
-import os
-
 import redis
-from dotenv import load_dotenv
 
-from .utils import ColorLogger
+from app.config import obter_config
+from app.utils.logger import ColorLogger
+from app.utils.metricas import obter_metricas
 
-load_dotenv()
 logger = ColorLogger("Redis manager")
 
 
@@ -14,27 +12,23 @@ class CacheManeger:
     Uma classe para gerenciar a conexão e operações básicas com um banco de dados Redis.
     """
 
-    def __init__(
-        self,
-        host=os.getenv("REDIS_HOST"),
-        port=os.getenv("REDIS_PORT"),
-        db=os.getenv("REDIS_DB"),
-    ):
+    def __init__(self, host=None, port=None, db=None):
         """
         Inicializa a conexão com o Redis.
 
         Args:
-            host (str): O hostname do servidor Redis.
-            port (int): A porta do servidor Redis.
-            db (int): O número do banco de dados a ser usado.
+            host (str): O hostname do servidor Redis (padrão: REDIS_HOST).
+            port (int): A porta do servidor Redis (padrão: REDIS_PORT).
+            db (int): O número do banco de dados a ser usado (padrão: REDIS_DB).
         """
-        if not all([os.getenv("REDIS_USER"), os.getenv("REDIS_PASSWORD")]):
+        self.config = obter_config()
+        if not all([self.config.redis_user, self.config.redis_password]):
             raise ValueError(
                 "REDIS_USER e REDIS_PASSWORD não encontrados no arquivo .env"
             )
-        self.host = host
-        self.port = port
-        self.db = db
+        self.host = host if host is not None else self.config.redis_host
+        self.port = port if port is not None else self.config.redis_port
+        self.db = db if db is not None else self.config.redis_db
         self.conn = None
 
         self._connect()
@@ -47,8 +41,8 @@ class CacheManeger:
                 port=self.port,
                 db=self.db,
                 decode_responses=True,  # Decodifica bytes para strings automaticamente
-                username=os.getenv("REDIS_USER"),
-                password=os.getenv("REDIS_PASSWORD"),
+                username=self.config.redis_user,
+                password=self.config.redis_password,
             )
             # Tenta uma operação simples para verificar a conexão
             self.conn.ping()
@@ -61,13 +55,14 @@ class CacheManeger:
         """Verifica se a conexão com o Redis está ativa."""
         return self.conn is not None
 
-    def set_data(self, key, value):
+    def set_data(self, key, value, ex=None):
         """
         Salva um par de chave-valor no Redis.
 
         Args:
             key (str): A chave a ser usada.
             value (str): O valor a ser armazenado.
+            ex (int, opcional): Validade da chave em segundos.
 
         Returns:
             bool: True se a operação for bem-sucedida, False caso contrário.
@@ -76,13 +71,36 @@ class CacheManeger:
             return False
 
         try:
-            self.conn.set(key, value)
+            with obter_metricas().span("redis", operacao="set"):
+                self.conn.set(key, value, ex=ex)
             logger.info(f"Dados salvos: '{key}' -> '{value}'")
             return True
         except redis.exceptions.RedisError as e:
             logger.error(f"Erro ao salvar dados: {e}")
             return False
 
+    def set_many_data(self, data):
+        """
+        Salva vários pares de chave-valor com um único round-trip (MSET).
+
+        Args:
+            data (dict): Mapeamento chave -> valor.
+
+        Returns:
+            bool: True se a operação for bem-sucedida, False caso contrário.
+        """
+        if not self.is_connected() or not data:
+            return False
+
+        try:
+            with obter_metricas().span("redis", operacao="mset"):
+                self.conn.mset(data)
+            logger.info(f"Dados salvos em lote: {len(data)} chave(s).")
+            return True
+        except redis.exceptions.RedisError as e:
+            logger.error(f"Erro ao salvar dados em lote: {e}")
+            return False
+
     def get_data(self, key):
         """
         Recupera um valor a partir de uma chave no Redis.
@@ -97,7 +115,8 @@ class CacheManeger:
             return None
 
         try:
-            value = self.conn.get(key)
+            with obter_metricas().span("redis", operacao="get"):
+                value = self.conn.get(key)
             if value:
                 logger.info(f"Dados encontrados: '{key}' -> '{value}'")
             else:
@@ -106,3 +125,29 @@ class CacheManeger:
         except redis.exceptions.RedisError as e:
             logger.error(f"Erro ao buscar dados: {e}")
             return None
+
+    def get_many_data(self, keys):
+        """
+        Recupera os valores de várias chaves com um único round-trip (MGET).
+
+        Args:
+            keys (list[str]): As chaves a serem buscadas.
+
+        Returns:
+            dict: Mapeamento chave -> valor (None para chaves ausentes).
+                  Retorna um dicionário vazio se não houver conexão ou em caso de erro.
+        """
+        if not self.is_connected() or not keys:
+            return {}
+
+        try:
+            with obter_metricas().span("redis", operacao="mget"):
+                values = self.conn.mget(keys)
+            found = sum(1 for value in values if value)
+            logger.info(
+                f"Consulta em lote: {found} de {len(keys)} chave(s) encontrada(s)."
+            )
+            return dict(zip(keys, values))
+        except redis.exceptions.RedisError as e:
+            logger.error(f"Erro ao buscar dados em lote: {e}")
+            return {}
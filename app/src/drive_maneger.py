@@ -1,19 +1,132 @@
 import io
+import json
 import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+import backoff
 import google.auth.transport.requests
-from dotenv import load_dotenv
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseDownload
 from tqdm import tqdm
 
+from app.config import obter_config
+from app.src.armazem_maneger import BAIXADO
+from app.src.editor_de_videos import DURACAO_MINIMA_SEGUNDOS
+from app.utils.gravacao import gravar_json_atomico
+from app.utils.hash_arquivo import md5_arquivo
 from app.utils.logger import ColorLogger
+from app.utils.metricas import obter_metricas
 
-load_dotenv()
+config = obter_config()
 logger = ColorLogger()
 
+# Campos guardados no índice local de cada vídeo da pasta
+CHAVES_VIDEO = ["id", "name", "size", "md5Checksum", "modifiedTime", "videoMediaMetadata"]
+CAMPOS_VIDEO = "id, name, size, md5Checksum, modifiedTime, videoMediaMetadata(durationMillis, width, height)"
+# Regras de elegibilidade verificadas antes do download
+TAMANHO_MAXIMO_BYTES = 2000 * 1024 * 1024  # Limite de upload do Telegram para usuários
+
+# Download paralelo por faixas de bytes (Range); a URL pode apontar para um servidor local
+DRIVE_DOWNLOAD_URL = config.drive_download_url
+DOWNLOAD_WORKERS = config.drive_download_workers
+DOWNLOAD_CHUNK_SIZE = config.drive_download_chunk_mb * 1024 * 1024
+DOWNLOAD_CHUNK_TRIES = 3
+
+# Streaming direto do Drive (sem cópia local): tamanho de cada bloco e do buffer em memória
+STREAM_CHUNK_SIZE = 4 * 1024 * 1024
+STREAM_BUFFER_SIZE = config.drive_stream_buffer_mb * 1024 * 1024
+
+
+def _log_tentativa_faixa(details):
+    """Registra a nova tentativa de uma faixa do download (handler do backoff)."""
+    start, end = details["args"][-2:]
+    obter_metricas().registrar_tentativa("drive_download")
+    logger.warning(
+        f"Falha na faixa {start}-{end} (tentativa {details['tries']}): "
+        f"{details['exception']}. Nova tentativa em {details['wait']:.1f}s..."
+    )
+
+
+# Cada faixa é refeita isoladamente, com espera exponencial entre as tentativas
+retentativa_faixa = backoff.on_exception(
+    backoff.expo,
+    Exception,
+    max_tries=DOWNLOAD_CHUNK_TRIES,
+    max_value=30,
+    jitter=backoff.full_jitter,
+    on_backoff=_log_tentativa_faixa,
+)
+
+
+class DriveStream:
+    """
+    Leitor sequencial (file-like) dos bytes de um arquivo do Drive.
+
+    Uma thread produtora baixa blocos em ordem e os coloca numa fila limitada,
+    de modo que no máximo STREAM_BUFFER_SIZE bytes ficam em memória enquanto o
+    consumidor (ex.: o upload do Telethon) lê com read(n).
+    """
+
+    def __init__(self, drive, file_id, name, size, md5=None):
+        self.name = name
+        self.size = size
+        self.md5 = md5
+        self._drive = drive
+        self._file_id = file_id
+        self._queue = queue.Queue(maxsize=max(1, STREAM_BUFFER_SIZE // STREAM_CHUNK_SIZE))
+        self._buffer = bytearray()
+        self._eof = False
+        self._error = None
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+    def _produce(self):
+        """Baixa os blocos em sequência e os enfileira; None sinaliza o fim."""
+        try:
+            for start in range(0, self.size, STREAM_CHUNK_SIZE):
+                if self._closed.is_set():
+                    return
+                end = min(start + STREAM_CHUNK_SIZE, self.size) - 1
+                block = self._drive._fetch_range(self._file_id, start, end)
+                while not self._closed.is_set():
+                    try:
+                        self._queue.put(block, timeout=1)
+                        break
+                    except queue.Full:
+                        continue
+        except Exception as e:
+            self._error = e
+        finally:
+            if not self._closed.is_set():
+                self._queue.put(None)
+
+    def read(self, n=-1):
+        """Lê exatamente n bytes (ou o que restar até o fim do arquivo)."""
+        while not self._eof and (n < 0 or len(self._buffer) < n):
+            block = self._queue.get()
+            if block is None:
+                self._eof = True
+                if self._error is not None:
+                    raise IOError(
+                        f"Falha no streaming de '{self.name}' a partir do Drive: {self._error}"
+                    )
+                break
+            self._buffer.extend(block)
+
+        if n < 0:
+            n = len(self._buffer)
+        data = bytes(self._buffer[:n])
+        del self._buffer[:n]
+        return data
+
+    def close(self):
+        self._closed.set()
+
 
 class DriveManeger:
     def __init__(self):
@@ -22,12 +135,18 @@ class DriveManeger:
         )  # Garantindo que use o caminho absoluto
         # Se modificar os scopes, delete o arquivo token.json.
         self.scopes = ["https://www.googleapis.com/auth/drive.readonly"]
-        self.folder_id = os.getenv("FOLDER_ID")
+        self.folder_id = config.folder_id
         self.client_secrets_file = os.path.join(
             base_dir,
             "oauth/client_secret_477730350957-vsrp76iaj876gan3psbrll2r0cr3130u.apps.googleusercontent.com.json",
         )
         self.token_path = os.path.join(base_dir, "oauth/token.json")
+        # Índice local da pasta (vídeos + token do feed de alterações do Drive)
+        self.index_path = os.path.join(
+            os.path.dirname(base_dir), "banco_dados", "drive_index.json"
+        )
+        self.creds = None
+        self._local = threading.local()
 
     def authenticate_google_drive(self):
         """Autentica o usuário e retorna o serviço da API do Google Drive."""
@@ -48,38 +167,177 @@ class DriveManeger:
             with open(self.token_path, "w") as token:
                 token.write(creds.to_json())
 
+        self.creds = creds
         return build("drive", "v3", credentials=creds)
 
-    def find_videos_in_folder(self, service):
-        """Encontra e retorna uma lista de vídeos em uma pasta específica."""
-        query = f"'{self.folder_id}' in parents and mimeType contains 'video/'"
-        results = (
-            service.files()
-            .list(q=query, fields="nextPageToken, files(id, name,size)")
-            .execute()
+    def _load_index(self):
+        """Carrega o índice local da pasta, ou None se não existir/for de outra pasta."""
+        if not os.path.exists(self.index_path):
+            return None
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Índice local do Drive ilegível, será recriado: {e}")
+            return None
+
+        if index.get("folder_id") != self.folder_id or not index.get("page_token"):
+            return None
+        return index
+
+    def _save_index(self, index):
+        """Salva o índice local de forma atômica (arquivo temporário + rename)."""
+        gravar_json_atomico(self.index_path, index)
+
+    def _is_folder_video(self, file):
+        """Verifica se um arquivo retornado pela API é um vídeo ativo da pasta."""
+        return (
+            not file.get("trashed")
+            and self.folder_id in file.get("parents", [])
+            and file.get("mimeType", "").startswith("video/")
         )
 
-        items = results.get("files", [])
-        if not items:
-            logger.warning("Nenhum vídeo encontrado na pasta.")
-            return []
+    def iter_folder_pages(self, service, page_size=1000):
+        """
+        Percorre a listagem da pasta página por página (gerador).
 
-        return items
+        Só uma página fica em memória por vez; quem consome pode parar no meio, e as
+        páginas restantes nem chegam a ser pedidas à API.
 
-    def _download_video_from_drive(self, service, file_id, file_name, file_size):
-        """Baixa um arquivo do Google Drive com barra de progresso."""
-        request = service.files().get_media(fileId=file_id)
+        Yields:
+            list[dict]: Os vídeos de cada página.
+        """
+        query = f"'{self.folder_id}' in parents and mimeType contains 'video/' and trashed = false"
+        page_token = None
 
-        # Converte o tamanho do arquivo para inteiro, caso venha como string
-        try:
-            file_size_int = int(file_size)
-        except (TypeError, ValueError):
-            logger.warning(
-                f"Aviso: Não foi possível obter o tamanho exato do arquivo '{file_name}'. A barra de progresso pode não ser precisa."
+        while True:
+            with obter_metricas().span("drive_listagem"):
+                results = (
+                    service.files()
+                    .list(
+                        q=query,
+                        pageSize=page_size,
+                        pageToken=page_token,
+                        fields=f"nextPageToken, files({CAMPOS_VIDEO})",
+                    )
+                    .execute()
+                )
+            yield results.get("files", [])
+
+            page_token = results.get("nextPageToken")
+            if not page_token:
+                break
+
+    def _apply_changes(self, service, index):
+        """
+        Atualiza o índice com o feed de alterações do Drive a partir do token salvo.
+
+        Returns:
+            int: Quantidade de alterações aplicadas ao índice.
+        """
+        page_token = index["page_token"]
+        files = index["files"]
+        applied = 0
+
+        while page_token:
+            with obter_metricas().span("drive_listagem"):
+                results = (
+                    service.changes()
+                    .list(
+                        pageToken=page_token,
+                        pageSize=1000,
+                        spaces="drive",
+                        includeRemoved=True,
+                        fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({CAMPOS_VIDEO}, mimeType, parents, trashed))",
+                    )
+                    .execute()
+                )
+
+            for change in results.get("changes", []):
+                file_id = change.get("fileId")
+                file = change.get("file")
+                if change.get("removed") or not file or not self._is_folder_video(file):
+                    if files.pop(file_id, None) is not None:
+                        applied += 1
+                    continue
+
+                files[file_id] = {
+                    key: file[key] for key in CHAVES_VIDEO if key in file
+                }
+                applied += 1
+
+            if "newStartPageToken" in results:
+                index["page_token"] = results["newStartPageToken"]
+            page_token = results.get("nextPageToken")
+
+        return applied
+
+    def iter_video_pages(self, service, page_size=1000):
+        """
+        Percorre os vídeos da pasta página por página (gerador), a partir do índice local.
+
+        Com um índice válido, ele é atualizado pelo feed de alterações e as páginas vêm
+        dele, sem listar a pasta na API. Sem índice, a pasta é listada página por página
+        e o índice é montado durante a listagem; ele só é salvo se quem consome chegar
+        até a última página (uma listagem interrompida deixaria o índice incompleto).
+
+        Yields:
+            list[dict]: Os vídeos de cada página.
+        """
+        index = self._load_index()
+
+        if index is not None:
+            applied = self._apply_changes(service, index)
+            logger.info(
+                f"Índice do Drive atualizado pelo feed de alterações: {applied} alteração(ões)."
             )
-            file_size_int = 0  # Define como 0 para ter uma barra de progresso genérica
+            self._save_index(index)
+
+            files = list(index["files"].values())
+            for start in range(0, len(files), page_size):
+                yield files[start : start + page_size]
+            return
+
+        # O token é obtido ANTES da listagem para não perder alterações feitas durante ela
+        page_token = service.changes().getStartPageToken().execute()["startPageToken"]
+        files = {}
+        pages = 0
+        for page in self.iter_folder_pages(service, page_size):
+            pages += 1
+            for file in page:
+                files[file["id"]] = {key: file[key] for key in CHAVES_VIDEO if key in file}
+            yield page
+
+        self._save_index(
+            {
+                "folder_id": self.folder_id,
+                "page_token": page_token,
+                "files": files,
+            }
+        )
+        logger.info(
+            f"Listagem completa da pasta: {len(files)} vídeo(s) em {pages} página(s). "
+            "Índice local do Drive criado."
+        )
+
+    def find_videos_in_folder(self, service):
+        """
+        Encontra e retorna uma lista de vídeos em uma pasta específica.
 
-        fh = io.FileIO(file_name, "wb")
+        Na primeira execução a pasta é listada por completo (todas as páginas) e
+        salva num índice local junto com o startPageToken do feed de alterações.
+        Nas execuções seguintes só as alterações desde o último token são buscadas
+        (veja iter_video_pages).
+        """
+        items = [video for page in self.iter_video_pages(service) for video in page]
+        if not items:
+            logger.warning("Nenhum vídeo encontrado na pasta.")
+        return items
+
+    def _download_single_stream(self, service, file_id, part_path, file_size_int):
+        """Baixa o arquivo inteiro numa única conexão (usado quando o tamanho é desconhecido)."""
+        request = service.files().get_media(fileId=file_id)
+        fh = io.FileIO(part_path, "wb")
         downloader = MediaIoBaseDownload(
             fh, request, chunksize=1024 * 1024
         )  # Ajusta o tamanho do chunk para a barra de progresso
@@ -89,7 +347,11 @@ class DriveManeger:
 
         # Inicializa a barra de progresso
         with tqdm(
-            total=file_size_int, unit="B", unit_scale=True, desc=file_name, ncols=80
+            total=file_size_int,
+            unit="B",
+            unit_scale=True,
+            desc=os.path.basename(part_path),
+            ncols=80,
         ) as pbar:
             while done is False:
                 status, done = downloader.next_chunk()
@@ -100,14 +362,284 @@ class DriveManeger:
                 downloaded_bytes = current_downloaded
 
                 pbar.update(bytes_this_chunk)  # Atualiza a barra de progresso
+        fh.close()
+
+    @staticmethod
+    def motivo_inelegivel(video):
+        """
+        Verifica, pelos metadados do Drive, se o vídeo pode ser aproveitado.
+
+        Vídeos sem videoMediaMetadata (ainda não processados pelo Drive) são
+        considerados elegíveis; a duração é conferida de novo no corte.
+
+        Returns:
+            str: O motivo da inelegibilidade, ou None se o vídeo for elegível.
+        """
+        try:
+            if int(video.get("size", 0)) > TAMANHO_MAXIMO_BYTES:
+                return f"maior que {TAMANHO_MAXIMO_BYTES // (1024 * 1024)} MB"
+        except (TypeError, ValueError):
+            pass
+
+        duracao_ms = video.get("videoMediaMetadata", {}).get("durationMillis")
+        if duracao_ms is not None and int(duracao_ms) < DURACAO_MINIMA_SEGUNDOS * 1000:
+            return f"duração de {int(duracao_ms) // 1000}s, menor que {DURACAO_MINIMA_SEGUNDOS}s"
+
+        return None
+
+    def _session(self):
+        """Retorna uma sessão HTTP autenticada exclusiva da thread atual."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = google.auth.transport.requests.AuthorizedSession(self.creds)
+            self._local.session = session
+        return session
+
+    def _load_state(self, state_path, file_id, file_size_int):
+        """Carrega o sidecar de faixas concluídas, descartando-o se for de outro arquivo."""
+        if not os.path.exists(state_path):
+            return set()
+        try:
+            with open(state_path, "r") as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return set()
+
+        if (
+            state.get("file_id") != file_id
+            or state.get("size") != file_size_int
+            or state.get("chunk_size") != DOWNLOAD_CHUNK_SIZE
+        ):
+            return set()
+        return set(state.get("done", []))
+
+    def _save_state(self, state_path, file_id, file_size_int, done):
+        """Grava o sidecar de faixas concluídas de forma atômica."""
+        gravar_json_atomico(
+            state_path,
+            {
+                "file_id": file_id,
+                "size": file_size_int,
+                "chunk_size": DOWNLOAD_CHUNK_SIZE,
+                "done": sorted(done),
+            },
+        )
+
+    @retentativa_faixa
+    def _download_range(self, file_id, fd, start, end):
+        """Baixa a faixa [start, end] e grava na posição correspondente do arquivo .part."""
+        url = DRIVE_DOWNLOAD_URL.format(file_id=file_id)
+        headers = {"Range": f"bytes={start}-{end}"}
+
+        # O 'with' devolve a conexão ao pool mesmo quando a tentativa falha no meio
+        with self._session().get(url, headers=headers, stream=True, timeout=60) as response:
+            if response.status_code != 206:
+                raise IOError(f"resposta HTTP {response.status_code} para {headers}")
+
+            offset = start
+            for block in response.iter_content(chunk_size=1024 * 1024):
+                os.pwrite(fd, block, offset)
+                offset += len(block)
+
+        if offset != end + 1:
+            raise IOError(f"faixa incompleta ({offset - start} bytes)")
+        return end - start + 1
+
+    @retentativa_faixa
+    def _fetch_range(self, file_id, start, end):
+        """Baixa a faixa [start, end] para a memória, com novas tentativas."""
+        url = DRIVE_DOWNLOAD_URL.format(file_id=file_id)
+        headers = {"Range": f"bytes={start}-{end}"}
+
+        with self._session().get(url, headers=headers, timeout=60) as response:
+            if response.status_code != 206 or len(response.content) != end - start + 1:
+                raise IOError(
+                    f"resposta HTTP {response.status_code} com {len(response.content)} bytes para {headers}"
+                )
+            return response.content
+
+    def open_stream(self, selected_video):
+        """
+        Abre um DriveStream do vídeo selecionado, sem gravá-lo em disco.
+
+        Returns:
+            DriveStream: Leitor sequencial dos bytes, ou None se o tamanho for desconhecido.
+        """
+        try:
+            file_size = int(selected_video.get("size"))
+        except (TypeError, ValueError):
+            logger.warning(
+                f"Tamanho de '{selected_video['name']}' desconhecido; não é possível fazer streaming."
+            )
+            return None
+
+        return DriveStream(
+            self,
+            selected_video["id"],
+            selected_video["name"],
+            file_size,
+            selected_video.get("md5Checksum"),
+        )
+
+    def _download_video_from_drive(
+        self, service, file_id, file_name, file_size, md5_checksum=None
+    ):
+        """
+        Baixa um arquivo do Google Drive com barra de progresso.
+
+        O arquivo é baixado em faixas paralelas para '<nome>.part', com um sidecar
+        '<nome>.part.json' das faixas já concluídas, o que permite retomar o download
+        após uma interrupção. Só depois de conferido o md5Checksum do Drive o arquivo
+        é renomeado (atomicamente) para o nome final.
+
+        Returns:
+            bool: True se o arquivo final foi gravado e conferido, False caso contrário.
+        """
+        part_path = f"{file_name}.part"
+        state_path = f"{part_path}.json"
+
+        # Converte o tamanho do arquivo para inteiro, caso venha como string
+        try:
+            file_size_int = int(file_size)
+        except (TypeError, ValueError):
+            logger.warning(
+                f"Aviso: Não foi possível obter o tamanho exato do arquivo '{file_name}'. O download será feito numa única conexão, sem retomada."
+            )
+            with obter_metricas().span("drive_download") as span:
+                self._download_single_stream(service, file_id, part_path, 0)
+                span.bytes = os.path.getsize(part_path)
+                concluido = self._finalize_download(
+                    part_path, state_path, file_name, md5_checksum
+                )
+                if not concluido:
+                    span.erro = "md5"
+            return concluido
+
+        ranges = [
+            (index, start, min(start + DOWNLOAD_CHUNK_SIZE, file_size_int) - 1)
+            for index, start in enumerate(range(0, file_size_int, DOWNLOAD_CHUNK_SIZE))
+        ]
+        done = self._load_state(state_path, file_id, file_size_int)
+        if not os.path.exists(part_path):
+            done = set()
+        if done:
+            logger.info(
+                f"Retomando download de '{file_name}': {len(done)}/{len(ranges)} faixa(s) já concluída(s)."
+            )
+
+        # Pré-aloca o arquivo .part no tamanho final (mantendo o conteúdo já baixado)
+        with open(part_path, "ab") as f:
+            f.truncate(file_size_int)
+
+        pending = [r for r in ranges if r[0] not in done]
+        # Só as faixas baixadas nesta execução contam para a vazão
+        with obter_metricas().span(
+            "drive_download", bytes=sum(end - start + 1 for _, start, end in pending)
+        ) as span:
+            lock = threading.Lock()
+            fd = os.open(part_path, os.O_WRONLY)
+            try:
+                with tqdm(
+                    total=file_size_int,
+                    initial=sum(end - start + 1 for i, start, end in ranges if i in done),
+                    unit="B",
+                    unit_scale=True,
+                    desc=os.path.basename(file_name),
+                    ncols=80,
+                ) as pbar, ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+                    futures = {
+                        executor.submit(self._download_range, file_id, fd, start, end): index
+                        for index, start, end in pending
+                    }
+                    try:
+                        for future in as_completed(futures):
+                            bytes_done = future.result()
+                            with lock:
+                                done.add(futures[future])
+                                self._save_state(state_path, file_id, file_size_int, done)
+                                pbar.update(bytes_done)
+                    except Exception:
+                        # As faixas concluídas já estão no sidecar; a próxima execução retoma daqui
+                        for pending_future in futures:
+                            pending_future.cancel()
+                        raise
+            finally:
+                os.close(fd)
+
+            concluido = self._finalize_download(
+                part_path, state_path, file_name, md5_checksum
+            )
+            if not concluido:
+                span.erro = "md5"
+        return concluido
+
+    def _finalize_download(self, part_path, state_path, file_name, md5_checksum):
+        """Confere o md5 do arquivo .part e o renomeia para o nome final."""
+        if md5_checksum:
+            md5_local = md5_arquivo(part_path)
+            if md5_local != md5_checksum:
+                logger.error(
+                    f"md5 de '{file_name}' não confere (Drive: {md5_checksum}, local: {md5_local}). O arquivo parcial foi descartado."
+                )
+                os.remove(part_path)
+                if os.path.exists(state_path):
+                    os.remove(state_path)
+                return False
+        else:
+            logger.warning(
+                f"O Drive não informou md5Checksum para '{file_name}'. O arquivo não será conferido."
+            )
+
+        os.replace(part_path, file_name)
+        if os.path.exists(state_path):
+            os.remove(state_path)
 
         logger.info(f"\nDownload de '{file_name}' completo!")
+        return True
+
+    def download(self, service, selected_video, output_folder, armazem=None):
+        """
+        Baixa o vídeo selecionado para a pasta de saída.
 
-    def download(self, service, selected_video, output_folder):
+        Se 'armazem' (ArmazemManeger) for informado, o espaço do vídeo é reservado
+        antes do download, removendo vídeos antigos da pasta se necessário.
+
+        Returns:
+            bool: True se o download foi concluído e conferido, False caso contrário.
+        """
         # Define o nome do arquivo de saída
         output_file_name = os.path.join(output_folder, selected_video["name"])
         file_id = selected_video["id"]
         file_size = selected_video.get("size")  # Pega o tamanho do arquivo
 
+        if armazem is not None and not armazem.reservar(
+            selected_video["name"], file_size, selected_video.get("md5Checksum")
+        ):
+            logger.error(
+                f"Não há espaço para baixar '{selected_video['name']}'. O download foi cancelado."
+            )
+            return False
+
         # Executa o download com barra de progresso
-        self._download_video_from_drive(service, file_id, output_file_name, file_size)
+        try:
+            concluido = self._download_video_from_drive(
+                service,
+                file_id,
+                output_file_name,
+                file_size,
+                selected_video.get("md5Checksum"),
+            )
+        except Exception as e:
+            # O .part e o sidecar ficam na pasta: a próxima execução retoma de onde parou
+            logger.error(
+                f"Falha no download de '{selected_video['name']}': {e}. "
+                "O download parcial foi mantido para ser retomado."
+            )
+            concluido = False
+        finally:
+            if armazem is not None:
+                armazem.liberar(selected_video["name"])
+
+        if concluido and armazem is not None:
+            armazem.marcar(output_file_name, BAIXADO)
+        return concluido
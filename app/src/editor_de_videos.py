@@ -1,16 +1,118 @@
 import json
 import os
 import subprocess
+import threading
+from dataclasses import asdict, dataclass
+from typing import Optional
 
+from app.config import obter_config
+from app.utils.gravacao import gravar_json_atomico
+from app.utils.instancia_unica import instancia_unica
 from app.utils.logger import ColorLogger  # Usando o logger personalizado
+from app.utils.metricas import obter_metricas
 
 logger = ColorLogger()
 
+# Vídeos mais curtos que isto não são cortados (nem baixados, se o Drive souber a duração)
+DURACAO_MINIMA_SEGUNDOS = 300
 
-def get_video_duration(caminho_video):
+# Largura da miniatura gerada junto com a prévia (a altura segue a proporção)
+LARGURA_THUMBNAIL = 320
+
+# Modo padrão do corte: 'auto' (copia os streams quando possível), 'copia' ou 'recodificar'
+MODO_CORTE = obter_config().modo_corte
+
+# Distância máxima (s) entre o início pedido e o keyframe usado no corte por cópia
+TOLERANCIA_KEYFRAME = 10
+
+# Cache persistente das sondagens: Redis (com validade) e arquivo local como reserva
+SONDAGEM_TTL = 30 * 24 * 60 * 60
+ARQUIVO_SONDAGENS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "banco_dados",
+    "sondagens.json",
+)
+
+
+@dataclass
+class MetadadosVideo:
+    """Informações do vídeo obtidas numa única execução do ffprobe."""
+
+    duracao: Optional[float]
+    largura: int = 0
+    altura: int = 0
+    codec_video: Optional[str] = None
+    codec_audio: Optional[str] = None
+    formato: Optional[str] = None
+    quadros_por_segundo: float = 0.0
+
+
+class CacheSondagem:
     """
-    Usa o ffprobe para obter a duração de um vídeo em segundos.
+    Cache persistente dos metadados do ffprobe, por nome, tamanho e mtime do arquivo.
+
+    Usa o Redis do CacheManeger quando disponível e, na falta dele, um arquivo JSON
+    local (ARQUIVO_SONDAGENS). Assim o mesmo vídeo não é sondado de novo entre a
+    prévia do Telegram, o corte do X ou execuções seguintes.
     """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.redis = None
+        try:
+            from app.src.cache_maneger import CacheManeger
+
+            cache = CacheManeger()
+            if cache.is_connected():
+                self.redis = cache
+        except Exception as e:
+            logger.warning(f"Redis indisponível para o cache de sondagens ({e}). Usando arquivo local.")
+
+        try:
+            with open(ARQUIVO_SONDAGENS, "r") as f:
+                self.local = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.local = {}
+
+    @staticmethod
+    def chave(caminho_video):
+        """Chave da sondagem: nome, tamanho e data de modificação do arquivo."""
+        stat = os.stat(caminho_video)
+        return f"sondagem:{os.path.basename(caminho_video)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def obter(self, chave):
+        """Retorna o MetadadosVideo salvo para a chave, ou None."""
+        dados = self.redis.get_data(chave) if self.redis else None
+        if dados:
+            return MetadadosVideo(**json.loads(dados))
+
+        with self._lock:
+            dados = self.local.get(chave)
+        return MetadadosVideo(**dados) if dados else None
+
+    def salvar(self, chave, metadados):
+        """Salva os metadados no Redis (se houver) e no arquivo local."""
+        dados = asdict(metadados)
+        if self.redis:
+            self.redis.set_data(chave, json.dumps(dados), ex=SONDAGEM_TTL)
+
+        with self._lock:
+            self.local[chave] = dados
+            gravar_json_atomico(ARQUIVO_SONDAGENS, self.local)
+
+
+# Primeiro nível (memória) e segundo nível (persistente) do cache de sondagens
+_cache_metadados = {}
+
+
+@instancia_unica
+def _obter_cache_sondagem():
+    """Cria o cache persistente de sondagens na primeira vez que for usado."""
+    return CacheSondagem()
+
+
+def _executar_ffprobe(caminho_video):
+    """Executa o ffprobe e retorna o JSON de saída já decodificado."""
     comando_ffprobe = [
         "ffprobe",
         "-v",
@@ -21,79 +123,221 @@ def get_video_duration(caminho_video):
         "-show_streams",
         caminho_video,
     ]
-    try:
-        # --- CORREÇÃO APLICADA AQUI ---
-        # Removido o parâmetro "text=True"
+    # --- CORREÇÃO APLICADA AQUI ---
+    # Removido o parâmetro "text=True"
+    with obter_metricas().span("ffprobe"):
         resultado = subprocess.run(comando_ffprobe, check=True, capture_output=True)
-        # Agora, resultado.stdout é garantidamente um objeto de BYTES
-        stdout_bytes = resultado.stdout
+    # Agora, resultado.stdout é garantidamente um objeto de BYTES
+    stdout_bytes = resultado.stdout
 
-        # O resto do seu código agora funcionará perfeitamente
-        try:
-            logger.debug("Tentando decodificar a saída do ffprobe como UTF-8...")
-            json_string = stdout_bytes.decode("utf-8")
+    try:
+        logger.debug("Tentando decodificar a saída do ffprobe como UTF-8...")
+        json_string = stdout_bytes.decode("utf-8")
 
-        except UnicodeDecodeError:
-            logger.warning(
-                f"Falha ao decodificar a saída do ffprobe como UTF-8 para o vídeo '{caminho_video}'. "
-                "Usando 'latin-1' como fallback."
-            )
-            json_string = stdout_bytes.decode("latin-1")
-
-        metadata = json.loads(json_string)
-
-        if "format" in metadata and "duration" in metadata["format"]:
-            return float(metadata["format"]["duration"])
-        elif (
-            "streams" in metadata
-            and len(metadata["streams"]) > 0
-            and "duration" in metadata["streams"][0]
-        ):
-            return float(metadata["streams"][0]["duration"])
-        else:
-            logger.warning(
-                "Não foi possível encontrar a informação de duração no metadata do vídeo."
-            )
-            return None
+    except UnicodeDecodeError:
+        logger.warning(
+            f"Falha ao decodificar a saída do ffprobe como UTF-8 para o vídeo '{caminho_video}'. "
+            "Usando 'latin-1' como fallback."
+        )
+        json_string = stdout_bytes.decode("latin-1")
+
+    return json.loads(json_string)
+
+
+def _taxa_de_quadros(fracao):
+    """Converte a taxa do ffprobe ('30000/1001') em quadros por segundo (0 se ausente)."""
+    numerador, _, denominador = (fracao or "0/0").partition("/")
+    try:
+        return float(numerador) / float(denominador or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+
+def _extrair_metadados(metadata):
+    """Converte o JSON do ffprobe em MetadadosVideo."""
+    streams = metadata.get("streams", [])
+    video = next((st for st in streams if st.get("codec_type") == "video"), {})
+    audio = next((st for st in streams if st.get("codec_type") == "audio"), {})
+
+    if "format" in metadata and "duration" in metadata["format"]:
+        duracao = float(metadata["format"]["duration"])
+    elif len(streams) > 0 and "duration" in streams[0]:
+        duracao = float(streams[0]["duration"])
+    else:
+        logger.warning(
+            "Não foi possível encontrar a informação de duração no metadata do vídeo."
+        )
+        duracao = None
+
+    return MetadadosVideo(
+        duracao=duracao,
+        largura=int(video.get("width", 0)),
+        altura=int(video.get("height", 0)),
+        codec_video=video.get("codec_name"),
+        codec_audio=audio.get("codec_name"),
+        formato=metadata.get("format", {}).get("format_name"),
+        quadros_por_segundo=_taxa_de_quadros(video.get("avg_frame_rate")),
+    )
+
+
+def keyframe_mais_proximo(caminho_video, instante, tolerancia=TOLERANCIA_KEYFRAME):
+    """
+    Retorna o keyframe de vídeo mais próximo do instante (até 'tolerancia' segundos
+    de distância), ou o próprio instante se não houver keyframe ali.
+
+    O ffprobe lê só os pacotes do stream de vídeo na janela em volta do instante,
+    sem decodificar nada: só o corte por cópia precisa dessa informação.
+    """
+    comando_ffprobe = [
+        "ffprobe",
+        "-v",
+        "quiet",
+        "-print_format",
+        "json",
+        "-select_streams",
+        "v:0",
+        "-read_intervals",
+        f"{max(0, instante - tolerancia)}%+{2 * tolerancia}",
+        "-show_entries",
+        "packet=pts_time,flags",
+        caminho_video,
+    ]
+    try:
+        with obter_metricas().span("ffprobe_keyframes"):
+            resultado = subprocess.run(comando_ffprobe, check=True, capture_output=True)
+        pacotes = json.loads(resultado.stdout.decode("utf-8", "replace")).get("packets", [])
+    except (subprocess.CalledProcessError, ValueError) as e:
+        logger.warning(f"Não foi possível listar os keyframes do vídeo: {e}")
+        return instante
+
+    candidatos = [
+        float(pacote["pts_time"])
+        for pacote in pacotes
+        if "K" in pacote.get("flags", "")
+        and "pts_time" in pacote
+        and abs(float(pacote["pts_time"]) - instante) <= tolerancia
+    ]
+    if not candidatos:
+        return instante
+    return min(candidatos, key=lambda keyframe: abs(keyframe - instante))
+
+
+def analisar_video(caminho_video):
+    """
+    Sonda o vídeo com o ffprobe uma única vez e guarda o resultado.
+
+    O resultado fica em memória e no cache persistente (Redis ou arquivo local);
+    chamadas seguintes para o mesmo arquivo (mesmo nome, tamanho e data de
+    modificação) reaproveitam o resultado, sem executar o ffprobe de novo.
+
+    :return: MetadadosVideo, ou None se o ffprobe falhar.
+    """
+    try:
+        chave = CacheSondagem.chave(caminho_video)
+        if chave in _cache_metadados:
+            return _cache_metadados[chave]
+
+        cache_sondagem = _obter_cache_sondagem()
+        metadados = cache_sondagem.obter(chave)
+        if metadados is None:
+            metadados = _extrair_metadados(_executar_ffprobe(caminho_video))
+            cache_sondagem.salvar(chave, metadados)
+
+        _cache_metadados[chave] = metadados
+        return metadados
 
     except Exception as e:
-        logger.error(f"Falha ao obter a duração do vídeo com ffprobe: {e}")
+        logger.error(f"Falha ao obter os metadados do vídeo com ffprobe: {e}")
         return None
 
 
+def get_video_duration(caminho_video):
+    """
+    Usa o ffprobe para obter a duração de um vídeo em segundos.
+    """
+    metadados = analisar_video(caminho_video)
+    return metadados.duracao if metadados else None
+
+
+def codecs_compativeis(metadados):
+    """
+    Indica se o vídeo já está em H.264/AAC dentro de MP4/MOV, formato aceito pelo
+    Telegram e pelo X, de modo que o trecho pode ser copiado sem recodificar.
+    """
+    if not metadados or not metadados.formato:
+        return False
+    return (
+        metadados.codec_video == "h264"
+        and metadados.codec_audio in ("aac", None)
+        and "mp4" in metadados.formato.split(",")
+    )
+
+
+def _parametros_codificacao(usar_copia):
+    """Parâmetros de codec do trecho: cópia dos streams ou recodificação libx264/aac."""
+    if usar_copia:
+        # Com -ss antes do -i e cópia, o trecho começa no keyframe anterior mais próximo
+        return ["-c", "copy", "-avoid_negative_ts", "make_zero"]
+    return [
+        "-c:v",
+        "libx264",
+        "-preset",
+        "veryfast",
+        "-crf",
+        "23",
+        "-c:a",
+        "aac",
+    ]
+
+
 def cortar_video(
     caminho_entrada,
     caminho_saida,
     inicio_corte_segundos=120,
     duracao_corte_segundos=120,
+    caminho_thumbnail=None,
+    modo_corte=None,
+    corte_exato=False,
 ):
     """
     Verifica a duração de um vídeo e, se for maior que 5 minutos,
     corta um trecho de 2 minutos começando no segundo minuto.
 
+    Se caminho_thumbnail for informado, a miniatura (primeiro quadro do trecho) é
+    gerada junto: na recodificação, na mesma execução do ffmpeg; no corte por cópia,
+    a partir do arquivo cortado, para que o corte em si não decodifique nada.
+
     :param caminho_entrada: Caminho completo para o vídeo original.
     :param caminho_saida: Caminho onde o vídeo cortado será salvo.
     :param inicio_corte_segundos: Ponto de início do corte em segundos (padrão: 120s).
     :param duracao_corte_segundos: Duração do corte em segundos (padrão: 120s).
-    :return: 'SUCESSO', 'IGNORADO' ou 'ERRO'.
+    :param caminho_thumbnail: Caminho opcional de uma miniatura JPEG do trecho.
+    :param modo_corte: 'auto' (padrão, via MODO_CORTE), 'copia' ou 'recodificar'.
+        No modo 'auto', vídeos H.264/AAC em MP4 são cortados com '-c copy' a partir
+        do keyframe mais próximo, sem recodificar; os demais são recodificados.
+    :param corte_exato: Força a recodificação para respeitar os limites exatos do corte.
+    :return: (status, inicio, duracao): status 'SUCESSO', 'IGNORADO' ou 'ERRO', e o
+        início e a duração reais do trecho (ajustados ao keyframe no corte por cópia),
+        ou None quando não houve corte.
     """
     if not os.path.exists(caminho_entrada):
         logger.error(f"Arquivo de entrada não encontrado: {caminho_entrada}")
-        return "ERRO"
+        return "ERRO", None, None
 
     # 1. VERIFICAR A DURAÇÃO DO VÍDEO
     logger.info(f"Verificando a duração de '{os.path.basename(caminho_entrada)}'...")
-    duracao_total = get_video_duration(caminho_entrada)
+    metadados = analisar_video(caminho_entrada)
+    duracao_total = metadados.duracao if metadados else None
 
     if duracao_total is None:
-        return "ERRO"  # Falha ao ler a duração
+        return "ERRO", None, None  # Falha ao ler a duração
 
     # 2. IGNORAR SE FOR MENOR QUE 5 MINUTOS (300 segundos)
-    if duracao_total < 300:
+    if duracao_total < DURACAO_MINIMA_SEGUNDOS:
         logger.warning(
             f"Vídeo ignorado. Duração ({int(duracao_total)}s) é menor que 5 minutos."
         )
-        return "IGNORADO"
+        return "IGNORADO", None, None
 
     logger.info(
         f"Duração total: {int(duracao_total)}s. O vídeo é elegível para o corte."
@@ -102,6 +346,83 @@ def cortar_video(
         f"Iniciando o corte a partir de {inicio_corte_segundos}s com duração de {duracao_corte_segundos}s."
     )
 
+    modo_corte = modo_corte or MODO_CORTE
+    usar_copia = not corte_exato and (
+        modo_corte == "copia"
+        or (modo_corte == "auto" and codecs_compativeis(metadados))
+    )
+
+    inicio = inicio_corte_segundos
+    if usar_copia:
+        # Sem recodificar, o corte só pode começar num keyframe: usa o mais próximo
+        inicio = keyframe_mais_proximo(caminho_entrada, inicio_corte_segundos)
+        logger.info(f"Início do corte ajustado para o keyframe em {inicio:.2f}s.")
+
+    # Duração real do trecho e quadros (para medir a velocidade do corte em fps)
+    duracao = duracao_do_corte(metadados, inicio, duracao_corte_segundos)
+    status = _executar_corte(
+        caminho_entrada,
+        caminho_saida,
+        inicio,
+        duracao_corte_segundos,
+        caminho_thumbnail,
+        usar_copia,
+        metadados.quadros_por_segundo * duracao,
+    )
+    if status == "ERRO" and usar_copia:
+        # A recodificação corta em qualquer instante: volta ao início pedido
+        logger.warning("O corte por cópia falhou. Tentando novamente com recodificação...")
+        inicio = inicio_corte_segundos
+        duracao = duracao_do_corte(metadados, inicio, duracao_corte_segundos)
+        status = _executar_corte(
+            caminho_entrada,
+            caminho_saida,
+            inicio,
+            duracao_corte_segundos,
+            caminho_thumbnail,
+            usar_copia=False,
+            quadros=metadados.quadros_por_segundo * duracao,
+        )
+
+    if status != "SUCESSO":
+        return status, None, None
+    return status, inicio, duracao
+
+
+def _parametros_thumbnail(caminho_thumbnail):
+    """Saída do ffmpeg com um único quadro do vídeo, reduzido para miniatura JPEG."""
+    return [
+        "-map",
+        "0:v:0",
+        "-frames:v",
+        "1",
+        "-vf",
+        f"scale={LARGURA_THUMBNAIL}:-2",
+        "-q:v",
+        "4",
+        "-y",
+        caminho_thumbnail,
+    ]
+
+
+def _executar_corte(
+    caminho_entrada,
+    caminho_saida,
+    inicio_corte_segundos,
+    duracao_corte_segundos,
+    caminho_thumbnail,
+    usar_copia,
+    quadros=0,
+):
+    """
+    Monta e executa o comando do ffmpeg para o corte e a miniatura, se pedida. Na
+    recodificação a miniatura é uma segunda saída do mesmo comando; na cópia ela é
+    extraída depois, do primeiro quadro do arquivo cortado.
+    """
+    logger.info(
+        f"Corte por {'cópia dos streams (sem recodificar)' if usar_copia else 'recodificação (libx264/aac)'}."
+    )
+
     # Comando FFmpeg com o novo ponto de início (-ss)
     # -ss: seek (pular para) o tempo especificado
     comando_ffmpeg = [
@@ -112,23 +433,34 @@ def cortar_video(
         caminho_entrada,
         "-t",
         str(duracao_corte_segundos),  # Duração do corte
-        "-c:v",
-        "libx264",
-        "-preset",
-        "veryfast",
-        "-crf",
-        "23",
-        "-c:a",
-        "aac",
+        *_parametros_codificacao(usar_copia),
         "-y",
         caminho_saida,
     ]
 
+    if caminho_thumbnail and not usar_copia:
+        # Segunda saída do mesmo comando: o vídeo já é decodificado para recodificar
+        comando_ffmpeg += _parametros_thumbnail(caminho_thumbnail)
+
     try:
-        resultado = subprocess.run(
-            comando_ffmpeg, check=True, capture_output=False, text=True
-        )
+        with obter_metricas().span(
+            "ffmpeg_corte", quadros=quadros, modo="copia" if usar_copia else "recodificar"
+        ) as span:
+            resultado = subprocess.run(
+                comando_ffmpeg, check=True, capture_output=False, text=True
+            )
+            span.bytes = os.path.getsize(caminho_saida)
         logger.info(f"Vídeo cortado com sucesso e salvo em: '{caminho_saida}'")
+
+        if caminho_thumbnail and usar_copia:
+            # O trecho copiado começa num keyframe: só esse quadro é decodificado
+            comando_ffmpeg = [
+                "ffmpeg",
+                "-i",
+                caminho_saida,
+                *_parametros_thumbnail(caminho_thumbnail),
+            ]
+            subprocess.run(comando_ffmpeg, check=True, capture_output=True)
         return "SUCESSO"
 
     except FileNotFoundError:
@@ -141,3 +473,10 @@ def cortar_video(
         logger.error(f"Comando executado: {' '.join(comando_ffmpeg)}")
         logger.error(f"Saída do FFmpeg (stderr):\n{e.stderr}")
         return "ERRO"
+
+
+def duracao_do_corte(metadados, inicio_corte_segundos=120, duracao_corte_segundos=120):
+    """Duração real do trecho cortado, calculada sem sondar o arquivo de saída."""
+    if not metadados or metadados.duracao is None:
+        return duracao_corte_segundos
+    return max(0.0, min(duracao_corte_segundos, metadados.duracao - inicio_corte_segundos))
@@ -0,0 +1,276 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from app.utils.logger import ColorLogger
+
+logger = ColorLogger()
+
+# Banco SQLite com os jobs do pipeline (sobrevive a quedas e reinícios)
+FILA_JOBS_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "banco_dados",
+    "fila_jobs.db",
+)
+
+# Etapas pelas quais cada vídeo passa, em ordem. A coluna 'etapa' de um job guarda a
+# última etapa concluída; o worker da etapa seguinte é quem o processa.
+ETAPAS = (
+    "listado",
+    "baixado",
+    "sondado",
+    "previa_cortada",
+    "enviado_canal",
+    "encaminhado",
+    "postado_x",
+)
+
+# Estados de um job
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+FALHOU = "falhou"
+IGNORADO = "ignorado"
+
+TENTATIVAS_POR_ETAPA = 3
+# Espera base entre tentativas da mesma etapa (dobra a cada falha)
+ESPERA_RETENTATIVA = 60
+
+
+def proxima_etapa(etapa):
+    """Retorna a etapa seguinte, ou None se 'etapa' for a última."""
+    indice = ETAPAS.index(etapa)
+    return ETAPAS[indice + 1] if indice + 1 < len(ETAPAS) else None
+
+
+class FilaJobs:
+    """
+    Fila persistente de jobs do pipeline, em SQLite.
+
+    Cada job é um vídeo (id do Drive) e avança uma etapa por vez. reservar() marca o job
+    como 'executando' de forma atômica, então vários workers podem consumir a mesma
+    etapa sem processar o mesmo vídeo duas vezes. Os dados produzidos pelas etapas
+    (caminhos, ids de mensagens...) ficam na coluna 'dados' para as etapas seguintes.
+    """
+
+    def __init__(self, caminho=FILA_JOBS_FILE):
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        self._trava = threading.Lock()
+        self.conn = sqlite3.connect(caminho, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.conn:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    nome TEXT NOT NULL,
+                    etapa TEXT NOT NULL,
+                    estado TEXT NOT NULL,
+                    tentativas INTEGER NOT NULL DEFAULT 0,
+                    proxima_tentativa_em REAL NOT NULL DEFAULT 0,
+                    dados TEXT NOT NULL DEFAULT '{}',
+                    erro TEXT,
+                    criado_em REAL NOT NULL,
+                    atualizado_em REAL NOT NULL
+                )
+                """
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_etapa_estado ON jobs (etapa, estado)"
+            )
+
+    def recuperar(self):
+        """
+        Devolve para a fila os jobs que ficaram 'executando' (o processo caiu no meio
+        de uma etapa). A etapa é refeita; por isso os handlers precisam ser idempotentes.
+        """
+        with self._trava, self.conn:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET estado = ?, atualizado_em = ? WHERE estado = ?",
+                (PENDENTE, time.time(), EXECUTANDO),
+            )
+        if cursor.rowcount:
+            logger.warning(
+                f"{cursor.rowcount} job(s) interrompido(s) na execução anterior voltaram para a fila."
+            )
+
+    def adicionar(self, video, dados=None):
+        """
+        Cria o job de um vídeo do Drive (etapa 'listado').
+
+        Returns:
+            bool: True se o job foi criado, False se o vídeo já estava na fila.
+        """
+        agora = time.time()
+        with self._trava, self.conn:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO jobs (id, nome, etapa, estado, dados, criado_em, atualizado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    video["id"],
+                    video["name"],
+                    ETAPAS[0],
+                    PENDENTE,
+                    json.dumps(dados or {}),
+                    agora,
+                    agora,
+                ),
+            )
+        return cursor.rowcount == 1
+
+    def ids(self):
+        """Ids de todos os vídeos que já passaram pela fila."""
+        with self._trava:
+            return {linha["id"] for linha in self.conn.execute("SELECT id FROM jobs")}
+
+    def reservar(self, etapa_anterior):
+        """
+        Reserva o próximo job pronto para sair de 'etapa_anterior'.
+
+        Returns:
+            dict: O job (com 'dados' já decodificado), ou None se não houver nenhum.
+        """
+        with self._trava, self.conn:
+            linha = self.conn.execute(
+                "SELECT * FROM jobs WHERE etapa = ? AND estado = ? AND proxima_tentativa_em <= ? "
+                "ORDER BY criado_em LIMIT 1",
+                (etapa_anterior, PENDENTE, time.time()),
+            ).fetchone()
+            if linha is None:
+                return None
+            self.conn.execute(
+                "UPDATE jobs SET estado = ?, atualizado_em = ? WHERE id = ?",
+                (EXECUTANDO, time.time(), linha["id"]),
+            )
+
+        job = dict(linha)
+        job["dados"] = json.loads(job["dados"])
+        return job
+
+    def avancar(self, job, etapa):
+        """Registra a conclusão de 'etapa' (e os dados do job) e libera o próximo passo."""
+        estado = CONCLUIDO if proxima_etapa(etapa) is None else PENDENTE
+        self._atualizar(job, etapa=etapa, estado=estado, tentativas=0, erro=None)
+
+    def ignorar(self, job, motivo):
+        """Encerra o job sem erro (ex.: vídeo curto demais para a prévia)."""
+        logger.info(f"Job '{job['nome']}' encerrado: {motivo}.")
+        self._atualizar(job, estado=IGNORADO, erro=motivo)
+
+    def falhar(self, job, erro, definitiva=False):
+        """
+        Registra uma falha na etapa. O job volta para a fila com espera exponencial,
+        até TENTATIVAS_POR_ETAPA; depois disso fica como 'falhou'.
+
+        Com definitiva=True, o job vai direto para 'falhou' (só volta com retentar()):
+        para falhas em que repetir a etapa às cegas poderia duplicar um efeito externo.
+        """
+        tentativas = job["tentativas"] + 1
+        if definitiva or tentativas >= TENTATIVAS_POR_ETAPA:
+            logger.error(
+                f"Job '{job['nome']}' falhou {tentativas} vez(es) após '{job['etapa']}': {erro}. Desistindo."
+            )
+            self._atualizar(job, estado=FALHOU, tentativas=tentativas, erro=str(erro))
+            return
+
+        espera = ESPERA_RETENTATIVA * 2 ** (tentativas - 1)
+        logger.warning(
+            f"Job '{job['nome']}' falhou após '{job['etapa']}' (tentativa {tentativas}): {erro}. "
+            f"Nova tentativa em {espera}s."
+        )
+        self._atualizar(
+            job,
+            estado=PENDENTE,
+            tentativas=tentativas,
+            erro=str(erro),
+            proxima_tentativa_em=time.time() + espera,
+        )
+
+    def adiar(self, job, quando, motivo):
+        """
+        Devolve o job para a fila só a partir de 'quando' (timestamp), sem gastar
+        tentativas (ex.: limite de requisições do X até o reset).
+        """
+        logger.info(
+            f"Job '{job['nome']}' adiado até {time.ctime(quando)} após '{job['etapa']}': {motivo}."
+        )
+        self._atualizar(job, estado=PENDENTE, erro=motivo, proxima_tentativa_em=quando)
+
+    def salvar_dados(self, job):
+        """
+        Grava os dados do job sem mudar a etapa nem o estado. Usado logo depois de um
+        efeito externo (ex.: mensagem enviada), para que uma retomada não o repita.
+        """
+        self._atualizar(job)
+
+    def falhas(self):
+        """Jobs que esgotaram as tentativas ('falhou'), do mais antigo ao mais recente."""
+        with self._trava:
+            linhas = self.conn.execute(
+                "SELECT id, nome, etapa, tentativas, erro, atualizado_em FROM jobs "
+                "WHERE estado = ? ORDER BY atualizado_em",
+                (FALHOU,),
+            ).fetchall()
+        return [dict(linha) for linha in linhas]
+
+    def retentar(self, job_id=None):
+        """
+        Devolve para a fila os jobs 'falhou' (todos, ou só 'job_id'), com as tentativas
+        zeradas. O job continua da etapa em que parou.
+
+        Returns:
+            int: Quantidade de jobs devolvidos.
+        """
+        condicao, parametros = "estado = ?", [FALHOU]
+        if job_id is not None:
+            condicao += " AND id = ?"
+            parametros.append(job_id)
+        with self._trava, self.conn:
+            cursor = self.conn.execute(
+                f"UPDATE jobs SET estado = ?, tentativas = 0, proxima_tentativa_em = 0, "
+                f"atualizado_em = ? WHERE {condicao}",
+                (PENDENTE, time.time(), *parametros),
+            )
+        if cursor.rowcount:
+            logger.info(f"{cursor.rowcount} job(s) com falha voltaram para a fila.")
+        return cursor.rowcount
+
+    def _atualizar(self, job, **campos):
+        campos["dados"] = json.dumps(job["dados"])
+        campos["atualizado_em"] = time.time()
+        atribuicoes = ", ".join(f"{coluna} = ?" for coluna in campos)
+        with self._trava, self.conn:
+            self.conn.execute(
+                f"UPDATE jobs SET {atribuicoes} WHERE id = ?",
+                (*campos.values(), job["id"]),
+            )
+
+    def ativos(self):
+        """Quantidade de jobs ainda em andamento (pendentes ou executando)."""
+        with self._trava:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE estado IN (?, ?)",
+                (PENDENTE, EXECUTANDO),
+            ).fetchone()[0]
+
+    def prontos(self, agora=None):
+        """
+        Quantidade de jobs executando ou prontos para executar agora. Não conta os
+        que aguardam a espera de uma nova tentativa.
+        """
+        with self._trava:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE estado = ? "
+                "OR (estado = ? AND proxima_tentativa_em <= ?)",
+                (EXECUTANDO, PENDENTE, agora if agora is not None else time.time()),
+            ).fetchone()[0]
+
+    def resumo(self):
+        """Contagem de jobs por etapa e estado, para logs e status."""
+        with self._trava:
+            linhas = self.conn.execute(
+                "SELECT etapa, estado, COUNT(*) AS total FROM jobs GROUP BY etapa, estado"
+            ).fetchall()
+        return {f"{linha['etapa']}/{linha['estado']}": linha["total"] for linha in linhas}
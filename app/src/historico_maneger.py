@@ -0,0 +1,130 @@
+from datetime import date
+
+from app.src.armazem_maneger import obter_armazem
+from app.utils.logger import ColorLogger
+
+logger = ColorLogger()
+
+# Chave que marca a migração das chaves antigas (nome do arquivo) como concluída
+CHAVE_MIGRACAO = "historico:migracao_nomes"
+
+
+class HistoricoManeger:
+    """
+    Histórico de vídeos já baixados/enviados, indexado pelo conteúdo e não pelo nome.
+
+    Cada vídeo do Drive é registrado pelo md5Checksum (mesmo conteúdo com outro nome
+    ou com o prefixo 'paid_' trocado) e pelo id do arquivo (renomear não o faz parecer
+    novo). Arquivos locais usam o md5 do conteúdo (o do Drive, guardado no armazém,
+    ou o do arquivo inteiro). Todas as consultas e gravações usam MGET/MSET.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    @staticmethod
+    def chaves_drive(video):
+        """Chaves do histórico para um vídeo listado no Drive."""
+        chaves = [f"drive:id:{video['id']}"]
+        if video.get("md5Checksum"):
+            chaves.append(f"drive:md5:{video['md5Checksum']}")
+        return chaves
+
+    @staticmethod
+    def chave_local(caminho_arquivo):
+        """Chave do histórico para um arquivo local (md5 do conteúdo)."""
+        return f"local:md5:{obter_armazem().md5(caminho_arquivo)}"
+
+    def migrar_chaves_de_nome(self, videos):
+        """
+        Converte, uma única vez, o histórico antigo (chave = nome do arquivo) para as
+        chaves por md5/id. As chaves antigas são mantidas, só deixam de ser consultadas.
+        """
+        if not self.migracao_pendente():
+            return
+        self.concluir_migracao(self.copiar_chaves_de_nome(videos))
+
+    def migracao_pendente(self):
+        """Diz se o histórico antigo (por nome) ainda não foi migrado."""
+        return self.cache.is_connected() and not self.cache.get_data(CHAVE_MIGRACAO)
+
+    def copiar_chaves_de_nome(self, videos):
+        """
+        Copia as chaves antigas (por nome) dos 'videos' para as chaves por md5/id.
+        Pode ser chamada página por página; repetir a cópia não tem efeito.
+
+        Returns:
+            int: Quantidade de chaves criadas.
+        """
+        antigos = self.cache.get_many_data([video["name"] for video in videos])
+        novos = {}
+        for video in videos:
+            valor = antigos.get(video["name"])
+            if valor:
+                for chave in self.chaves_drive(video):
+                    novos[chave] = valor
+
+        if novos:
+            self.cache.set_many_data(novos)
+        return len(novos)
+
+    def concluir_migracao(self, criadas):
+        """Marca a migração como concluída (depois de copiar todas as chaves)."""
+        self.cache.set_data(CHAVE_MIGRACAO, f"Migrado em {date.today()}")
+        logger.info(
+            f"Histórico migrado para chaves por conteúdo: {criadas} chave(s) criada(s)."
+        )
+
+    def filtrar_novos(self, videos):
+        """
+        Remove da lista os vídeos já registrados e as cópias repetidas dentro da própria
+        listagem (mesmo md5 em arquivos diferentes).
+
+        Returns:
+            list: Os vídeos ainda não vistos, na ordem original.
+        """
+        chaves = [chave for video in videos for chave in self.chaves_drive(video)]
+        registrados = self.cache.get_many_data(chaves)
+
+        novos = []
+        vistos = set()
+        for video in videos:
+            if any(registrados.get(chave) for chave in self.chaves_drive(video)):
+                continue
+            md5 = video.get("md5Checksum")
+            if md5 and md5 in vistos:
+                logger.info(f"Vídeo '{video['name']}' é cópia de outro da pasta. Ignorado.")
+                continue
+            if md5:
+                vistos.add(md5)
+            novos.append(video)
+
+        return novos
+
+    def registrar_drive(self, video, mensagem):
+        """Registra um vídeo do Drive (todas as suas chaves) no histórico."""
+        return self.cache.set_many_data(
+            {chave: mensagem for chave in self.chaves_drive(video)}
+        )
+
+    def filtrar_arquivos_novos(self, caminhos):
+        """
+        Separa os arquivos locais cujo conteúdo ainda não foi enviado.
+
+        Returns:
+            dict: Mapeamento caminho -> chave local, só para os arquivos novos.
+        """
+        chaves = {caminho: self.chave_local(caminho) for caminho in caminhos}
+        registrados = self.cache.get_many_data(list(chaves.values()))
+
+        novos = {}
+        for caminho, chave in chaves.items():
+            if registrados.get(chave):
+                logger.info(f"Arquivo '{caminho}' já foi enviado antes. Ignorado.")
+            else:
+                novos[caminho] = chave
+        return novos
+
+    def registrar_locais(self, chaves, mensagem):
+        """Registra as chaves locais (impressões digitais) com a mesma mensagem."""
+        return self.cache.set_many_data({chave: mensagem for chave in chaves})
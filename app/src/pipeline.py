@@ -0,0 +1,363 @@
+import asyncio
+import os
+import re
+import time
+from datetime import date
+
+from app.config import obter_config
+from app.src.armazem_maneger import ENVIADO, obter_armazem
+from app.src.cache_maneger import CacheManeger
+from app.src.drive_maneger import DriveManeger
+from app.src.editor_de_videos import analisar_video
+from app.src.fila_jobs import ETAPAS, FilaJobs
+from app.src.historico_maneger import HistoricoManeger
+from app.src.previa_maneger import obter_previas
+from app.src.seletor import SeletorVideos, escolher
+from app.src.subir_video import (
+    NOME_DO_CANAL,
+    encaminhar_ao_grupo_async,
+    enviar_gratuito_ao_grupo_async,
+    enviar_pago_ao_canal_async,
+    enviar_previa_ao_grupo_async,
+)
+from app.src.telegram_client import obter_cliente_async
+from app.src.X_poster import obter_publicador
+from app.utils.logger import ColorLogger
+
+config = obter_config()
+logger = ColorLogger()
+
+PASTA_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_DOWNLOADS = os.path.join(PASTA_APP, "videos_brutos")
+LINK_GRUPO = config.link_grupo
+
+# Quantos vídeos novos entram na fila a cada execução do pipeline
+PIPELINE_VIDEOS = config.pipeline_videos
+# Política do seletor por páginas do Drive (vazio usa o índice local da pasta)
+SELETOR_DRIVE = config.seletor_drive
+# Workers por etapa, no formato "etapa=n,etapa=n" (as omitidas usam o padrão)
+CONCORRENCIA_PADRAO = {
+    "baixado": 1,
+    "sondado": 2,
+    "previa_cortada": 1,
+    "enviado_canal": 2,
+    "encaminhado": 2,
+    "postado_x": 1,
+}
+# Intervalo entre consultas à fila quando uma etapa não tem job pronto
+INTERVALO_CONSULTA = 1
+
+
+def _concorrencia_por_etapa():
+    """Lê PIPELINE_CONCORRENCIA do .env sobre os valores padrão."""
+    concorrencia = dict(CONCORRENCIA_PADRAO)
+    for item in filter(None, config.pipeline_concorrencia.split(",")):
+        etapa, _, valor = item.partition("=")
+        if etapa.strip() in concorrencia and valor.strip().isdigit():
+            concorrencia[etapa.strip()] = max(1, int(valor))
+        else:
+            logger.warning(f"Item inválido em PIPELINE_CONCORRENCIA ignorado: '{item}'.")
+    return concorrencia
+
+
+def _estrelas(nome_arquivo):
+    """Valor em estrelas de um vídeo pago ('paid_{valor}_...'), ou None se for gratuito."""
+    match_pago = re.match(r"^paid_(\d+)_", nome_arquivo)
+    return int(match_pago.group(1)) if match_pago else None
+
+
+class Pipeline:
+    """
+    Pipeline de vídeos em etapas, sobre a fila persistente (FilaJobs).
+
+    Cada etapa tem seu próprio grupo de workers e limite de concorrência, então o
+    download de um vídeo, o corte de outro e o upload de um terceiro se sobrepõem.
+    Se o processo cair, recuperar() devolve os jobs interrompidos para a fila e o
+    pipeline continua da etapa em que cada vídeo parou. Os handlers são idempotentes:
+    refazer uma etapa reaproveita o arquivo baixado, a prévia do armazém de prévias,
+    os handles do UploadCache e o estado de upload do X.
+    """
+
+    def __init__(self, fila=None):
+        self.fila = fila or FilaJobs()
+        self.driver = DriveManeger()
+        self.cache = CacheManeger(db=0)
+        self.historico = HistoricoManeger(self.cache)
+        self.service = None
+        self.handlers = {
+            "baixado": self._baixar,
+            "sondado": self._sondar,
+            "previa_cortada": self._cortar_previa,
+            "enviado_canal": self._enviar_canal,
+            "encaminhado": self._encaminhar,
+            "postado_x": self._postar_x,
+        }
+
+    def _servico_drive(self):
+        if self.service is None:
+            self.service = self.driver.authenticate_google_drive()
+        return self.service
+
+    async def enfileirar_do_drive(self, paid=False, quantidade=PIPELINE_VIDEOS):
+        """
+        Lista a pasta do Drive e coloca até 'quantidade' vídeos novos e elegíveis na fila.
+
+        Returns:
+            int: Quantidade de jobs criados.
+        """
+        service = await asyncio.to_thread(self._servico_drive)
+        na_fila = self.fila.ids()
+
+        if SELETOR_DRIVE:
+            escolhidos = await asyncio.to_thread(
+                SeletorVideos(self.driver, self.historico).selecionar,
+                service,
+                paid=paid,
+                quantidade=quantidade,
+                politica=SELETOR_DRIVE,
+                excluir=na_fila,
+                preferir=obter_armazem().downloads_interrompidos(),
+            )
+            criados = sum(
+                self.fila.adicionar(video, {"video": video}) for video in escolhidos
+            )
+            logger.info(f"{criados} vídeo(s) adicionado(s) à fila.")
+            return criados
+
+        videos = await asyncio.to_thread(self.driver.find_videos_in_folder, service)
+
+        self.historico.migrar_chaves_de_nome(videos)
+        candidatos = [
+            video
+            for video in self.historico.filtrar_novos(
+                [video for video in videos if video["name"].startswith("paid_") == paid]
+            )
+            if video["id"] not in na_fila and not self.driver.motivo_inelegivel(video)
+        ]
+
+        escolhidos = escolher(
+            candidatos, quantidade, obter_armazem().downloads_interrompidos()
+        )
+        criados = sum(
+            self.fila.adicionar(video, {"video": video}) for video in escolhidos
+        )
+        logger.info(
+            f"{criados} vídeo(s) adicionado(s) à fila ({len(candidatos)} elegível(is) no Drive)."
+        )
+        return criados
+
+    async def _baixar(self, job):
+        video = job["dados"]["video"]
+        caminho = os.path.join(PASTA_DOWNLOADS, video["name"])
+
+        # O download só renomeia o arquivo final depois de conferido
+        if not os.path.exists(caminho):
+            os.makedirs(PASTA_DOWNLOADS, exist_ok=True)
+            service = await asyncio.to_thread(self._servico_drive)
+            if not await asyncio.to_thread(
+                self.driver.download, service, video, PASTA_DOWNLOADS, obter_armazem()
+            ):
+                raise RuntimeError("download não concluído")
+
+        self.historico.registrar_drive(video, f"Video baixado em {date.today()}")
+        job["dados"]["caminho"] = caminho
+        return True
+
+    async def _sondar(self, job):
+        # O resultado fica no cache de sondagens; as etapas seguintes o reaproveitam
+        metadados = await asyncio.to_thread(analisar_video, job["dados"]["caminho"])
+        if metadados is None:
+            raise RuntimeError("não foi possível analisar o vídeo")
+        job["dados"]["duracao"] = metadados.duracao
+        return True
+
+    async def _previa(self, job, fixar=False):
+        """
+        Obtém a prévia do vídeo no armazém de prévias (cortando-a se preciso).
+
+        As etapas seguintes também passam por aqui: se a prévia tiver sido removida
+        do armazém para liberar espaço, ela é cortada de novo em vez de falhar. Com
+        fixar=True, a etapa solta a prévia (obter_previas().soltar) após enviá-la.
+        """
+        previas = obter_previas()
+        return await asyncio.to_thread(previas.obter, job["dados"]["caminho"], fixar=fixar)
+
+    async def _cortar_previa(self, job):
+        status_corte, _, _ = await self._previa(job)
+        if status_corte == "IGNORADO":
+            self.fila.ignorar(job, "vídeo curto demais para a prévia")
+            obter_armazem().remover(job["dados"]["caminho"])
+            return False
+        if status_corte != "SUCESSO":
+            raise RuntimeError(f"corte da prévia falhou ({status_corte})")
+        return True
+
+    async def _enviar_canal(self, job):
+        client = await obter_cliente_async()
+        caminho = job["dados"]["caminho"]
+        metadados = await asyncio.to_thread(analisar_video, caminho)
+        estrelas = _estrelas(job["nome"])
+
+        dados = job["dados"]
+
+        # O id da mensagem é gravado logo após o envio: uma retomada não posta de novo
+        if dados.get("msg_id_grupo") or dados.get("msg_id_canal"):
+            logger.info(f"'{job['nome']}' já foi enviado ao Telegram. Envio não repetido.")
+        elif estrelas is None:
+            mensagem = await enviar_gratuito_ao_grupo_async(client, caminho, metadados)
+            dados["msg_id_grupo"] = mensagem.id
+            self.fila.salvar_dados(job)
+        else:
+            if not NOME_DO_CANAL:
+                raise RuntimeError("NOME_CANAL_TELEGRAM não configurado para mídia paga")
+            msg_id_canal = await enviar_pago_ao_canal_async(
+                client, caminho, metadados, estrelas
+            )
+            if msg_id_canal is None:
+                # A mídia paga pode ter sido postada: repetir a etapa duplicaria o post
+                self.fila.falhar(
+                    job,
+                    "mídia paga enviada sem id da mensagem no canal; confira o canal antes de retentar",
+                    definitiva=True,
+                )
+                return False
+            dados["msg_id_canal"] = msg_id_canal
+            self.fila.salvar_dados(job)
+
+        obter_armazem().marcar(caminho, ENVIADO)
+        return True
+
+    async def _encaminhar(self, job):
+        estrelas = _estrelas(job["nome"])
+        if estrelas is None:
+            return True
+
+        client = await obter_cliente_async()
+        dados = job["dados"]
+
+        # Cada passo é marcado (e gravado) nos dados, para não se repetir numa retomada
+        if not dados.get("previa_enviada"):
+            metadados = await asyncio.to_thread(analisar_video, dados["caminho"])
+            _, caminho_previa, caminho_thumbnail = await self._previa(job, fixar=True)
+            try:
+                await enviar_previa_ao_grupo_async(
+                    client,
+                    caminho_previa,
+                    caminho_thumbnail,
+                    metadados,
+                    estrelas,
+                    job["nome"],
+                )
+            finally:
+                if caminho_previa:
+                    obter_previas().soltar(caminho_previa)
+            dados["previa_enviada"] = True
+            self.fila.salvar_dados(job)
+
+        if dados.get("encaminhado"):
+            return True
+        if dados.get("msg_id_canal"):
+            await encaminhar_ao_grupo_async(client, dados["msg_id_canal"], job["nome"])
+            dados["encaminhado"] = True
+            self.fila.salvar_dados(job)
+        else:
+            logger.error(
+                "Não foi possível identificar o ID da mensagem no canal para encaminhar."
+            )
+        return True
+
+    async def _postar_x(self, job):
+        publicador = obter_publicador()
+        if publicador is None:
+            raise RuntimeError("credenciais do X ausentes")
+
+        # Limite de requisições do X: o job espera o reset sem gastar tentativas
+        if self._adiar_se_limitado(job, publicador):
+            return False
+
+        texto_tweet = f"Novo video postado! 🔥\n\nPara ver o vídeo completo e muito mais, acesse nosso canal: {LINK_GRUPO}"
+        # O estado de upload do X evita postar a mesma prévia duas vezes
+        _, caminho_previa, _ = await self._previa(job, fixar=True)
+        try:
+            postado = await publicador.postar_video_async(caminho_previa, texto_tweet)
+        finally:
+            if caminho_previa:
+                obter_previas().soltar(caminho_previa)
+        if not postado:
+            if self._adiar_se_limitado(job, publicador):
+                return False
+            raise RuntimeError("postagem no X não concluída")
+
+        # A prévia fica no armazém de prévias; só o vídeo original é removido
+        obter_armazem().remover(job["dados"]["caminho"])
+        return True
+
+    def _adiar_se_limitado(self, job, publicador):
+        """Adia o job até o reset do limite do X, se ele estiver esgotado."""
+        liberacao = publicador.proxima_postagem_permitida()
+        if liberacao <= time.time():
+            return False
+        self.fila.adiar(job, liberacao, "limite de requisições do X esgotado")
+        return True
+
+    async def _worker(self, etapa, parar):
+        """Consome os jobs que concluíram a etapa anterior a 'etapa'."""
+        anterior = ETAPAS[ETAPAS.index(etapa) - 1]
+        handler = self.handlers[etapa]
+
+        while not parar.is_set():
+            job = self.fila.reservar(anterior)
+            if job is None:
+                await asyncio.sleep(INTERVALO_CONSULTA)
+                continue
+
+            logger.info(f"[{etapa}] Processando '{job['nome']}'...")
+            try:
+                if await handler(job):
+                    self.fila.avancar(job, etapa)
+            except Exception as e:
+                self.fila.falhar(job, e)
+
+    async def executar(self, paid=False, quantidade=PIPELINE_VIDEOS):
+        """
+        Enfileira vídeos novos do Drive e processa a fila até não restar job pronto.
+
+        Jobs de execuções anteriores (interrompidos ou cuja espera de nova tentativa
+        já passou) também são processados. Jobs ainda na espera de uma nova tentativa
+        não seguram a execução: ficam para a próxima.
+        """
+        self.fila.recuperar()
+        await self.enfileirar_do_drive(paid=paid, quantidade=quantidade)
+
+        parar = asyncio.Event()
+        concorrencia = _concorrencia_por_etapa()
+        workers = [
+            asyncio.create_task(self._worker(etapa, parar))
+            for etapa in ETAPAS[1:]
+            for _ in range(concorrencia[etapa])
+        ]
+        logger.info(f"Pipeline iniciado com {len(workers)} worker(s): {concorrencia}")
+
+        try:
+            while self.fila.prontos():
+                await asyncio.sleep(INTERVALO_CONSULTA)
+        finally:
+            parar.set()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        aguardando = self.fila.ativos()
+        if aguardando:
+            logger.info(
+                f"{aguardando} job(s) aguardando nova tentativa ficam para a próxima execução."
+            )
+        for falha in self.fila.falhas():
+            logger.warning(
+                f"Job com falha: '{falha['nome']}' (id {falha['id']}) após '{falha['etapa']}': "
+                f"{falha['erro']}. Use 'retentar' para devolvê-lo à fila."
+            )
+        logger.info(f"Pipeline finalizado. Resumo da fila: {self.fila.resumo()}")
+
+
+async def executar_pipeline(paid=False, quantidade=PIPELINE_VIDEOS):
+    """Executa o pipeline em etapas (veja Pipeline.executar)."""
+    await Pipeline().executar(paid=paid, quantidade=quantidade)
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+from app.config import obter_config
+from app.src.armazem_maneger import obter_armazem
+from app.src.editor_de_videos import MODO_CORTE, cortar_video
+from app.utils.gravacao import gravar_json_atomico
+from app.utils.instancia_unica import instancia_unica
+from app.utils.logger import ColorLogger
+
+config = obter_config()
+logger = ColorLogger()
+
+PASTA_PREVIAS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "videos_processados",
+    "previas",
+)
+PREVIAS_INDEX_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "banco_dados",
+    "previas.json",
+)
+# Espaço máximo ocupado pelas prévias guardadas (as menos usadas são removidas antes)
+PREVIAS_LIMITE_BYTES = config.previas_limite_mb * 1024 * 1024
+
+
+class PreviaManeger:
+    """
+    Armazém das prévias cortadas, compartilhado pelo Telegram e pelo X.
+
+    Cada prévia é indexada pelo conteúdo do vídeo de origem (md5) e pelos
+    parâmetros do corte, então o mesmo trecho é codificado uma única vez e servido a
+    todos os destinos. O espaço ocupado é limitado a PREVIAS_LIMITE_BYTES, removendo
+    as prévias usadas há mais tempo (LRU); as prévias fixadas (em envio para o
+    Telegram ou o X) nunca são removidas.
+    """
+
+    def __init__(self, pasta=PASTA_PREVIAS, index_path=PREVIAS_INDEX_FILE, limite_bytes=PREVIAS_LIMITE_BYTES):
+        self.pasta = pasta
+        self.index_path = index_path
+        self.limite_bytes = limite_bytes
+        self._trava = threading.Lock()
+        # Trava de corte por chave, com quantos a estão usando (removida ao zerar)
+        self._travas_chave = {}
+        self._fixadas = {}
+        try:
+            with open(self.index_path, "r") as f:
+                self.entradas = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.entradas = {}
+
+    def _salvar(self):
+        """Grava o índice no disco de forma atômica (chamado com a trava)."""
+        gravar_json_atomico(self.index_path, self.entradas)
+
+    def _caminhos(self, chave):
+        base = os.path.join(self.pasta, f"previa_{chave}")
+        return f"{base}.mp4", f"{base}.jpg"
+
+    @staticmethod
+    def chave(caminho_video, inicio, duracao, modo_corte):
+        """Chave da prévia: conteúdo do vídeo de origem + parâmetros do corte."""
+        origem = obter_armazem().md5(caminho_video)
+        return hashlib.sha256(
+            f"{origem}:{inicio}:{duracao}:{modo_corte}".encode()
+        ).hexdigest()[:32]
+
+    @staticmethod
+    def _chave_do_caminho(caminho_previa):
+        return os.path.splitext(os.path.basename(caminho_previa))[0][len("previa_") :]
+
+    def obter(self, caminho_video, inicio=120, duracao=120, modo_corte=None, fixar=False):
+        """
+        Retorna a prévia do vídeo, cortando-a só se ainda não existir no armazém.
+
+        Chamadas simultâneas para a mesma prévia esperam um único corte. Com
+        fixar=True, a prévia devolvida já sai fixada (veja fixar()): quem a recebe
+        chama soltar() quando terminar de enviá-la.
+
+        :return: (status, caminho_previa, caminho_thumbnail), com status 'SUCESSO',
+            'IGNORADO' ou 'ERRO' (os caminhos são None quando não há prévia).
+        """
+        modo_corte = modo_corte or MODO_CORTE
+        chave = self.chave(caminho_video, inicio, duracao, modo_corte)
+
+        with self._trava:
+            trava_chave, usuarios = self._travas_chave.get(chave, (threading.Lock(), 0))
+            self._travas_chave[chave] = (trava_chave, usuarios + 1)
+        try:
+            with trava_chave:
+                return self._obter(caminho_video, chave, inicio, duracao, modo_corte, fixar)
+        finally:
+            with self._trava:
+                trava_chave, usuarios = self._travas_chave[chave]
+                if usuarios > 1:
+                    self._travas_chave[chave] = (trava_chave, usuarios - 1)
+                else:
+                    del self._travas_chave[chave]
+
+    def _obter(self, caminho_video, chave, inicio, duracao, modo_corte, fixar):
+        """Corpo de obter(), chamado com a trava da chave."""
+        caminho_previa, caminho_thumbnail = self._caminhos(chave)
+        with self._trava:
+            if chave in self.entradas and os.path.exists(caminho_previa):
+                self.entradas[chave]["ultimo_uso"] = time.time()
+                if fixar:
+                    self._fixadas[chave] = self._fixadas.get(chave, 0) + 1
+                self._salvar()
+                logger.info(f"Prévia reaproveitada do armazém ({chave[:12]}...).")
+                return "SUCESSO", caminho_previa, caminho_thumbnail
+
+        # Corta com nomes temporários únicos e só publica o resultado completo
+        os.makedirs(self.pasta, exist_ok=True)
+        sufixo = uuid.uuid4().hex
+        tmp_previa = os.path.join(self.pasta, f"{sufixo}.tmp.mp4")
+        tmp_thumbnail = os.path.join(self.pasta, f"{sufixo}.tmp.jpg")
+
+        status, inicio_real, duracao_real = cortar_video(
+            caminho_video,
+            tmp_previa,
+            inicio,
+            duracao,
+            caminho_thumbnail=tmp_thumbnail,
+            modo_corte=modo_corte,
+        )
+        if status != "SUCESSO":
+            for caminho in (tmp_previa, tmp_thumbnail):
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+            return status, None, None
+
+        os.replace(tmp_previa, caminho_previa)
+        if os.path.exists(tmp_thumbnail):
+            os.replace(tmp_thumbnail, caminho_thumbnail)
+
+        with self._trava:
+            self.entradas[chave] = {
+                "tamanho": sum(
+                    os.path.getsize(caminho)
+                    for caminho in (caminho_previa, caminho_thumbnail)
+                    if os.path.exists(caminho)
+                ),
+                "ultimo_uso": time.time(),
+                "inicio": inicio_real,
+                "duracao": duracao_real,
+            }
+            if fixar:
+                self._fixadas[chave] = self._fixadas.get(chave, 0) + 1
+            self._liberar_espaco(manter=chave)
+            self._salvar()
+
+        return "SUCESSO", caminho_previa, caminho_thumbnail
+
+    def trecho(self, caminho_previa):
+        """
+        Início e duração reais do trecho de uma prévia do armazém (o início pode ter
+        sido ajustado ao keyframe), ou None se não forem conhecidos.
+        """
+        chave = self._chave_do_caminho(caminho_previa)
+        with self._trava:
+            entrada = self.entradas.get(chave) or {}
+        if entrada.get("duracao") is None:
+            return None
+        return entrada["inicio"], entrada["duracao"]
+
+    def fixar(self, caminho_previa):
+        """
+        Protege a prévia contra remoção para liberar espaço até soltar() (ex.:
+        enquanto ela sobe para o Telegram ou o X). As proteções se acumulam: cada
+        fixar() precisa do seu soltar().
+        """
+        chave = self._chave_do_caminho(caminho_previa)
+        with self._trava:
+            self._fixadas[chave] = self._fixadas.get(chave, 0) + 1
+
+    def soltar(self, caminho_previa):
+        """Desfaz um fixar() (ou um obter(..., fixar=True))."""
+        chave = self._chave_do_caminho(caminho_previa)
+        with self._trava:
+            restantes = self._fixadas.get(chave, 0) - 1
+            if restantes > 0:
+                self._fixadas[chave] = restantes
+            else:
+                self._fixadas.pop(chave, None)
+
+    def _liberar_espaco(self, manter=None):
+        """
+        Remove as prévias menos usadas até caber no limite (chamado com a trava).
+        As prévias fixadas e 'manter' nunca são removidas.
+        """
+        total = sum(entrada["tamanho"] for entrada in self.entradas.values())
+        for chave in sorted(self.entradas, key=lambda c: self.entradas[c]["ultimo_uso"]):
+            if total <= self.limite_bytes:
+                break
+            if chave == manter or chave in self._fixadas:
+                continue
+            total -= self.entradas.pop(chave)["tamanho"]
+            for caminho in self._caminhos(chave):
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+            logger.info(f"Prévia removida do armazém para liberar espaço ({chave[:12]}...).")
+
+
+@instancia_unica
+def obter_previas():
+    """Retorna o armazém de prévias do processo (carregado uma vez)."""
+    return PreviaManeger()
@@ -0,0 +1,169 @@
+import heapq
+import random
+from datetime import date, datetime, timezone
+
+from app.utils.logger import ColorLogger
+
+logger = ColorLogger()
+
+# Políticas de seleção
+ALEATORIO = "aleatorio"  # Amostra uniforme (reservatório) sobre a pasta inteira
+POR_IDADE = "idade"  # Amostra ponderada: vídeos mais antigos no Drive têm mais peso
+PRIMEIROS = "primeiros"  # Os primeiros elegíveis da listagem (para de listar ao achá-los)
+POLITICAS = (ALEATORIO, POR_IDADE, PRIMEIROS)
+
+# Vídeos por página pedidos ao Drive (o máximo aceito pela API é 1000)
+TAMANHO_PAGINA = 1000
+
+
+def peso_por_idade(video, agora=None):
+    """Peso de um vídeo na política 'idade': 1 + meses desde a última alteração."""
+    modificado = video.get("modifiedTime")
+    if not modificado:
+        return 1.0
+    agora = agora or datetime.now(timezone.utc)
+    quando = datetime.fromisoformat(modificado.replace("Z", "+00:00"))
+    return 1.0 + max(0.0, (agora - quando).total_seconds()) / (30 * 24 * 3600)
+
+
+def descartar_inelegiveis(driver, historico, videos):
+    """
+    Descarta, antes do download, os vídeos que o Drive já sabe que não servem
+    (curtos demais ou grandes demais) e os registra no cache para não reavaliá-los.
+
+    Returns:
+        list: Os vídeos elegíveis, na ordem original.
+    """
+    inelegiveis = {}
+    elegiveis = []
+    for video in videos:
+        motivo = driver.motivo_inelegivel(video)
+        if not motivo:
+            elegiveis.append(video)
+            continue
+        logger.info(f"Vídeo '{video['name']}' ignorado: {motivo}.")
+        for chave in historico.chaves_drive(video):
+            inelegiveis[chave] = f"Video inelegivel ({motivo}) em {date.today()}"
+
+    if inelegiveis:
+        historico.cache.set_many_data(inelegiveis)
+    return elegiveis
+
+
+def escolher(videos, quantidade, preferir=()):
+    """
+    Escolhe até 'quantidade' vídeos: primeiro os de 'preferir' (nomes de downloads
+    interrompidos, que são retomados em vez de recomeçar outro), depois ao acaso.
+    """
+    retomadas = [video for video in videos if video["name"] in preferir][:quantidade]
+    restantes = [video for video in videos if video["name"] not in preferir]
+    return retomadas + random.sample(
+        restantes, min(quantidade - len(retomadas), len(restantes))
+    )
+
+
+class SeletorVideos:
+    """
+    Escolhe vídeos novos da pasta do Drive sem carregar a listagem inteira.
+
+    As páginas vêm do índice local da pasta (atualizado pelo feed de alterações) ou,
+    sem índice, de files().list; elas são processadas uma a uma: cada página é filtrada
+    (pago/gratuito, elegibilidade) e conferida no histórico com um único MGET, e os
+    candidatos passam por uma amostragem de reservatório ponderada (A-Res), que
+    guarda só os 'quantidade' escolhidos. Além do índice, a memória da seleção fica
+    limitada a uma página mais o reservatório, qualquer que seja o tamanho da pasta.
+    Na política 'primeiros', a listagem para assim que há candidatos suficientes (e,
+    sem índice, as páginas restantes nem são pedidas à API).
+    """
+
+    def __init__(self, driver, historico, tamanho_pagina=TAMANHO_PAGINA):
+        self.driver = driver
+        self.historico = historico
+        self.tamanho_pagina = tamanho_pagina
+
+    def selecionar(
+        self, service, paid=False, quantidade=1, politica=ALEATORIO, excluir=(), preferir=()
+    ):
+        """
+        Seleciona até 'quantidade' vídeos novos e elegíveis do tipo pedido.
+
+        Args:
+            paid (bool): Seleciona vídeos pagos ('paid_...') ou gratuitos.
+            quantidade (int): Quantos vídeos escolher.
+            politica (str): 'aleatorio', 'idade' ou 'primeiros'.
+            excluir (set): Ids do Drive que não podem ser escolhidos (ex.: já na fila).
+            preferir (set): Nomes escolhidos antes de qualquer outro, se encontrados
+                (downloads interrompidos a retomar); a política 'primeiros' só
+                interrompe a listagem depois de passar por todos eles.
+
+        Returns:
+            list: Os vídeos escolhidos (menos que 'quantidade' se não houver tantos).
+        """
+        if politica not in POLITICAS:
+            raise ValueError(f"Política de seleção inválida: '{politica}'.")
+
+        migrar = self.historico.migracao_pendente()
+        reservatorio = []  # heap de (chave, desempate, vídeo) com as maiores chaves
+        md5_escolhidos = set()
+        paginas = vistos = candidatos = migradas = 0
+        completa = True
+        agora = datetime.now(timezone.utc)
+        # Retomadas ainda não encontradas: a política 'primeiros' não para antes delas
+        procurando = set(preferir)
+
+        for pagina in self.driver.iter_video_pages(service, self.tamanho_pagina):
+            paginas += 1
+            vistos += len(pagina)
+            if migrar:
+                migradas += self.historico.copiar_chaves_de_nome(pagina)
+            procurando.difference_update(video["name"] for video in pagina)
+
+            novos = self.historico.filtrar_novos(
+                [
+                    video
+                    for video in pagina
+                    if video["name"].startswith("paid_") == paid
+                    and video["id"] not in excluir
+                ]
+            )
+            for video in descartar_inelegiveis(self.driver, self.historico, novos):
+                # Cópias do mesmo conteúdo em páginas diferentes não entram juntas
+                md5 = video.get("md5Checksum")
+                if md5 and md5 in md5_escolhidos:
+                    continue
+                candidatos += 1
+
+                if video["name"] in preferir:
+                    chave = float("inf")
+                elif politica == PRIMEIROS:
+                    chave = -candidatos
+                else:
+                    peso = peso_por_idade(video, agora) if politica == POR_IDADE else 1.0
+                    chave = random.random() ** (1.0 / peso)
+
+                item = (chave, candidatos, video)
+                if len(reservatorio) < quantidade:
+                    heapq.heappush(reservatorio, item)
+                elif chave > reservatorio[0][0]:
+                    _, _, saiu = heapq.heapreplace(reservatorio, item)
+                    md5_escolhidos.discard(saiu.get("md5Checksum"))
+                else:
+                    continue
+                if md5:
+                    md5_escolhidos.add(md5)
+
+            if politica == PRIMEIROS and len(reservatorio) >= quantidade and not procurando:
+                completa = False
+                break
+
+        # A migração só é dada como concluída se todas as páginas foram vistas
+        if migrar and completa:
+            self.historico.concluir_migracao(migradas)
+
+        escolhidos = [video for _, _, video in sorted(reservatorio, reverse=True)]
+        logger.info(
+            f"Seleção '{politica}': {len(escolhidos)} vídeo(s) escolhido(s) entre "
+            f"{candidatos} candidato(s); {vistos} vídeo(s) lido(s) em {paginas} página(s)"
+            f"{'' if completa else ' (listagem interrompida)'}."
+        )
+        return escolhidos
@@ -1,26 +1,38 @@
+import asyncio
+import mimetypes
 import os
-import random
 import re
 import subprocess
 
-from dotenv import load_dotenv
-from telethon import functions, types
-from telethon.sync import TelegramClient
-
-from app.src.editor_de_videos import cortar_video
+from telethon import errors, functions, types
+
+from app.config import obter_config
+from app.src.armazem_maneger import obter_armazem
+from app.src.editor_de_videos import analisar_video, duracao_do_corte
+from app.src.previa_maneger import obter_previas
+from app.src.upload_cache import ERROS_HANDLE_EXPIRADO, UploadCache, documento_da_mensagem
+from app.src.upload_rapido import upload_rapido
+from app.src.telegram_client import (
+    API_HASH,
+    API_ID,
+    com_peers,
+    executar,
+    obter_cliente_async,
+    resolver_peer_async,
+)
+from app.utils.instancia_unica import instancia_unica
 from app.utils.logger import ColorLogger
+from app.utils.metricas import obter_metricas
 
-load_dotenv()
+config = obter_config()
 logger = ColorLogger()
 
-# Lendo as credenciais do Telegram do arquivo .env
-API_ID = os.getenv("TELEGRAM_API_ID")
-API_HASH = os.getenv("TELEGRAM_API_HASH")
-NOME_DO_GRUPO = os.getenv("NOME_GRUPO_TELEGRAM")
-NOME_DO_CANAL = os.getenv("NOME_CANAL_TELEGRAM")
+# Lendo os nomes do grupo e do canal do arquivo .env
+NOME_DO_GRUPO = config.nome_grupo_telegram
+NOME_DO_CANAL = config.nome_canal_telegram
 
-# Caminho absoluto para o arquivo de sessão do Telegram
-SESSION_FILE = "app/sessions/sessao_telegram.session"
+# Quantos vídeos são enviados ao mesmo tempo pela rotina de upload
+UPLOAD_CONCORRENCIA = config.upload_concorrencia
 
 
 def validar_arquivo_video(caminho_arquivo):
@@ -56,12 +68,300 @@ def obter_tamanho_arquivo(caminho_arquivo):
     return tamanho_mb
 
 
-def subir_video_para_telegram(caminho_video, mensagem_caption=""):
+def _atributos_video(metadados, nome_arquivo, duracao=None):
+    """
+    Monta os atributos do documento a partir dos metadados do ffprobe.
+
+    Assim o Telethon não precisa sondar o arquivo de novo para descobrir
+    duração, largura e altura.
+
+    :param duracao: Duração a usar no lugar da do vídeo (ex.: trecho da prévia).
+    :return: (atributos, mime_type)
+    """
+    mime_type = mimetypes.guess_type(nome_arquivo)[0] or "video/mp4"
+    atributos = [types.DocumentAttributeFilename(nome_arquivo)]
+
+    if metadados:
+        atributos.append(
+            types.DocumentAttributeVideo(
+                duration=duracao if duracao is not None else metadados.duracao or 0,
+                w=metadados.largura,
+                h=metadados.altura,
+                supports_streaming=True,
+            )
+        )
+
+    return atributos, mime_type
+
+
+@instancia_unica
+def _obter_cache_uploads():
+    """Retorna o cache de handles de upload do processo (carregado uma vez)."""
+    return UploadCache()
+
+
+def chave_conteudo(caminho_arquivo):
+    """
+    Chave do conteúdo no cache de uploads: 'md5:<md5>', com o md5Checksum do Drive
+    (guardado no armazém) ou o md5 do arquivo inteiro. É a mesma chave usada no envio
+    em streaming, então um vídeo enviado por um caminho é reaproveitado pelo outro.
+    """
+    return f"md5:{obter_armazem().md5(caminho_arquivo)}"
+
+
+async def _enviar_com_cache(client, chave, arquivo, enviar, file_size=None, file_name=None):
+    """
+    Executa enviar(midia) reaproveitando o handle já salvo para o conteúdo, se houver.
+
+    Sem handle salvo, o arquivo é enviado com upload_rapido() e as partes ficam
+    registradas no cache (úteis se o envio da mensagem falhar). Se o file_reference
+    do documento salvo tiver expirado, ele é renovado pela mensagem de origem; se o
+    Telegram recusar o handle de vez, ele é descartado e o arquivo é enviado de novo.
+
+    :param chave: Hash do conteúdo (None desativa o cache).
+    :param enviar: Corrotina que recebe a mídia (InputDocument ou InputFile) e a envia.
+    """
+    cache_uploads = _obter_cache_uploads()
+
+    async def novo_upload():
+        tamanho = os.path.getsize(arquivo) if isinstance(arquivo, str) else file_size
+        with obter_metricas().span("telegram_upload", bytes=tamanho or 0):
+            input_file = await upload_rapido(
+                client, arquivo, file_size=file_size, file_name=file_name
+            )
+        if chave:
+            cache_uploads.salvar_input_file(chave, input_file)
+        return input_file
+
+    midia = cache_uploads.obter(chave) if chave else None
+    if midia is None:
+        return await enviar(await novo_upload())
+
+    try:
+        return await enviar(midia)
+    except ERROS_HANDLE_EXPIRADO as erro:
+        if isinstance(erro, errors.FileReferenceExpiredError):
+            midia = await _renovar_referencia(client, chave)
+            if midia is not None:
+                try:
+                    return await enviar(midia)
+                except ERROS_HANDLE_EXPIRADO:
+                    pass
+        cache_uploads.invalidar(chave)
+        return await enviar(await novo_upload())
+
+
+async def _renovar_referencia(client, chave):
+    """
+    Busca de novo a mensagem que contém o documento salvo para 'chave' e grava o
+    file_reference atualizado.
+
+    :return: InputDocument com a referência nova, ou None se a mensagem não existir
+        mais (ou não tiver o mesmo documento).
+    """
+    cache_uploads = _obter_cache_uploads()
+    origem = cache_uploads.origem(chave)
+    if origem is None:
+        return None
+
+    chat, msg_id = origem
+    try:
+        mensagem = await client.get_messages(chat, ids=msg_id)
+    except (errors.RPCError, ValueError) as e:
+        logger.warning(f"Não foi possível buscar a mensagem {msg_id} para renovar a referência: {e}")
+        return None
+
+    documento = documento_da_mensagem(mensagem) if mensagem else None
+    salvo = cache_uploads.entradas[chave]["documento"]
+    if documento is None or documento.id != salvo["id"]:
+        return None
+
+    logger.info(f"Referência do documento renovada pela mensagem {msg_id} ({chave[:12]}...).")
+    cache_uploads.salvar_documento(chave, documento, origem)
+    return types.InputDocument(
+        id=documento.id,
+        access_hash=documento.access_hash,
+        file_reference=documento.file_reference,
+    )
+
+
+async def enviar_pago_ao_canal_async(
+    client, caminho_video, metadados, estrelas, mensagem_caption=""
+):
+    """
+    Envia o vídeo como mídia paga no canal (reaproveitando um envio anterior do
+    mesmo conteúdo, se houver).
+
+    :return: ID da mensagem no canal, ou None se não puder ser identificado.
+    :raises ValueError: Se o canal não for encontrado.
+    """
+    # Falha cedo (ValueError) se o canal não existir, antes de subir o arquivo
+    await resolver_peer_async(NOME_DO_CANAL, client)
+    nome_arquivo = os.path.basename(caminho_video)
+
+    # --- UPLOAD DO CONTEÚDO PAGO NO CANAL ---
+    logger.info(f"Iniciando upload do vídeo pago no CANAL: {nome_arquivo}")
+
+    # Para mídia paga, precisamos fazer upload do arquivo primeiro para obter o handle
+    # (ou reaproveitar o de um envio anterior do mesmo conteúdo)
+    logger.info("Fazendo upload do arquivo bruto...")
+    chave_video = await asyncio.to_thread(chave_conteudo, caminho_video)
+
+    # Criar o InputMedia apropriado para o vídeo (streamável)
+    atributos, mime_type = _atributos_video(metadados, nome_arquivo)
+
+    async def enviar_pago(midia):
+        if isinstance(midia, types.InputDocument):
+            input_media_video = types.InputMediaDocument(id=midia)
+        else:
+            input_media_video = types.InputMediaUploadedDocument(
+                file=midia, mime_type=mime_type, attributes=atributos
+            )
+
+        logger.info("Enviando solicitação de Mídia Paga para o CANAL...")
+        return await com_peers(
+            client,
+            (NOME_DO_CANAL,),
+            lambda entidade_canal: client(
+                functions.messages.SendMediaRequest(
+                    peer=entidade_canal,
+                    media=types.InputMediaPaidMedia(
+                        stars_amount=estrelas,
+                        extended_media=[input_media_video],
+                    ),
+                    message=mensagem_caption if mensagem_caption else "",
+                )
+            ),
+            f"mídia paga {nome_arquivo}",
+        )
+
+    updates = await _enviar_com_cache(client, chave_video, caminho_video, enviar_pago)
+
+    # Recuperar a mensagem enviada (para encaminhar depois)
+    # Updates geralmente contém a lista de mensagens ou atualizações
+    msg_id_canal = None
+    for update in updates.updates:
+        if isinstance(update, (types.UpdateNewChannelMessage, types.UpdateNewMessage)):
+            msg_id_canal = update.message.id
+            _obter_cache_uploads().salvar_mensagem(chave_video, update.message)
+            break
+
+    logger.info(f"✅ Vídeo PAGO enviado para o CANAL com sucesso! ID: {msg_id_canal}")
+    return msg_id_canal
+
+
+async def enviar_previa_ao_grupo_async(
+    client, caminho_previa, caminho_thumbnail, metadados, estrelas, nome_arquivo
+):
+    """Envia a prévia de um vídeo pago para o grupo (com a miniatura, se existir)."""
+    # Falha cedo (ValueError) se o grupo não existir, antes de subir o arquivo
+    await resolver_peer_async(NOME_DO_GRUPO, client)
+
+    chave_previa = await asyncio.to_thread(chave_conteudo, caminho_previa)
+    # A duração é a do trecho realmente cortado (com o início ajustado ao keyframe)
+    trecho = obter_previas().trecho(caminho_previa)
+    atributos_previa, mime_previa = _atributos_video(
+        metadados,
+        os.path.basename(caminho_previa),
+        duracao=trecho[1] if trecho else duracao_do_corte(metadados),
+    )
+
+    async def enviar_previa(midia):
+        return await com_peers(
+            client,
+            (NOME_DO_GRUPO,),
+            lambda entidade_grupo: client.send_file(
+                entity=entidade_grupo,
+                file=midia,
+                caption=f"👀 Prévia do Conteúdo Exclusivo ({estrelas} ⭐️)\n\nAdquira o vídeo completo abaixo! 👇",
+                attributes=atributos_previa,
+                mime_type=mime_previa,
+                thumb=caminho_thumbnail
+                if caminho_thumbnail and os.path.exists(caminho_thumbnail)
+                else None,
+                supports_streaming=True,
+            ),
+            f"prévia {nome_arquivo}",
+        )
+
+    mensagem_previa = await _enviar_com_cache(
+        client, chave_previa, caminho_previa, enviar_previa
+    )
+    _obter_cache_uploads().salvar_mensagem(chave_previa, mensagem_previa)
+    logger.info("✅ Prévia enviada para o GRUPO com sucesso!")
+
+
+async def encaminhar_ao_grupo_async(client, msg_id_canal, nome_arquivo):
+    """Encaminha a mensagem paga do canal para o grupo."""
+    logger.info("Encaminhando vídeo pago do Canal para o Grupo...")
+    with obter_metricas().span("telegram_encaminhar"):
+        await com_peers(
+            client,
+            (NOME_DO_CANAL, NOME_DO_GRUPO),
+            lambda entidade_canal, entidade_grupo: client.forward_messages(
+                entity=entidade_grupo,
+                messages=msg_id_canal,
+                from_peer=entidade_canal,
+            ),
+            f"encaminhar {nome_arquivo}",
+            etapa="telegram_encaminhar",
+        )
+    logger.info("✅ Vídeo pago encaminhado para o GRUPO com sucesso!")
+
+
+async def enviar_gratuito_ao_grupo_async(
+    client, caminho_video, metadados, mensagem_caption=""
+):
+    """
+    Envia um vídeo gratuito para o grupo (partes em paralelo, ou reaproveitando um
+    envio anterior do mesmo conteúdo).
+
+    :return: A mensagem enviada.
+    """
+    # Falha cedo (ValueError) se o grupo não existir, antes de subir o arquivo
+    await resolver_peer_async(NOME_DO_GRUPO, client)
+    nome_arquivo = os.path.basename(caminho_video)
+
+    logger.info(f"Iniciando upload do vídeo (Gratuito): {nome_arquivo}")
+    logger.info("Isso pode levar alguns minutos dependendo do tamanho do arquivo...")
+
+    # Faz o upload do vídeo e depois envia a mensagem
+    chave_video = await asyncio.to_thread(chave_conteudo, caminho_video)
+    atributos, mime_type = _atributos_video(metadados, nome_arquivo)
+
+    async def enviar_gratuito(midia):
+        return await com_peers(
+            client,
+            (NOME_DO_GRUPO,),
+            lambda entidade_grupo: client.send_file(
+                entity=entidade_grupo,
+                file=midia,
+                caption=mensagem_caption if mensagem_caption else None,
+                attributes=atributos,
+                mime_type=mime_type,
+                supports_streaming=True,
+            ),
+            f"upload {nome_arquivo}",
+        )
+
+    mensagem_enviada = await _enviar_com_cache(
+        client, chave_video, caminho_video, enviar_gratuito
+    )
+    _obter_cache_uploads().salvar_mensagem(chave_video, mensagem_enviada)
+
+    logger.info("✅ Vídeo enviado com sucesso!")
+    logger.info(f"ID da mensagem: {mensagem_enviada.id}")
+    logger.info(f"Data de envio: {mensagem_enviada.date}")
+    return mensagem_enviada
+
+
+async def subir_video_para_telegram_async(caminho_video, mensagem_caption=""):
     """
     Conecta-se ao Telegram e faz upload de um vídeo para o grupo especificado.
 
     Suporta upload de Conteúdo Pago se o arquivo começar com 'paid_{valor}_'.
-    Para conteúdo pago, gera e envia uma prévia antes do arquivo pago.
+    Para conteúdo pago, gera e envia uma prévia antes do arquivo pago; o corte da
+    prévia roda numa thread em paralelo ao upload do arquivo bruto.
     """
     if not all([API_ID, API_HASH]):
         logger.error("API_ID ou API_HASH do Telegram não encontrados no arquivo .env.")
@@ -78,167 +378,223 @@ def subir_video_para_telegram(caminho_video, mensagem_caption=""):
         logger.error("Arquivo muito grande. O Telegram tem limite de 2GB para uploads.")
         return False
 
-    with TelegramClient(SESSION_FILE, API_ID, API_HASH) as client:
-        logger.info("Conectado ao Telegram com sucesso!")
-
-        try:
-            # Encontra o grupo pelo nome
-            entidade_grupo = client.get_entity(NOME_DO_GRUPO)
-            logger.info(f"Grupo '{NOME_DO_GRUPO}' encontrado com sucesso.")
-
-            # Nome do arquivo para exibição e verificação de padrão
-            nome_arquivo = os.path.basename(caminho_video)
-
-            # Verificar se é conteúdo pago
-            match_pago = re.match(r"^paid_(\d+)_", nome_arquivo)
-
-            if match_pago:
-                estrelas = int(match_pago.group(1))
-                logger.info(f"💰 Conteúdo PAGO detectado! Valor: {estrelas} estrelas.")
-
-                # Verificar se o canal está configurado
-                if not NOME_DO_CANAL:
-                    logger.error(
-                        "NOME_CANAL_TELEGRAM não configurado no .env para mídia paga."
-                    )
-                    return False
-
-                # Obter entidade do canal
-                try:
-                    entidade_canal = client.get_entity(NOME_DO_CANAL)
-                    logger.info(f"Canal '{NOME_DO_CANAL}' encontrado com sucesso.")
-                except ValueError:
-                    logger.error(
-                        f"ERRO: Não foi possível encontrar o canal '{NOME_DO_CANAL}'."
-                    )
-                    return False
+    client = await obter_cliente_async()
 
-                # --- UPLOAD DO CONTEÚDO PAGO NO CANAL ---
-                logger.info(f"Iniciando upload do vídeo pago no CANAL: {nome_arquivo}")
-
-                # Para mídia paga, precisamos fazer upload do arquivo primeiro para obter o handle
-                logger.info("Fazendo upload do arquivo bruto...")
-                arquivo_upload = client.upload_file(caminho_video)
+    try:
+        # Encontra o grupo pelo nome
+        await resolver_peer_async(NOME_DO_GRUPO, client)
+        logger.info(f"Grupo '{NOME_DO_GRUPO}' encontrado com sucesso.")
 
-                # Criar o InputMedia apropriado para o vídeo
-                from telethon.utils import get_attributes
+        # Nome do arquivo para exibição e verificação de padrão
+        nome_arquivo = os.path.basename(caminho_video)
 
-                atributos, mime_type = get_attributes(caminho_video)
+        # Verificar se é conteúdo pago
+        match_pago = re.match(r"^paid_(\d+)_", nome_arquivo)
 
-                # Forçar supports_streaming=True para que o vídeo seja streamável
-                for attr in atributos:
-                    if isinstance(attr, types.DocumentAttributeVideo):
-                        attr.supports_streaming = True
+        if match_pago:
+            estrelas = int(match_pago.group(1))
+            logger.info(f"💰 Conteúdo PAGO detectado! Valor: {estrelas} estrelas.")
 
-                input_media_video = types.InputMediaUploadedDocument(
-                    file=arquivo_upload, mime_type=mime_type, attributes=atributos
+            # Verificar se o canal está configurado
+            if not NOME_DO_CANAL:
+                logger.error(
+                    "NOME_CANAL_TELEGRAM não configurado no .env para mídia paga."
                 )
-
-                logger.info("Enviando solicitação de Mídia Paga para o CANAL...")
-                updates = client(
-                    functions.messages.SendMediaRequest(
-                        peer=entidade_canal,
-                        media=types.InputMediaPaidMedia(
-                            stars_amount=estrelas, extended_media=[input_media_video]
-                        ),
-                        message=mensagem_caption if mensagem_caption else "",
-                    )
+                return False
+
+            # Obter entidade do canal
+            try:
+                await resolver_peer_async(NOME_DO_CANAL, client)
+                logger.info(f"Canal '{NOME_DO_CANAL}' encontrado com sucesso.")
+            except ValueError:
+                logger.error(
+                    f"ERRO: Não foi possível encontrar o canal '{NOME_DO_CANAL}'."
                 )
+                return False
 
-                # Recuperar a mensagem enviada (para encaminhar depois)
-                # Updates geralmente contém a lista de mensagens ou atualizações
-                msg_id_canal = None
-                for update in updates.updates:
-                    if isinstance(update, types.UpdateNewChannelMessage):
-                        msg_id_canal = update.message.id
-                        break
-                    elif isinstance(update, types.UpdateNewMessage):
-                        msg_id_canal = update.message.id
-                        break
-
-                logger.info(
-                    f"✅ Vídeo PAGO enviado para o CANAL com sucesso! ID: {msg_id_canal}"
-                )
+            # --- LÓGICA DE PRÉVIA NO GRUPO (corte em paralelo ao upload) ---
+            # A prévia vem do armazém compartilhado: a mesma é depois postada no X
+            logger.info("Gerando prévia do vídeo pago para o GRUPO...")
+
+            # Uma única sondagem do arquivo, reaproveitada pelo corte e pelos atributos
+            metadados = await asyncio.to_thread(analisar_video, caminho_video)
+            previas = obter_previas()
+            tarefa_previa = asyncio.create_task(
+                asyncio.to_thread(previas.obter, caminho_video, fixar=True)
+            )
 
-                # --- LÓGICA DE PRÉVIA NO GRUPO ---
-                logger.info("Gerando prévia do vídeo pago para o GRUPO...")
-                caminho_previa = os.path.join(
-                    os.path.dirname(caminho_video),
-                    f"previa_paid_{random.randint(1000, 9999)}.mp4",
+            try:
+                msg_id_canal = await enviar_pago_ao_canal_async(
+                    client, caminho_video, metadados, estrelas, mensagem_caption
                 )
 
-                status_corte = cortar_video(caminho_video, caminho_previa)
+                status_corte, caminho_previa, caminho_thumbnail = await tarefa_previa
 
                 if status_corte == "SUCESSO":
                     logger.info("Prévia gerada com sucesso. Enviando para o GRUPO...")
                     try:
-                        client.send_file(
-                            entity=entidade_grupo,
-                            file=caminho_previa,
-                            caption=f"👀 Prévia do Conteúdo Exclusivo ({estrelas} ⭐️)\n\nAdquira o vídeo completo abaixo! 👇",
-                            supports_streaming=True,
+                        await enviar_previa_ao_grupo_async(
+                            client,
+                            caminho_previa,
+                            caminho_thumbnail,
+                            metadados,
+                            estrelas,
+                            nome_arquivo,
                         )
-                        logger.info("✅ Prévia enviada para o GRUPO com sucesso!")
                     except Exception as e:
                         logger.error(f"Erro ao enviar prévia: {e}")
-                    finally:
-                        # Limpar arquivo de prévia
-                        if os.path.exists(caminho_previa):
-                            os.remove(caminho_previa)
                 else:
                     logger.warning(
                         f"Não foi possível gerar a prévia (Status: {status_corte}). Ignorando etapa de prévia."
                     )
-
-                # --- ENCAMINHAR VÍDEO PAGO PARA O GRUPO ---
-                if msg_id_canal:
-                    logger.info("Encaminhando vídeo pago do Canal para o Grupo...")
-                    try:
-                        client.forward_messages(
-                            entity=entidade_grupo,
-                            messages=msg_id_canal,
-                            from_peer=entidade_canal,
-                        )
-                        logger.info(
-                            "✅ Vídeo pago encaminhado para o GRUPO com sucesso!"
-                        )
-                    except Exception as e:
-                        logger.error(f"Erro ao encaminhar mensagem: {e}")
-                else:
-                    logger.error(
-                        "Não foi possível identificar o ID da mensagem no canal para encaminhar."
-                    )
-
+            finally:
+                # Não deixa o corte órfão se o upload falhar (a prévia fica no armazém)
+                await asyncio.wait([tarefa_previa])
+                if not tarefa_previa.cancelled() and not tarefa_previa.exception():
+                    _, caminho_previa, _ = tarefa_previa.result()
+                    if caminho_previa:
+                        previas.soltar(caminho_previa)
+
+            # --- ENCAMINHAR VÍDEO PAGO PARA O GRUPO ---
+            if msg_id_canal:
+                try:
+                    await encaminhar_ao_grupo_async(client, msg_id_canal, nome_arquivo)
+                except Exception as e:
+                    logger.error(f"Erro ao encaminhar mensagem: {e}")
             else:
-                # Fluxo normal (GRATUITO)
-                logger.info(f"Iniciando upload do vídeo (Gratuito): {nome_arquivo}")
-                logger.info(
-                    "Isso pode levar alguns minutos dependendo do tamanho do arquivo..."
+                logger.error(
+                    "Não foi possível identificar o ID da mensagem no canal para encaminhar."
                 )
 
-                # Faz o upload do vídeo
-                mensagem_enviada = client.send_file(
+        else:
+            # Fluxo normal (GRATUITO)
+            metadados = await asyncio.to_thread(analisar_video, caminho_video)
+            await enviar_gratuito_ao_grupo_async(
+                client, caminho_video, metadados, mensagem_caption
+            )
+
+        return True
+
+    except ValueError:
+        logger.error(f"ERRO: Não foi possível encontrar o grupo '{NOME_DO_GRUPO}'.")
+        logger.error(
+            "Verifique se o nome está escrito exatamente igual ao do Telegram."
+        )
+        return False
+    except Exception as e:
+        logger.error(f"Ocorreu um erro inesperado: {e}")
+        return False
+
+
+def subir_video_para_telegram(caminho_video, mensagem_caption=""):
+    """Versão síncrona de subir_video_para_telegram_async()."""
+    return executar(subir_video_para_telegram_async(caminho_video, mensagem_caption))
+
+
+async def subir_videos_para_telegram_async(caminhos_videos, concorrencia=UPLOAD_CONCORRENCIA):
+    """Envia os vídeos com no máximo 'concorrencia' uploads ao mesmo tempo."""
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    async def enviar(caminho_video):
+        async with semaforo:
+            return await subir_video_para_telegram_async(caminho_video)
+
+    return await asyncio.gather(*(enviar(caminho) for caminho in caminhos_videos))
+
+
+def subir_videos_para_telegram(caminhos_videos, concorrencia=UPLOAD_CONCORRENCIA):
+    """
+    Envia vários vídeos para o Telegram em paralelo, no mesmo cliente compartilhado.
+
+    Cada vídeo passa pelas mesmas etapas de subir_video_para_telegram_async(); como
+    elas rodam como corrotinas, o corte de uma prévia, o upload de outro vídeo e o
+    envio de mensagens se sobrepõem. Um FloodWait só pausa a requisição afetada.
+
+    :return: Lista com o resultado (True/False) de cada vídeo, na mesma ordem.
+    """
+    if not caminhos_videos:
+        return []
+
+    logger.info(
+        f"Enviando {len(caminhos_videos)} vídeo(s) com até {concorrencia} upload(s) simultâneo(s)."
+    )
+    return executar(subir_videos_para_telegram_async(caminhos_videos, concorrencia))
+
+
+async def subir_stream_para_telegram_async(stream, mensagem_caption=""):
+    """
+    Envia para o grupo um vídeo GRATUITO lido direto de um stream (ex.: DriveStream),
+    sem passar pelo disco: os blocos do stream alimentam o upload em partes do Telethon.
+
+    Conteúdo pago não é suportado aqui, pois o corte da prévia precisa do arquivo local.
+
+    :param stream: Objeto com read(n), 'name' (nome do arquivo), 'size' (bytes) e
+                   'md5' (md5 do conteúdo, ou None).
+    :return: True se foi bem-sucedido, False caso contrário.
+    """
+    if not all([API_ID, API_HASH]):
+        logger.error("API_ID ou API_HASH do Telegram não encontrados no arquivo .env.")
+        return False
+
+    if re.match(r"^paid_(\d+)_", stream.name):
+        logger.error(
+            f"'{stream.name}' é conteúdo pago e precisa do arquivo local para gerar a prévia."
+        )
+        return False
+
+    tamanho_mb = stream.size / (1024 * 1024)
+    logger.info(f"Tamanho do arquivo: {tamanho_mb:.2f} MB")
+
+    if tamanho_mb > 2000:  # 2GB
+        logger.error("Arquivo muito grande. O Telegram tem limite de 2GB para uploads.")
+        return False
+
+    client = await obter_cliente_async()
+
+    try:
+        await resolver_peer_async(NOME_DO_GRUPO, client)
+        logger.info(f"Grupo '{NOME_DO_GRUPO}' encontrado com sucesso.")
+
+        logger.info(f"Iniciando upload em streaming do vídeo (Gratuito): {stream.name}")
+        # O conteúdo é identificado pelo md5 informado pelo Drive
+        chave_video = f"md5:{stream.md5}" if stream.md5 else None
+
+        async def enviar_stream(midia):
+            return await com_peers(
+                client,
+                (NOME_DO_GRUPO,),
+                lambda entidade_grupo: client.send_file(
                     entity=entidade_grupo,
-                    file=caminho_video,
+                    file=midia,
                     caption=mensagem_caption if mensagem_caption else None,
                     supports_streaming=True,
-                )
+                ),
+                f"envio {stream.name}",
+            )
 
-                logger.info("✅ Vídeo enviado com sucesso!")
-                logger.info(f"ID da mensagem: {mensagem_enviada.id}")
-                logger.info(f"Data de envio: {mensagem_enviada.date}")
+        # O stream não pode ser relido, então o upload não é refeito após FloodWait
+        mensagem_enviada = await _enviar_com_cache(
+            client,
+            chave_video,
+            stream,
+            enviar_stream,
+            file_size=stream.size,
+            file_name=stream.name,
+        )
+        _obter_cache_uploads().salvar_mensagem(chave_video, mensagem_enviada)
 
-            return True
+        logger.info("✅ Vídeo enviado com sucesso!")
+        logger.info(f"ID da mensagem: {mensagem_enviada.id}")
+        return True
 
-        except ValueError:
-            logger.error(f"ERRO: Não foi possível encontrar o grupo '{NOME_DO_GRUPO}'.")
-            logger.error(
-                "Verifique se o nome está escrito exatamente igual ao do Telegram."
-            )
-            return False
-        except Exception as e:
-            logger.error(f"Ocorreu um erro inesperado: {e}")
-            return False
+    except ValueError:
+        logger.error(f"ERRO: Não foi possível encontrar o grupo '{NOME_DO_GRUPO}'.")
+        return False
+    except Exception as e:
+        logger.error(f"Ocorreu um erro inesperado: {e}")
+        return False
+    finally:
+        stream.close()
 
 
 def subir_video_para_drive(source_folder, drive_remote, drive_folder):
@@ -0,0 +1,223 @@
+import asyncio
+import atexit
+import json
+import os
+
+from telethon import errors, types, utils
+from telethon.sync import TelegramClient
+
+from app.config import obter_config
+from app.utils.gravacao import gravar_json_atomico
+from app.utils.logger import ColorLogger
+from app.utils.metricas import obter_metricas
+
+config = obter_config()
+logger = ColorLogger()
+
+# Lendo as credenciais do Telegram do arquivo .env
+API_ID = config.telegram_api_id
+API_HASH = config.telegram_api_hash
+
+# Caminho absoluto para o arquivo de sessão do Telegram
+SESSION_FILE = "app/sessions/sessao_telegram.session"
+
+# Quantas vezes uma mesma requisição é refeita após um FloodWait
+FLOODWAIT_TENTATIVAS = 3
+
+# Cache persistente dos peers já resolvidos (id + access_hash) por nome/username
+PEERS_CACHE_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "sessions",
+    "peers_cache.json",
+)
+
+# Erros de um peer cujo access_hash salvo não vale mais (ou que mudou de id)
+ERROS_PEER_INVALIDO = (
+    errors.ChannelInvalidError,
+    errors.ChannelPrivateError,
+    errors.PeerIdInvalidError,
+)
+
+_cliente = None
+_peers = None
+
+
+def obter_cliente():
+    """
+    Retorna o TelegramClient compartilhado pelo processo inteiro.
+
+    A conexão (e o handshake) acontece só na primeira chamada; as rotinas seguintes
+    reaproveitam o mesmo cliente. Ele é desconectado automaticamente no fim do processo.
+    Dentro de uma corrotina, use obter_cliente_async().
+    """
+    global _cliente
+
+    if _cliente is None:
+        cliente = TelegramClient(SESSION_FILE, API_ID, API_HASH)
+        cliente.start()
+        _cliente = cliente
+        atexit.register(fechar_cliente)
+        logger.info("Conectado ao Telegram com sucesso!")
+
+    return _cliente
+
+
+async def obter_cliente_async():
+    """Versão assíncrona de obter_cliente(), para uso dentro do loop de eventos."""
+    global _cliente
+
+    if _cliente is None:
+        cliente = TelegramClient(SESSION_FILE, API_ID, API_HASH)
+        await cliente.start()
+        _cliente = cliente
+        atexit.register(fechar_cliente)
+        logger.info("Conectado ao Telegram com sucesso!")
+
+    return _cliente
+
+
+def executar(corrotina):
+    """
+    Executa uma corrotina no loop de eventos do cliente compartilhado.
+
+    O TelegramClient fica preso ao loop em que foi criado, por isso as rotinas
+    síncronas usam esta função em vez de asyncio.run().
+    """
+    return obter_cliente().loop.run_until_complete(corrotina)
+
+
+async def com_floodwait(fabrica, descricao, etapa="telegram_envio"):
+    """
+    Executa fabrica() (que retorna uma corrotina) refazendo a chamada após FloodWait.
+
+    A espera é um asyncio.sleep, então só a requisição afetada fica parada; os
+    demais uploads em andamento no mesmo loop continuam normalmente. Cada nova
+    tentativa é contada nas métricas da 'etapa'.
+    """
+    for tentativa in range(1, FLOODWAIT_TENTATIVAS + 1):
+        try:
+            return await fabrica()
+        except errors.FloodWaitError as e:
+            if tentativa == FLOODWAIT_TENTATIVAS:
+                raise
+            obter_metricas().registrar_tentativa(etapa)
+            logger.warning(
+                f"FloodWait de {e.seconds}s em '{descricao}' (tentativa {tentativa}). Aguardando..."
+            )
+            await asyncio.sleep(e.seconds + 1)
+
+
+def fechar_cliente():
+    """Desconecta o cliente compartilhado, se estiver conectado."""
+    global _cliente
+
+    if _cliente is not None:
+        _cliente.disconnect()
+        _cliente = None
+
+
+def _carregar_peers():
+    """Carrega o cache de peers do disco (uma vez por processo)."""
+    global _peers
+
+    if _peers is None:
+        try:
+            with open(PEERS_CACHE_FILE, "r") as f:
+                _peers = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            _peers = {}
+
+    return _peers
+
+
+def _salvar_peers():
+    """Grava o cache de peers no disco de forma atômica."""
+    gravar_json_atomico(PEERS_CACHE_FILE, _carregar_peers())
+
+
+def _montar_input_peer(dados):
+    """Reconstrói o InputPeer a partir dos dados salvos no cache."""
+    if dados["tipo"] == "channel":
+        return types.InputPeerChannel(dados["id"], dados["access_hash"])
+    if dados["tipo"] == "chat":
+        return types.InputPeerChat(dados["id"])
+    return types.InputPeerUser(dados["id"], dados["access_hash"])
+
+
+async def resolver_peer_async(nome, cliente):
+    """
+    Resolve um grupo/canal/usuário pelo nome, consultando o cache antes da API.
+
+    O get_entity por username é uma das chamadas mais sujeitas a FloodWait; aqui ele
+    só é feito na primeira vez que um nome aparece, e o resultado (id + access_hash)
+    fica salvo em PEERS_CACHE_FILE para as próximas execuções.
+
+    :raises ValueError: Se o nome não puder ser resolvido pelo Telegram.
+    """
+    peers = _carregar_peers()
+    if nome in peers:
+        return _montar_input_peer(peers[nome])
+
+    entidade = await com_floodwait(lambda: cliente.get_entity(nome), f"resolver {nome}")
+    input_peer = utils.get_input_peer(entidade)
+
+    if isinstance(input_peer, types.InputPeerChannel):
+        dados = {
+            "tipo": "channel",
+            "id": input_peer.channel_id,
+            "access_hash": input_peer.access_hash,
+        }
+    elif isinstance(input_peer, types.InputPeerChat):
+        dados = {"tipo": "chat", "id": input_peer.chat_id}
+    else:
+        dados = {
+            "tipo": "user",
+            "id": input_peer.user_id,
+            "access_hash": input_peer.access_hash,
+        }
+
+    peers[nome] = dados
+    _salvar_peers()
+    logger.info(f"Peer '{nome}' resolvido e salvo no cache.")
+    return input_peer
+
+
+def resolver_peer(nome, cliente=None):
+    """Versão síncrona de resolver_peer_async()."""
+    peers = _carregar_peers()
+    if nome in peers:
+        return _montar_input_peer(peers[nome])
+
+    return executar(resolver_peer_async(nome, cliente or obter_cliente()))
+
+
+def invalidar_peer(nome):
+    """Remove um nome do cache de peers (ex.: access_hash não é mais válido)."""
+    if _carregar_peers().pop(nome, None) is not None:
+        _salvar_peers()
+
+
+async def com_peers(cliente, nomes, fabrica, descricao, etapa="telegram_envio"):
+    """
+    Resolve os peers 'nomes' e executa fabrica(*peers) com com_floodwait().
+
+    Se o Telegram recusar um peer vindo do cache (ERROS_PEER_INVALIDO), os nomes do
+    cache são invalidados, resolvidos de novo pela API e a chamada é refeita uma vez.
+
+    :raises ValueError: Se um nome não puder ser resolvido pelo Telegram.
+    """
+    do_cache = [nome for nome in nomes if nome in _carregar_peers()]
+    peers = [await resolver_peer_async(nome, cliente) for nome in nomes]
+    try:
+        return await com_floodwait(lambda: fabrica(*peers), descricao, etapa)
+    except ERROS_PEER_INVALIDO as e:
+        if not do_cache:
+            raise
+        logger.warning(
+            f"Peer salvo recusado pelo Telegram em '{descricao}' ({type(e).__name__}). Resolvendo de novo..."
+        )
+        for nome in do_cache:
+            invalidar_peer(nome)
+
+    peers = [await resolver_peer_async(nome, cliente) for nome in nomes]
+    return await com_floodwait(lambda: fabrica(*peers), descricao, etapa)
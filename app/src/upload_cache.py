@@ -0,0 +1,164 @@
+import json
+import os
+import time
+
+from telethon import errors, types, utils
+
+from app.utils.gravacao import gravar_json_atomico
+from app.utils.logger import ColorLogger
+
+logger = ColorLogger()
+
+# Arquivo onde os handles de upload ficam salvos entre execuções
+UPLOAD_CACHE_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "banco_dados",
+    "upload_cache.json",
+)
+
+# Por quanto tempo as partes enviadas (InputFile) são consideradas válidas no servidor.
+# O Telegram não documenta o prazo exato; o valor é conservador.
+VALIDADE_INPUT_FILE = 6 * 60 * 60
+
+# Erros que indicam que um handle salvo não vale mais e o arquivo deve ser reenviado
+# (FileReferenceExpired antes tenta renovar a referência pela mensagem de origem)
+ERROS_HANDLE_EXPIRADO = (
+    errors.FileReferenceExpiredError,
+    errors.FilePartMissingError,
+    errors.FilePartsInvalidError,
+    errors.MediaEmptyError,
+)
+
+
+def documento_da_mensagem(mensagem):
+    """Extrai o Document de uma mensagem (mídia normal ou mídia paga), se houver."""
+    media = getattr(mensagem, "media", None)
+
+    if isinstance(media, types.MessageMediaPaidMedia):
+        for extendida in media.extended_media:
+            if isinstance(extendida, types.MessageExtendedMedia) and isinstance(
+                extendida.media, types.MessageMediaDocument
+            ):
+                return extendida.media.document
+        return None
+
+    if isinstance(media, types.MessageMediaDocument):
+        return media.document
+    return None
+
+
+class UploadCache:
+    """
+    Cache dos handles de upload do Telegram, indexado pelo hash do conteúdo.
+
+    Guarda dois tipos de referência por arquivo:
+    - 'documento': o Document já enviado (id + access_hash + file_reference), que
+      pode ser reenviado para qualquer chat sem subir os bytes de novo. O chat e o id
+      da mensagem que o contém ficam junto ('origem'): quando o file_reference
+      expira, a mensagem é buscada de novo para renová-lo, sem reenviar o arquivo;
+    - 'input_file': as partes já enviadas (InputFile/InputFileBig), úteis quando o
+      upload terminou mas o envio da mensagem falhou. Expiram após VALIDADE_INPUT_FILE.
+    """
+
+    def __init__(self, caminho=UPLOAD_CACHE_FILE):
+        self.caminho = caminho
+        try:
+            with open(self.caminho, "r") as f:
+                self.entradas = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.entradas = {}
+
+    def _salvar(self):
+        """Grava o cache no disco de forma atômica."""
+        gravar_json_atomico(self.caminho, self.entradas)
+
+    def obter(self, chave):
+        """
+        Retorna o melhor handle salvo para a chave.
+
+        Returns:
+            InputDocument, InputFile/InputFileBig ainda válido, ou None.
+        """
+        entrada = self.entradas.get(chave)
+        if not entrada:
+            return None
+
+        documento = entrada.get("documento")
+        if documento:
+            logger.info(f"Reaproveitando documento já enviado ao Telegram ({chave[:12]}...).")
+            return types.InputDocument(
+                id=documento["id"],
+                access_hash=documento["access_hash"],
+                file_reference=bytes.fromhex(documento["file_reference"]),
+            )
+
+        input_file = entrada.get("input_file")
+        if input_file and input_file["expira_em"] > time.time():
+            logger.info(f"Reaproveitando partes já enviadas ao Telegram ({chave[:12]}...).")
+            if input_file["md5"] is None:
+                return types.InputFileBig(
+                    input_file["id"], input_file["parts"], input_file["name"]
+                )
+            return types.InputFile(
+                input_file["id"],
+                input_file["parts"],
+                input_file["name"],
+                input_file["md5"],
+            )
+
+        return None
+
+    def salvar_input_file(self, chave, input_file):
+        """Salva as partes enviadas de um arquivo, com a data de expiração."""
+        self.entradas.setdefault(chave, {})["input_file"] = {
+            "id": input_file.id,
+            "parts": input_file.parts,
+            "name": input_file.name,
+            "md5": getattr(input_file, "md5_checksum", None),
+            "expira_em": time.time() + VALIDADE_INPUT_FILE,
+        }
+        self._salvar()
+
+    def salvar_documento(self, chave, documento, origem=None):
+        """
+        Salva o Document resultante de um envio (ignorado sem chave ou documento).
+
+        :param origem: (chat, msg_id) da mensagem com o documento, usada para renovar
+            o file_reference (veja origem()).
+        """
+        if not chave or documento is None:
+            return
+
+        self.entradas[chave] = {
+            "documento": {
+                "id": documento.id,
+                "access_hash": documento.access_hash,
+                "file_reference": documento.file_reference.hex(),
+            }
+        }
+        if origem is not None:
+            self.entradas[chave]["origem"] = {"chat": origem[0], "msg_id": origem[1]}
+        self._salvar()
+
+    def salvar_mensagem(self, chave, mensagem):
+        """Salva o Document de uma mensagem enviada, com o chat e o id dela."""
+        if mensagem is None:
+            return
+        self.salvar_documento(
+            chave,
+            documento_da_mensagem(mensagem),
+            (utils.get_peer_id(mensagem.peer_id), mensagem.id),
+        )
+
+    def origem(self, chave):
+        """(chat, msg_id) da mensagem que contém o documento salvo, ou None."""
+        entrada = self.entradas.get(chave) or {}
+        if not entrada.get("documento") or not entrada.get("origem"):
+            return None
+        return entrada["origem"]["chat"], entrada["origem"]["msg_id"]
+
+    def invalidar(self, chave):
+        """Remove os handles de uma chave (ex.: o Telegram recusou a referência)."""
+        if self.entradas.pop(chave, None) is not None:
+            logger.warning(f"Handle de upload expirado descartado ({chave[:12]}...).")
+            self._salvar()
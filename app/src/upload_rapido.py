@@ -0,0 +1,162 @@
+import asyncio
+import os
+import time
+
+from telethon import errors, helpers
+from telethon.network import MTProtoSender
+from telethon.tl.functions.upload import SaveBigFilePartRequest
+from telethon.tl.types import InputFileBig
+
+from app.config import obter_config
+from app.utils.logger import ColorLogger
+from app.utils.metricas import obter_metricas
+
+config = obter_config()
+logger = ColorLogger()
+
+# Quantas conexões (senders MTProto) enviam partes ao mesmo tempo
+UPLOAD_WORKERS = config.telegram_upload_workers
+# Tamanho de cada parte em KB (o Telegram exige divisor de 512 e múltiplo de 1)
+UPLOAD_PART_KB = config.telegram_upload_part_kb
+# Arquivos até este tamanho usam o upload normal do Telethon (SaveFilePart + md5)
+LIMITE_ARQUIVO_PEQUENO = 10 * 1024 * 1024
+PARTE_TENTATIVAS = 3
+
+
+async def _criar_sender(client):
+    """
+    Abre uma nova conexão MTProto com o DC da sessão, reaproveitando a chave de
+    autorização. As partes de um upload sempre vão para o DC da própria conta.
+    """
+    dc_id = client.session.dc_id
+    dc = await client._get_dc(dc_id)
+    sender = MTProtoSender(client.session.auth_key, loggers=client._log)
+    await sender.connect(
+        client._connection(
+            dc.ip_address, dc.port, dc.id, loggers=client._log, proxy=client._proxy
+        )
+    )
+    return sender
+
+
+async def _enviar_partes(sender, fila, file_id, total_partes):
+    """Worker: envia as partes da fila por um sender, refazendo as que falharem."""
+    while True:
+        item = await fila.get()
+        if item is None:
+            return
+
+        indice, dados = item
+        tentativa = 0
+        # A parte só sai da fila enviada ou com erro: uma parte perdida invalidaria o arquivo
+        while True:
+            try:
+                await sender.send(
+                    SaveBigFilePartRequest(file_id, indice, total_partes, dados)
+                )
+                break
+            except errors.FloodWaitError as e:
+                # FloodWait não é falha da parte: espera e reenvia sem gastar tentativas
+                obter_metricas().registrar_tentativa("telegram_upload")
+                logger.warning(f"FloodWait de {e.seconds}s na parte {indice}. Aguardando...")
+                await asyncio.sleep(e.seconds + 1)
+            except Exception as e:
+                tentativa += 1
+                if tentativa == PARTE_TENTATIVAS:
+                    raise
+                obter_metricas().registrar_tentativa("telegram_upload")
+                logger.warning(
+                    f"Falha ao enviar a parte {indice} (tentativa {tentativa}): {e}"
+                )
+
+
+async def upload_rapido(
+    client,
+    arquivo,
+    file_size=None,
+    file_name=None,
+    workers=UPLOAD_WORKERS,
+    part_size_kb=UPLOAD_PART_KB,
+):
+    """
+    Faz o upload de um arquivo grande enviando as partes em paralelo por várias conexões.
+
+    O upload padrão do Telethon envia uma parte por vez numa única conexão; aqui
+    'workers' senders MTProto consomem uma fila de partes lidas sequencialmente do
+    arquivo (ou de um stream com read(n), como o DriveStream). Funciona tanto para o
+    fluxo pago (InputMediaUploadedDocument) quanto para o gratuito (send_file).
+
+    :param arquivo: Caminho do arquivo ou objeto com read(n).
+    :param file_size: Tamanho em bytes (obrigatório para streams).
+    :param file_name: Nome do arquivo no Telegram (padrão: nome do caminho/stream).
+    :return: InputFileBig (ou o InputFile do upload normal, para arquivos pequenos).
+    """
+    if isinstance(arquivo, str):
+        file_size = os.path.getsize(arquivo)
+        file_name = file_name or os.path.basename(arquivo)
+    else:
+        file_name = file_name or getattr(arquivo, "name", "video.mp4")
+
+    if workers <= 1 or file_size <= LIMITE_ARQUIVO_PEQUENO:
+        return await client.upload_file(
+            arquivo, file_size=file_size, file_name=file_name
+        )
+
+    if part_size_kb < 1 or 512 % part_size_kb != 0:
+        logger.warning(
+            f"TELEGRAM_UPLOAD_PART_KB={part_size_kb} inválido (precisa dividir 512). Usando 512 KB."
+        )
+        part_size_kb = 512
+
+    part_size = part_size_kb * 1024
+    total_partes = (file_size + part_size - 1) // part_size
+    file_id = helpers.generate_random_long()
+
+    senders = await asyncio.gather(
+        *(_criar_sender(client) for _ in range(workers))
+    )
+    fila = asyncio.Queue(maxsize=workers * 2)
+    inicio = time.monotonic()
+
+    leitor = open(arquivo, "rb") if isinstance(arquivo, str) else arquivo
+    tarefas = [
+        asyncio.create_task(_enviar_partes(sender, fila, file_id, total_partes))
+        for sender in senders
+    ]
+
+    async def enfileirar(item):
+        # A fila cheia segura a leitura; se um worker falhar, a falha sobe aqui
+        while True:
+            falhas = [t for t in tarefas if t.done() and t.exception()]
+            if falhas:
+                raise falhas[0].exception()
+            try:
+                return await asyncio.wait_for(fila.put(item), timeout=1)
+            except asyncio.TimeoutError:
+                continue
+
+    try:
+        for indice in range(total_partes):
+            dados = await asyncio.to_thread(leitor.read, part_size)
+            await enfileirar((indice, dados))
+
+        for _ in tarefas:
+            await enfileirar(None)
+        await asyncio.gather(*tarefas)
+    finally:
+        for tarefa in tarefas:
+            tarefa.cancel()
+        if isinstance(arquivo, str):
+            leitor.close()
+        await asyncio.gather(
+            *(sender.disconnect() for sender in senders), return_exceptions=True
+        )
+
+    duracao = time.monotonic() - inicio
+    tamanho_mb = file_size / (1024 * 1024)
+    logger.info(
+        f"Upload rápido de '{file_name}': {tamanho_mb:.1f} MB em {duracao:.1f}s "
+        f"({tamanho_mb / max(duracao, 0.001):.2f} MB/s, {workers} conexões, partes de {part_size_kb} KB)."
+    )
+
+    return InputFileBig(file_id, total_partes, file_name)
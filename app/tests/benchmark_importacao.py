@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark do tempo de inicialização (imports) dos módulos da aplicação.
+
+Executa cada módulo num interpretador novo com `python -X importtime` e mostra o
+tempo total do import e os módulos mais lentos. Serve para conferir que comandos
+curtos (ex.: verificação de sessão) não pagam o import dos clientes pesados.
+
+Uso (a partir da raiz do repositório):
+    python app/tests/benchmark_importacao.py
+    python app/tests/benchmark_importacao.py app.main --top 15 --limite-ms 300
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+RAIZ_REPOSITORIO = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+MODULOS_PADRAO = [
+    "app.config",
+    "app.main",
+    "app.src.cache_maneger",
+    "app.src.drive_maneger",
+    "app.src.telegram_client",
+    "app.src.X_poster",
+    "app.src.pipeline",
+]
+
+
+def medir_importacao(modulo):
+    """
+    Importa 'modulo' num processo novo com -X importtime.
+
+    Returns:
+        tuple: (total_ms, lista de (modulo, nivel, cumulativo_ms)) ou (None, erro) se falhar.
+    """
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ_REPOSITORIO,
+        capture_output=True,
+        text=True,
+    )
+    if resultado.returncode != 0:
+        return None, resultado.stderr.strip().splitlines()[-1:]
+
+    tempos = []
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, cumulativo, nome = linha[len("import time:"):].split("|")
+        # A indentação do nome indica o nível: 0 = importado diretamente pelo módulo
+        nome = nome[1:].rstrip()
+        nivel = (len(nome) - len(nome.lstrip())) // 2
+        tempos.append((nome.strip(), nivel, int(cumulativo) / 1000))
+
+    total = sum(ms for _, nivel, ms in tempos if nivel == 0)
+    return total, tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("modulos", nargs="*", default=MODULOS_PADRAO)
+    parser.add_argument("--top", type=int, default=10, help="Módulos mais lentos exibidos")
+    parser.add_argument(
+        "--limite-ms",
+        type=float,
+        default=None,
+        help="Falha (código 1) se algum módulo passar deste tempo",
+    )
+    args = parser.parse_args()
+
+    falhou = False
+    for modulo in args.modulos:
+        total, tempos = medir_importacao(modulo)
+        if total is None:
+            print(f"❌ {modulo}: erro no import ({' '.join(tempos)})")
+            falhou = True
+            continue
+
+        marca = "✅"
+        if args.limite_ms is not None and total > args.limite_ms:
+            marca = "⚠️ "
+            falhou = True
+        print(f"{marca} {modulo}: {total:.1f} ms")
+
+        # Módulos de até dois níveis (o cumulativo já inclui os submódulos)
+        lentos = sorted(
+            ((nome, ms) for nome, nivel, ms in tempos if nivel <= 1),
+            key=lambda item: item[1],
+            reverse=True,
+        )[: args.top]
+        for nome, ms in lentos:
+            print(f"      {ms:8.1f} ms  {nome}")
+
+    return 1 if falhou else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline do pipeline (Drive -> Telegram -> X) com serviços falsos locais.
+
+Executa as rotinas reais rotina_baixar_drive, rotina_upload e rotina_postagem sobre
+vídeos sintéticos (gerados com ffmpeg), trocando só as pontas de rede:
+- Drive: servidor HTTP local com Range (DRIVE_DOWNLOAD_URL) e listagem falsa;
+- Telegram: cliente Telethon falso que consome os bytes enviados;
+- X: adaptador do requests na sessão do PublicadorX (upload em partes + tweet);
+- Redis: fakeredis (ou um Redis local com --redis-host).
+
+A aplicação é copiada para uma pasta temporária antes de rodar, então índices,
+caches e vídeos do benchmark nunca tocam os arquivos de banco_dados do repositório.
+O upload para o Telegram usa uma conexão só (TELEGRAM_UPLOAD_WORKERS=1), pois o
+upload em várias conexões abre senders MTProto de verdade.
+
+Requer ffmpeg/ffprobe no PATH e, sem --redis-host, o pacote fakeredis
+(pip install fakeredis), que não faz parte das dependências da aplicação.
+
+Ao final mostra latência e vazão por etapa e compara com a baseline salva
+(app/tests/baselines/benchmark_pipeline.json); uma regressão acima da tolerância
+encerra com código 1.
+
+A baseline do repositório foi gerada com as bandas fixas abaixo (o limite vale por
+conexão: o Drive falso baixa as faixas em paralelo, então a vazão total passa dele),
+3 vídeos de 330s a 2 Mbit/s e 1s de processamento no X. Compare sempre com os mesmos
+limites; os parâmetros usados ficam gravados na baseline e uma diferença é avisada.
+    --drive-mb-s 20 --telegram-mb-s 5 --x-mb-s 5
+
+Uso (a partir da raiz do repositório):
+    python app/tests/benchmark_pipeline.py --drive-mb-s 20 --telegram-mb-s 5 --x-mb-s 5
+    python app/tests/benchmark_pipeline.py --videos 5 --drive-mb-s 20 --telegram-mb-s 5
+    python app/tests/benchmark_pipeline.py --drive-mb-s 20 --telegram-mb-s 5 --x-mb-s 5 --salvar-baseline
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from servicos_falsos import (
+    AdaptadorXFalso,
+    ClienteTelegramFalso,
+    ServicoDriveFalso,
+    ServidorDriveFalso,
+    metadados_drive,
+)
+
+RAIZ_REPOSITORIO = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+BASELINE_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baselines", "benchmark_pipeline.json"
+)
+
+# Pastas da aplicação que não são copiadas (estado local, credenciais e testes)
+IGNORAR_NA_COPIA = shutil.ignore_patterns(
+    "__pycache__",
+    "tests",
+    "banco_dados",
+    "videos_brutos",
+    "videos_processados",
+    "sessions",
+    "oauth",
+    ".env",
+)
+
+ETAPAS = ("drive", "telegram", "postagem_x")
+
+# Argumentos que mudam o resultado; são gravados com a baseline
+PARAMETROS_BASELINE = (
+    "videos",
+    "duracao",
+    "mbps_video",
+    "pago",
+    "drive_mb_s",
+    "telegram_mb_s",
+    "x_mb_s",
+    "x_processamento",
+)
+
+
+def gerar_video(caminho, duracao, mbps, indice):
+    """Gera um vídeo H.264/AAC sintético com taxa constante (tamanho previsível)."""
+    taxa = f"{int(mbps * 1000)}k"
+    subprocess.run(
+        [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "lavfi", "-i", f"testsrc2=size=640x360:rate=15:duration={duracao}",
+            # Um tom diferente por vídeo, para que cada arquivo tenha outro md5
+            "-f", "lavfi", "-i", f"sine=frequency={220 + 20 * indice}:duration={duracao}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-g", "30",
+            "-b:v", taxa, "-minrate", taxa, "-maxrate", taxa, "-bufsize", taxa,
+            "-x264-params", "nal-hrd=cbr",
+            "-c:a", "aac", "-b:a", "64k",
+            "-movflags", "+faststart",
+            caminho,
+        ],
+        check=True,
+    )
+
+
+def preparar_ambiente(args, url_download):
+    """Variáveis de ambiente lidas pela aplicação (antes do primeiro import)."""
+    os.environ.update(
+        {
+            "API_KEY": "benchmark",
+            "API_KEY_SECRET": "benchmark",
+            "ACCESS_TOKEN": "benchmark",
+            "ACCESS_TOKEN_SECRET": "benchmark",
+            "TELEGRAM_API_ID": "1",
+            "TELEGRAM_API_HASH": "benchmark",
+            "TELEGRAM_UPLOAD_WORKERS": "1",
+            "NOME_GRUPO_TELEGRAM": "grupo_benchmark",
+            "NOME_CANAL_TELEGRAM": "canal_benchmark",
+            "LINK_CANAL": "https://t.me/canal_benchmark",
+            "LINK_GRUPO": "https://t.me/grupo_benchmark",
+            "DRIVE_REMOTE": "benchmark",
+            "DRIVE_FOLDER": "benchmark",
+            "FOLDER_ID": "pasta_benchmark",
+            "DRIVE_DOWNLOAD_URL": url_download,
+            "REDIS_HOST": args.redis_host or "localhost",
+            "REDIS_PORT": str(args.redis_port),
+            "REDIS_DB": "0",
+            "REDIS_USER": args.redis_usuario,
+            "REDIS_PASSWORD": args.redis_senha,
+            "MODO_PIPELINE": "false",
+            "PREFETCH_VIDEOS": "0",
+            "SELETOR_DRIVE": "",
+            "STREAMING_UPLOAD": "false",
+        }
+    )
+
+
+def instalar_falsos(args, servico_drive):
+    """Liga a aplicação (já no sys.path) aos serviços falsos."""
+    from google.auth.credentials import AnonymousCredentials
+
+    import app.src.cache_maneger as cache_maneger
+    import app.src.drive_maneger as drive_maneger
+    import app.src.telegram_client as telegram_client
+    import app.src.X_poster as X_poster
+
+    if not args.redis_host:
+        import fakeredis
+
+        servidor_redis = fakeredis.FakeServer()
+        cache_maneger.redis.Redis = functools.partial(
+            fakeredis.FakeRedis, server=servidor_redis
+        )
+
+    def autenticar(self):
+        self.creds = AnonymousCredentials()
+        return servico_drive
+
+    drive_maneger.DriveManeger.authenticate_google_drive = autenticar
+
+    cliente = ClienteTelegramFalso(asyncio.new_event_loop(), args.telegram_mb_s)
+    telegram_client._cliente = cliente
+
+    adaptador = AdaptadorXFalso(args.x_mb_s, args.x_processamento)
+    X_poster.obter_publicador().sessao.mount("https://", adaptador)
+
+    return cliente, adaptador
+
+
+def medir(funcao, contador):
+    """Executa funcao() e retorna (segundos, MB transferidos segundo o contador)."""
+    antes = contador()
+    inicio = time.perf_counter()
+    funcao()
+    return time.perf_counter() - inicio, (contador() - antes) / (1024 * 1024)
+
+
+def resumir(medidas):
+    """Latência (mediana e média) e vazão de cada etapa."""
+    resumo = {}
+    for etapa, valores in medidas.items():
+        if not valores:
+            continue
+        latencias = [segundos for segundos, _ in valores]
+        total_mb = sum(mb for _, mb in valores)
+        resumo[etapa] = {
+            "latencia_mediana_s": round(statistics.median(latencias), 3),
+            "latencia_media_s": round(statistics.mean(latencias), 3),
+            "mb": round(total_mb, 2),
+            "mb_s": round(total_mb / max(sum(latencias), 0.001), 2),
+        }
+    return resumo
+
+
+def comparar(resumo, baseline, tolerancia):
+    """Lista as regressões em relação à baseline (latência maior ou vazão menor)."""
+    regressoes = []
+    for etapa, atual in resumo.items():
+        base = baseline.get(etapa)
+        if not base:
+            continue
+        if atual["latencia_mediana_s"] > base["latencia_mediana_s"] * (1 + tolerancia):
+            regressoes.append(
+                f"{etapa}: latência {atual['latencia_mediana_s']:.2f}s "
+                f"(baseline {base['latencia_mediana_s']:.2f}s)"
+            )
+        if base["mb_s"] and atual["mb_s"] < base["mb_s"] * (1 - tolerancia):
+            regressoes.append(
+                f"{etapa}: vazão {atual['mb_s']:.2f} MB/s (baseline {base['mb_s']:.2f} MB/s)"
+            )
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--videos", type=int, default=3, help="Vídeos processados")
+    parser.add_argument("--duracao", type=int, default=330, help="Duração de cada vídeo (s)")
+    parser.add_argument("--mbps-video", type=float, default=2.0, help="Taxa dos vídeos (Mbit/s)")
+    parser.add_argument("--pago", action="store_true", help="Usa o fluxo de vídeos pagos")
+    parser.add_argument("--drive-mb-s", type=float, default=None, help="Banda do Drive falso")
+    parser.add_argument("--telegram-mb-s", type=float, default=None, help="Banda do Telegram falso")
+    parser.add_argument("--x-mb-s", type=float, default=None, help="Banda do X falso")
+    parser.add_argument("--x-processamento", type=float, default=1, help="Processamento no X (s)")
+    parser.add_argument("--redis-host", default=None, help="Redis local (padrão: fakeredis)")
+    parser.add_argument("--redis-port", type=int, default=6379)
+    parser.add_argument("--redis-usuario", default="default")
+    parser.add_argument("--redis-senha", default="benchmark")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Regressão aceita (fração)")
+    parser.add_argument("--salvar-baseline", action="store_true", help="Grava o resultado como baseline")
+    parser.add_argument("--manter", action="store_true", help="Não apaga a pasta temporária")
+    args = parser.parse_args()
+
+    if shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None:
+        print("❌ ffmpeg/ffprobe não encontrados no PATH.")
+        return 1
+
+    pasta = tempfile.mkdtemp(prefix="benchmark_pipeline_")
+    servidor = None
+    try:
+        shutil.copytree(
+            os.path.join(RAIZ_REPOSITORIO, "app"),
+            os.path.join(pasta, "app"),
+            ignore=IGNORAR_NA_COPIA,
+        )
+
+        print(f"Gerando {args.videos} vídeo(s) sintético(s) de {args.duracao}s...")
+        pasta_drive = os.path.join(pasta, "drive")
+        os.makedirs(pasta_drive)
+        prefixo = "paid_10_" if args.pago else ""
+        arquivos, videos = {}, []
+        for indice in range(args.videos):
+            caminho = os.path.join(pasta_drive, f"{prefixo}benchmark_{indice:03d}.mp4")
+            gerar_video(caminho, args.duracao, args.mbps_video, indice)
+            file_id = f"arquivo{indice:03d}"
+            arquivos[file_id] = caminho
+            videos.append(metadados_drive(caminho, args.duracao, file_id))
+
+        servidor = ServidorDriveFalso(arquivos, args.drive_mb_s).iniciar()
+        preparar_ambiente(args, servidor.url_download)
+
+        # A partir daqui, 'app' é a cópia temporária (caminhos relativos também)
+        os.chdir(pasta)
+        sys.path.insert(0, pasta)
+        cliente, adaptador = instalar_falsos(args, ServicoDriveFalso(videos))
+        import app.main as aplicacao
+
+        medidas = {etapa: [] for etapa in ETAPAS}
+        for indice in range(args.videos):
+            print(f"--- Vídeo {indice + 1}/{args.videos} ---")
+            medidas["drive"].append(
+                medir(
+                    lambda: aplicacao.rotina_baixar_drive(paid=args.pago),
+                    lambda: servidor.banda.bytes,
+                )
+            )
+            medidas["telegram"].append(
+                medir(aplicacao.rotina_upload, lambda: cliente.banda.bytes)
+            )
+            medidas["postagem_x"].append(
+                medir(aplicacao.rotina_postagem, lambda: adaptador.banda.bytes)
+            )
+    finally:
+        if servidor is not None:
+            servidor.parar()
+        os.chdir(RAIZ_REPOSITORIO)
+        if args.manter:
+            print(f"Pasta temporária mantida em {pasta}")
+        else:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    resumo = resumir(medidas)
+    print("\nEtapa          latência (mediana/média)      MB    MB/s")
+    for etapa, valores in resumo.items():
+        print(
+            f"{etapa:<14} {valores['latencia_mediana_s']:8.2f}s / {valores['latencia_media_s']:6.2f}s"
+            f"  {valores['mb']:8.1f}  {valores['mb_s']:6.2f}"
+        )
+
+    parametros = {nome: getattr(args, nome) for nome in PARAMETROS_BASELINE}
+    if args.salvar_baseline:
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        with open(BASELINE_FILE, "w") as f:
+            json.dump({"parametros": parametros, **resumo}, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline salva em {BASELINE_FILE}")
+        return 0
+
+    if not os.path.exists(BASELINE_FILE):
+        print("\nSem baseline salva; use --salvar-baseline para criar uma.")
+        return 0
+
+    with open(BASELINE_FILE, "r") as f:
+        baseline = json.load(f)
+    diferentes = {
+        nome: valor
+        for nome, valor in baseline.get("parametros", {}).items()
+        if parametros.get(nome) != valor
+    }
+    if diferentes:
+        print(f"\n⚠️  A baseline foi gerada com outros parâmetros: {diferentes}")
+
+    regressoes = comparar(resumo, baseline, args.tolerancia)
+    if regressoes:
+        print(f"\n⚠️  Regressões acima de {args.tolerancia:.0%}:")
+        for regressao in regressoes:
+            print(f"   - {regressao}")
+        return 1
+
+    print("\n✅ Nenhuma regressão em relação à baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
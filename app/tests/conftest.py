@@ -0,0 +1,30 @@
+"""
+Configuração comum dos testes (pytest, a partir da raiz do repositório):
+    python -m pytest app/tests
+
+Os módulos da aplicação leem a configuração no import, então as variáveis
+obrigatórias recebem valores fictícios antes de qualquer import de 'app'. Os testes
+não acessam rede (Drive, Telegram, X, Redis) e gravam só em pastas temporárias.
+"""
+
+import os
+
+# Scripts manuais que acessam serviços reais; não são testes do pytest
+collect_ignore = ["test_telegram_session.py"]
+
+for nome, valor in {
+    "API_KEY": "teste",
+    "API_KEY_SECRET": "teste",
+    "ACCESS_TOKEN": "teste",
+    "ACCESS_TOKEN_SECRET": "teste",
+    "TELEGRAM_API_ID": "1",
+    "TELEGRAM_API_HASH": "teste",
+    "NOME_GRUPO_TELEGRAM": "grupo_teste",
+    "NOME_CANAL_TELEGRAM": "canal_teste",
+    "LINK_CANAL": "https://t.me/canal_teste",
+    "LINK_GRUPO": "https://t.me/grupo_teste",
+    "DRIVE_REMOTE": "teste",
+    "DRIVE_FOLDER": "teste",
+    "FOLDER_ID": "pasta_teste",
+}.items():
+    os.environ.setdefault(nome, valor)
@@ -0,0 +1,375 @@
+"""
+Serviços falsos (locais) usados pelo benchmark do pipeline.
+
+Substituem o Google Drive, o Telegram e o X sem acesso à rede, mas mantendo o
+caminho real do código da aplicação:
+- ServidorDriveFalso: servidor HTTP local que entrega os vídeos sintéticos com
+  suporte a Range (o download em faixas paralelas roda de verdade);
+- ServicoDriveFalso: o objeto 'service' da API do Drive (files().list, changes());
+- ClienteTelegramFalso: cliente Telethon que consome os bytes enviados (sink);
+- AdaptadorXFalso: adaptador do requests montado na sessão do PublicadorX, que
+  responde ao upload em partes (INIT/APPEND/FINALIZE/STATUS) e à criação do tweet.
+
+Todos contam os bytes recebidos e aceitam um limite de banda (MB/s) para simular
+o link de produção.
+"""
+
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import BaseAdapter
+from telethon import functions, types
+
+
+class _Banda:
+    """
+    Limita a vazão total (MB/s) do servidor falso; None = sem limite.
+
+    A banda é uma só para todas as conexões (como um link real): consumir() reserva
+    a próxima janela livre do link e devolve quanto o chamador deve esperar, então
+    N conexões em paralelo dividem os mesmos MB/s em vez de somá-los.
+    """
+
+    def __init__(self, mb_s=None):
+        self.mb_s = mb_s
+        self.bytes = 0
+        self._proximo_livre = 0.0
+        self._trava = threading.Lock()
+
+    def consumir(self, quantidade):
+        with self._trava:
+            self.bytes += quantidade
+            if not self.mb_s:
+                return 0
+            agora = time.monotonic()
+            inicio = max(agora, self._proximo_livre)
+            self._proximo_livre = inicio + quantidade / (self.mb_s * 1024 * 1024)
+            return self._proximo_livre - agora
+
+
+# --- Google Drive ---
+
+
+def metadados_drive(caminho, duracao_segundos, file_id):
+    """Metadados de um vídeo no formato devolvido por files().list."""
+    md5 = hashlib.md5()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(8 * 1024 * 1024), b""):
+            md5.update(bloco)
+    return {
+        "id": file_id,
+        "name": os.path.basename(caminho),
+        "size": str(os.path.getsize(caminho)),
+        "md5Checksum": md5.hexdigest(),
+        "modifiedTime": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "videoMediaMetadata": {"durationMillis": str(int(duracao_segundos * 1000))},
+    }
+
+
+class ServidorDriveFalso:
+    """Servidor HTTP local que serve os arquivos em /files/<id>, com Range (206)."""
+
+    def __init__(self, arquivos, mb_s=None):
+        self.arquivos = arquivos  # id -> caminho
+        self.banda = _Banda(mb_s)
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                file_id = urlparse(self.path).path.rsplit("/", 1)[-1]
+                caminho = servidor.arquivos.get(file_id)
+                if caminho is None:
+                    self.send_error(404)
+                    return
+
+                tamanho = os.path.getsize(caminho)
+                inicio, fim = 0, tamanho - 1
+                faixa = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+                if faixa:
+                    inicio = int(faixa.group(1))
+                    fim = min(int(faixa.group(2) or fim), tamanho - 1)
+
+                self.send_response(206 if faixa else 200)
+                self.send_header("Content-Length", str(fim - inicio + 1))
+                if faixa:
+                    self.send_header("Content-Range", f"bytes {inicio}-{fim}/{tamanho}")
+                self.end_headers()
+
+                with open(caminho, "rb") as f:
+                    f.seek(inicio)
+                    restante = fim - inicio + 1
+                    while restante > 0:
+                        bloco = f.read(min(restante, 1024 * 1024))
+                        self.wfile.write(bloco)
+                        restante -= len(bloco)
+                        time.sleep(servidor.banda.consumir(len(bloco)))
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url_download(self):
+        """Valor de DRIVE_DOWNLOAD_URL apontando para este servidor."""
+        host, porta = self.httpd.server_address
+        return f"http://{host}:{porta}/files/{{file_id}}?alt=media"
+
+    def iniciar(self):
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _Requisicao:
+    def __init__(self, resultado):
+        self._resultado = resultado
+
+    def execute(self):
+        return self._resultado
+
+
+class _ArquivosFalsos:
+    def __init__(self, servico):
+        self.servico = servico
+
+    def list(self, pageSize=1000, pageToken=None, **kwargs):
+        self.servico.chamadas += 1
+        inicio = int(pageToken or 0)
+        pagina = self.servico.videos[inicio : inicio + pageSize]
+        resultado = {"files": [dict(video) for video in pagina]}
+        if inicio + pageSize < len(self.servico.videos):
+            resultado["nextPageToken"] = str(inicio + pageSize)
+        return _Requisicao(resultado)
+
+
+class _AlteracoesFalsas:
+    def __init__(self, servico):
+        self.servico = servico
+
+    def getStartPageToken(self):
+        return _Requisicao({"startPageToken": "1"})
+
+    def list(self, pageToken=None, **kwargs):
+        self.servico.chamadas += 1
+        return _Requisicao({"changes": [], "newStartPageToken": pageToken})
+
+
+class ServicoDriveFalso:
+    """Imita o 'service' do googleapiclient para a listagem da pasta."""
+
+    def __init__(self, videos):
+        self.videos = videos
+        self.chamadas = 0
+
+    def files(self):
+        return _ArquivosFalsos(self)
+
+    def changes(self):
+        return _AlteracoesFalsas(self)
+
+
+# --- Telegram ---
+
+
+class ClienteTelegramFalso:
+    """
+    Cliente Telethon falso: aceita os uploads e envios usados pela aplicação e só
+    contabiliza os bytes (sink). Os objetos devolvidos são tipos reais do Telethon.
+    """
+
+    TAMANHO_PARTE = 512 * 1024
+
+    def __init__(self, loop, mb_s=None):
+        self.loop = loop
+        self.banda = _Banda(mb_s)
+        self.session = type("Sessao", (), {"dc_id": 2})()
+        self._ids = itertools.count(1)
+
+    async def get_entity(self, nome):
+        return types.InputPeerChannel(channel_id=abs(hash(nome)) % 10**9, access_hash=1)
+
+    async def get_me(self):
+        return types.User(id=1, first_name="Benchmark", username="benchmark")
+
+    def disconnect(self):
+        pass
+
+    async def upload_file(self, arquivo, file_size=None, file_name=None, **kwargs):
+        leitor = open(arquivo, "rb") if isinstance(arquivo, str) else arquivo
+        partes = 0
+        try:
+            while True:
+                dados = await asyncio.to_thread(leitor.read, self.TAMANHO_PARTE)
+                if not dados:
+                    break
+                partes += 1
+                await asyncio.sleep(self.banda.consumir(len(dados)))
+        finally:
+            if isinstance(arquivo, str):
+                leitor.close()
+        nome = file_name or os.path.basename(getattr(leitor, "name", "video.mp4"))
+        return types.InputFileBig(id=next(self._ids), parts=partes, name=nome)
+
+    def _mensagem(self, texto="", mime_type="video/mp4", tamanho=0):
+        documento = types.Document(
+            id=next(self._ids),
+            access_hash=1,
+            file_reference=b"benchmark",
+            date=datetime.now(),
+            mime_type=mime_type or "video/mp4",
+            size=tamanho,
+            dc_id=2,
+            attributes=[],
+        )
+        return types.Message(
+            id=next(self._ids),
+            peer_id=types.PeerChannel(1),
+            date=datetime.now(),
+            message=texto or "",
+            media=types.MessageMediaDocument(document=documento),
+        )
+
+    async def send_file(self, entity, file, caption=None, mime_type=None, thumb=None, **kwargs):
+        tamanho = 0
+        if isinstance(file, str) or hasattr(file, "read"):
+            file = await self.upload_file(file)
+        if thumb:
+            await self.upload_file(thumb)
+        if isinstance(file, types.InputFileBig):
+            tamanho = file.parts * self.TAMANHO_PARTE
+        return self._mensagem(caption, mime_type, tamanho)
+
+    async def forward_messages(self, entity, messages, from_peer=None, **kwargs):
+        return [self._mensagem()]
+
+    async def __call__(self, requisicao):
+        if isinstance(requisicao, functions.messages.SendMediaRequest):
+            return types.Updates(
+                updates=[
+                    types.UpdateNewChannelMessage(
+                        message=self._mensagem(requisicao.message), pts=0, pts_count=0
+                    )
+                ],
+                users=[],
+                chats=[],
+                date=datetime.now(),
+                seq=0,
+            )
+        return None
+
+
+# --- X ---
+
+
+class AdaptadorXFalso(BaseAdapter):
+    """
+    Adaptador do requests que responde como o X: upload em partes (v1.1) e criação
+    de tweets (v2). O processamento do vídeo leva 'processamento_s' segundos, o que
+    exercita a espera com check_after_secs.
+    """
+
+    def __init__(self, mb_s=None, processamento_s=1):
+        super().__init__()
+        self.banda = _Banda(mb_s)
+        self.processamento_s = processamento_s
+        self._ids = itertools.count(1000)
+        self._finalizados = {}
+
+    def _corpo(self, requisicao):
+        """Campos do corpo (form-urlencoded ou multipart) e bytes de mídia enviados."""
+        corpo = requisicao.body or b""
+        if isinstance(corpo, str):
+            corpo = corpo.encode()
+        tipo = requisicao.headers.get("Content-Type", "")
+        if tipo.startswith("multipart/form-data"):
+            mensagem = BytesParser().parsebytes(
+                f"Content-Type: {tipo}\r\n\r\n".encode() + corpo
+            )
+            campos, midia = {}, 0
+            for parte in mensagem.get_payload():
+                nome = parte.get_param("name", header="content-disposition")
+                conteudo = parte.get_payload(decode=True) or b""
+                if nome == "media":
+                    midia += len(conteudo)
+                else:
+                    campos[nome] = conteudo.decode()
+            return campos, midia
+        return {chave: valor[0] for chave, valor in parse_qs(corpo.decode()).items()}, 0
+
+    def _resposta(self, requisicao, codigo, dados=None):
+        resposta = requests.Response()
+        resposta.status_code = codigo
+        resposta._content = json.dumps(dados).encode() if dados is not None else b""
+        resposta.headers["Content-Type"] = "application/json"
+        resposta.headers["x-rate-limit-limit"] = "1000"
+        resposta.headers["x-rate-limit-remaining"] = "999"
+        resposta.headers["x-rate-limit-reset"] = str(int(time.time()) + 900)
+        resposta.url = requisicao.url
+        resposta.request = requisicao
+        resposta.encoding = "utf-8"
+        return resposta
+
+    def _estado(self, media_id):
+        pronto_em = self._finalizados.get(media_id, 0)
+        restante = pronto_em - time.time()
+        if restante > 0:
+            return {"state": "in_progress", "check_after_secs": max(1, int(restante))}
+        return {"state": "succeeded", "progress_percent": 100}
+
+    def send(self, request, **kwargs):
+        url = urlparse(request.url)
+        if url.path.endswith("/2/tweets"):
+            return self._resposta(request, 201, {"data": {"id": str(next(self._ids)), "text": ""}})
+
+        if not url.path.endswith("/media/upload.json"):
+            return self._resposta(request, 404, {"errors": [{"message": "não simulado"}]})
+
+        campos = {chave: valor[0] for chave, valor in parse_qs(url.query).items()}
+        corpo, midia = self._corpo(request)
+        campos.update(corpo)
+        comando = campos.get("command")
+        media_id = campos.get("media_id")
+
+        if comando == "INIT":
+            novo = str(next(self._ids))
+            return self._resposta(
+                request,
+                202,
+                {"media_id": int(novo), "media_id_string": novo, "expires_after_secs": 86400},
+            )
+        if comando == "APPEND":
+            time.sleep(self.banda.consumir(midia))
+            return self._resposta(request, 204)
+        if comando == "FINALIZE":
+            self._finalizados[media_id] = time.time() + self.processamento_s
+        if comando in ("FINALIZE", "STATUS"):
+            return self._resposta(
+                request,
+                200,
+                {
+                    "media_id": int(media_id),
+                    "media_id_string": media_id,
+                    "processing_info": self._estado(media_id),
+                },
+            )
+        return self._resposta(request, 400, {"errors": [{"message": f"comando {comando}"}]})
+
+    def close(self):
+        pass
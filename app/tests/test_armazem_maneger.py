@@ -0,0 +1,120 @@
+import hashlib
+import os
+
+import pytest
+
+from app.src.armazem_maneger import BAIXADO, BAIXANDO, ENVIADO, ArmazemManeger
+
+
+@pytest.fixture
+def armazem(tmp_path):
+    return ArmazemManeger(
+        pasta=str(tmp_path / "videos"),
+        index_path=str(tmp_path / "videos.json"),
+        limite_bytes=1000,
+    )
+
+
+def _video(armazem, nome, tamanho, estado, ultimo_uso):
+    """Cria um vídeo completo (ou um .part, se BAIXANDO) já registrado no armazém."""
+    os.makedirs(armazem.pasta, exist_ok=True)
+    caminho = os.path.join(armazem.pasta, nome)
+    with open(f"{caminho}.part" if estado == BAIXANDO else caminho, "wb") as f:
+        f.write(b"\0" * tamanho)
+    armazem.entradas[nome] = {"tamanho": tamanho, "estado": estado, "ultimo_uso": ultimo_uso}
+    return caminho
+
+
+def _presentes(armazem):
+    return set(armazem.entradas) - {"novo.mp4"}
+
+
+def test_remove_enviados_depois_parados(armazem):
+    _video(armazem, "parado.mp4", 200, BAIXANDO, 2)
+    _video(armazem, "enviado_recente.mp4", 200, ENVIADO, 4)
+    _video(armazem, "enviado_antigo.mp4", 200, ENVIADO, 3)
+    _video(armazem, "baixado.mp4", 200, BAIXADO, 1)
+
+    esperados = [
+        "enviado_antigo.mp4",
+        "enviado_recente.mp4",
+        "parado.mp4",
+        "baixado.mp4",
+    ]
+    for tamanho, removidos in ((400, 1), (600, 2), (800, 3)):
+        armazem.entradas.pop("novo.mp4", None)
+        armazem._em_uso.discard("novo.mp4")
+        assert armazem.reservar("novo.mp4", tamanho)
+        assert _presentes(armazem) == set(esperados[removidos:])
+        for nome in esperados[:removidos]:
+            assert not os.path.exists(os.path.join(armazem.pasta, nome))
+
+
+def test_nao_enviados_nunca_sao_removidos(armazem):
+    _video(armazem, "enviado.mp4", 200, ENVIADO, 3)
+    _video(armazem, "baixado.mp4", 600, BAIXADO, 1)
+
+    assert not armazem.tem_espaco("novo.mp4", 600)
+    assert not armazem.reservar("novo.mp4", 600)
+    # Nada é apagado à toa quando o vídeo não caberia
+    assert set(armazem.entradas) == {"enviado.mp4", "baixado.mp4"}
+
+    assert armazem.tem_espaco("novo.mp4", 400)
+    assert armazem.reservar("novo.mp4", 400)
+    assert set(armazem.entradas) == {"baixado.mp4", "novo.mp4"}
+
+
+def test_nao_remove_nada_se_o_video_nao_cabe(armazem):
+    _video(armazem, "enviado.mp4", 500, ENVIADO, 1)
+    assert not armazem.reservar("enorme.mp4", 2000)
+    assert set(armazem.entradas) == {"enviado.mp4"}
+
+
+def test_videos_em_uso_e_fixados_nao_sao_removidos(armazem):
+    fixado = _video(armazem, "fixado.mp4", 400, ENVIADO, 1)
+    _video(armazem, "outro.mp4", 400, ENVIADO, 2)
+    armazem.fixar(fixado)
+    assert armazem.reservar("em_uso.mp4", 200)
+
+    # Só 'outro' pode sair: o fixado e o download em andamento ficam
+    assert armazem.reservar("novo.mp4", 400)
+    assert set(armazem.entradas) == {"fixado.mp4", "em_uso.mp4", "novo.mp4"}
+    assert not armazem.reservar("mais_um.mp4", 400)
+
+    armazem.soltar(fixado)
+    assert armazem.reservar("mais_um.mp4", 400)
+    assert "fixado.mp4" not in armazem.entradas
+
+
+def test_fixar_acumula(armazem):
+    caminho = _video(armazem, "video.mp4", 800, ENVIADO, 1)
+    armazem.fixar(caminho)
+    armazem.fixar(caminho)
+    armazem.soltar(caminho)
+    assert not armazem.reservar("novo.mp4", 400)
+    armazem.soltar(caminho)
+    assert armazem.reservar("novo.mp4", 400)
+
+
+def test_listar_do_mais_antigo_ao_mais_recente(armazem):
+    _video(armazem, "b.mp4", 10, BAIXADO, 2)
+    _video(armazem, "a.mp4", 10, BAIXADO, 1)
+    _video(armazem, "c.mp4", 10, ENVIADO, 0)
+    assert [os.path.basename(caminho) for caminho in armazem.listar(BAIXADO)] == [
+        "a.mp4",
+        "b.mp4",
+    ]
+
+
+def test_sincroniza_arquivos_de_fora_e_md5(armazem):
+    os.makedirs(armazem.pasta)
+    caminho = os.path.join(armazem.pasta, "externo.mp4")
+    with open(caminho, "wb") as f:
+        f.write(b"conteudo")
+
+    assert armazem.usado() == len(b"conteudo")
+    assert armazem.entradas["externo.mp4"]["estado"] == BAIXADO
+    md5 = hashlib.md5(b"conteudo").hexdigest()
+    assert armazem.md5(caminho) == md5
+    # Calculado uma vez e guardado no índice
+    assert ArmazemManeger(armazem.pasta, armazem.index_path).entradas["externo.mp4"]["md5"] == md5
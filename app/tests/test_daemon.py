@@ -0,0 +1,35 @@
+from datetime import datetime
+
+import pytest
+
+from app.daemon import ler_agenda, proximo_horario
+
+
+def test_ler_agenda():
+    assert ler_agenda("18:50=paid, 02:00=free,") == [(18, 50, True), (2, 0, False)]
+    assert ler_agenda("") == []
+
+
+@pytest.mark.parametrize("agenda", ["18:50=pago", "18:50", "1850=paid", "aa:bb=free"])
+def test_ler_agenda_invalida(agenda):
+    with pytest.raises(ValueError):
+        ler_agenda(agenda)
+
+
+def test_proximo_horario():
+    horarios = ler_agenda("18:50=paid,02:00=free")
+
+    assert proximo_horario(horarios, datetime(2025, 3, 10, 12, 0)) == (
+        datetime(2025, 3, 10, 18, 50),
+        True,
+    )
+    # Já passou de todos os horários do dia: o primeiro de amanhã
+    assert proximo_horario(horarios, datetime(2025, 3, 10, 23, 0)) == (
+        datetime(2025, 3, 11, 2, 0),
+        False,
+    )
+    # Exatamente no horário: a execução de agora já foi disparada
+    assert proximo_horario(horarios, datetime(2025, 3, 10, 18, 50)) == (
+        datetime(2025, 3, 11, 2, 0),
+        False,
+    )
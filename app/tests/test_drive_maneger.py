@@ -0,0 +1,108 @@
+import pytest
+
+from app.src.drive_maneger import DriveManeger
+
+
+class _Requisicao:
+    def __init__(self, resultado):
+        self.resultado = resultado
+
+    def execute(self):
+        return self.resultado
+
+
+class ServicoFalso:
+    """files().list paginado e changes() com as alterações informadas."""
+
+    def __init__(self, paginas, alteracoes=()):
+        self.paginas = paginas
+        self.alteracoes = list(alteracoes)
+        self.listagens = 0
+
+    def files(self):
+        servico = self
+
+        class Arquivos:
+            def list(self, pageToken=None, **kwargs):
+                servico.listagens += 1
+                indice = int(pageToken or 0)
+                resultado = {"files": servico.paginas[indice]}
+                if indice + 1 < len(servico.paginas):
+                    resultado["nextPageToken"] = str(indice + 1)
+                return _Requisicao(resultado)
+
+        return Arquivos()
+
+    def changes(self):
+        servico = self
+
+        class Alteracoes:
+            def getStartPageToken(self):
+                return _Requisicao({"startPageToken": "t0"})
+
+            def list(self, pageToken=None, **kwargs):
+                return _Requisicao(
+                    {"changes": servico.alteracoes, "newStartPageToken": f"{pageToken}+"}
+                )
+
+        return Alteracoes()
+
+
+@pytest.fixture
+def driver(tmp_path):
+    driver = DriveManeger()
+    driver.folder_id = "pasta"
+    driver.index_path = str(tmp_path / "drive_index.json")
+    return driver
+
+
+def _ids(videos):
+    return [video["id"] for video in videos]
+
+
+def test_primeira_listagem_cria_o_indice(driver):
+    servico = ServicoFalso([[{"id": "a", "name": "a.mp4"}], [{"id": "b", "name": "b.mp4"}]])
+    assert _ids(driver.find_videos_in_folder(servico)) == ["a", "b"]
+    assert servico.listagens == 2
+    assert driver._load_index()["page_token"] == "t0"
+
+
+def test_listagem_interrompida_nao_salva_o_indice(driver):
+    servico = ServicoFalso([[{"id": "a", "name": "a.mp4"}], [{"id": "b", "name": "b.mp4"}]])
+    paginas = driver.iter_video_pages(servico)
+    next(paginas)
+    paginas.close()
+    assert driver._load_index() is None
+
+
+def test_execucoes_seguintes_usam_o_feed_de_alteracoes(driver):
+    driver.find_videos_in_folder(ServicoFalso([[{"id": "a", "name": "a.mp4"}]]))
+
+    novo = {
+        "id": "c",
+        "name": "c.mp4",
+        "mimeType": "video/mp4",
+        "parents": ["pasta"],
+        "trashed": False,
+    }
+    servico = ServicoFalso(
+        [],
+        alteracoes=[
+            {"fileId": "a", "removed": True},
+            {"fileId": "c", "file": novo},
+            {"fileId": "d", "file": {**novo, "id": "d", "parents": ["outra"]}},
+        ],
+    )
+    assert _ids(driver.find_videos_in_folder(servico)) == ["c"]
+    assert servico.listagens == 0
+    assert driver._load_index()["page_token"] == "t0+"
+    # Só os campos do índice são guardados
+    assert driver._load_index()["files"]["c"] == {"id": "c", "name": "c.mp4"}
+
+
+def test_indice_de_outra_pasta_e_ignorado(driver):
+    driver.find_videos_in_folder(ServicoFalso([[{"id": "a", "name": "a.mp4"}]]))
+    driver.folder_id = "outra"
+    servico = ServicoFalso([[{"id": "z", "name": "z.mp4"}]])
+    assert _ids(driver.find_videos_in_folder(servico)) == ["z"]
+    assert servico.listagens == 1
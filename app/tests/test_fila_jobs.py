@@ -0,0 +1,166 @@
+import time
+
+import pytest
+
+from app.src.fila_jobs import (
+    CONCLUIDO,
+    ETAPAS,
+    EXECUTANDO,
+    FALHOU,
+    IGNORADO,
+    PENDENTE,
+    TENTATIVAS_POR_ETAPA,
+    FilaJobs,
+    proxima_etapa,
+)
+
+
+@pytest.fixture
+def fila(tmp_path):
+    return FilaJobs(str(tmp_path / "fila.db"))
+
+
+def _estado(fila, job_id):
+    linha = fila.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return dict(linha)
+
+
+def test_proxima_etapa():
+    assert proxima_etapa("listado") == "baixado"
+    assert proxima_etapa(ETAPAS[-1]) is None
+
+
+def test_adicionar_ignora_video_repetido(fila):
+    assert fila.adicionar({"id": "a", "name": "a.mp4"}, {"video": 1})
+    assert not fila.adicionar({"id": "a", "name": "a.mp4"})
+    assert fila.ids() == {"a"}
+
+
+def test_job_percorre_todas_as_etapas(fila):
+    fila.adicionar({"id": "a", "name": "a.mp4"})
+
+    for anterior, etapa in zip(ETAPAS, ETAPAS[1:]):
+        job = fila.reservar(anterior)
+        assert job is not None and job["estado"] == PENDENTE
+        assert _estado(fila, "a")["estado"] == EXECUTANDO
+        job["dados"][etapa] = True
+        fila.avancar(job, etapa)
+
+    final = _estado(fila, "a")
+    assert final["etapa"] == ETAPAS[-1]
+    assert final["estado"] == CONCLUIDO
+    assert fila.ativos() == 0
+
+
+def test_reservar_nao_entrega_o_mesmo_job_duas_vezes(fila):
+    fila.adicionar({"id": "a", "name": "a.mp4"})
+    assert fila.reservar("listado")["id"] == "a"
+    assert fila.reservar("listado") is None
+
+
+def test_falha_espera_e_depois_desiste(fila):
+    fila.adicionar({"id": "a", "name": "a.mp4"})
+
+    for tentativa in range(1, TENTATIVAS_POR_ETAPA):
+        job = fila.reservar("listado")
+        fila.falhar(job, "erro")
+        estado = _estado(fila, "a")
+        assert estado["estado"] == PENDENTE
+        assert estado["tentativas"] == tentativa
+        assert estado["proxima_tentativa_em"] > time.time()
+        # Aguardando a espera: não está pronto nem pode ser reservado
+        assert fila.prontos() == 0
+        assert fila.ativos() == 1
+        assert fila.reservar("listado") is None
+        assert fila.prontos(agora=estado["proxima_tentativa_em"]) == 1
+        fila.conn.execute("UPDATE jobs SET proxima_tentativa_em = 0")
+
+    fila.falhar(fila.reservar("listado"), "erro final")
+    assert _estado(fila, "a")["estado"] == FALHOU
+    assert [job["id"] for job in fila.falhas()] == ["a"]
+    assert fila.ativos() == 0
+
+
+def test_retentar_devolve_falhas_para_a_fila(fila):
+    for nome in ("a", "b"):
+        fila.adicionar({"id": nome, "name": f"{nome}.mp4"})
+        job = fila.reservar("listado")
+        fila.avancar(job, "baixado")
+    fila.conn.execute("UPDATE jobs SET estado = ?, tentativas = 3", (FALHOU,))
+
+    assert fila.retentar("a") == 1
+    estado = _estado(fila, "a")
+    assert (estado["estado"], estado["tentativas"], estado["etapa"]) == (PENDENTE, 0, "baixado")
+    assert [job["id"] for job in fila.falhas()] == ["b"]
+    assert fila.retentar() == 1
+    assert fila.falhas() == []
+
+
+def test_recuperar_devolve_jobs_interrompidos(tmp_path):
+    caminho = str(tmp_path / "fila.db")
+    fila = FilaJobs(caminho)
+    fila.adicionar({"id": "a", "name": "a.mp4"})
+    fila.reservar("listado")
+
+    # Novo processo depois de uma queda no meio da etapa
+    fila = FilaJobs(caminho)
+    assert fila.reservar("listado") is None
+    fila.recuperar()
+    assert fila.reservar("listado")["id"] == "a"
+
+
+def test_salvar_dados_e_ignorar(fila):
+    fila.adicionar({"id": "a", "name": "a.mp4"})
+    job = fila.reservar("listado")
+    job["dados"]["msg_id_canal"] = 42
+    fila.salvar_dados(job)
+    assert _estado(fila, "a")["estado"] == EXECUTANDO
+
+    fila.ignorar(job, "curto demais")
+    estado = _estado(fila, "a")
+    assert estado["estado"] == IGNORADO
+    assert '"msg_id_canal": 42' in estado["dados"]
+
+
+def test_adiar_nao_gasta_tentativas(fila):
+    fila.adicionar({"id": "a", "name": "a.mp4"})
+    quando = time.time() + 900
+    fila.adiar(fila.reservar("listado"), quando, "limite do X")
+
+    estado = _estado(fila, "a")
+    assert (estado["estado"], estado["tentativas"]) == (PENDENTE, 0)
+    assert estado["proxima_tentativa_em"] == quando
+    assert fila.reservar("listado") is None
+
+
+def test_falha_definitiva_nao_volta_sozinha(fila):
+    fila.adicionar({"id": "a", "name": "a.mp4"})
+    fila.falhar(fila.reservar("listado"), "id da mensagem ausente", definitiva=True)
+    assert _estado(fila, "a")["estado"] == FALHOU
+
+
+def test_postar_x_com_limite_esgotado_adia_o_job(fila, monkeypatch):
+    import asyncio
+
+    from app.src import pipeline
+
+    reset = time.time() + 900
+
+    class PublicadorLimitado:
+        def proxima_postagem_permitida(self):
+            return reset
+
+        async def postar_video_async(self, caminho, texto):
+            raise AssertionError("não deveria postar com o limite esgotado")
+
+    monkeypatch.setattr(pipeline, "obter_publicador", PublicadorLimitado)
+    etapas = object.__new__(pipeline.Pipeline)
+    etapas.fila = fila
+
+    fila.adicionar({"id": "a", "name": "a.mp4"}, {"caminho": "a.mp4"})
+    job = fila.reservar("listado")
+    assert asyncio.run(etapas._postar_x(job)) is False
+
+    estado = _estado(fila, "a")
+    assert (estado["estado"], estado["tentativas"]) == (PENDENTE, 0)
+    assert estado["proxima_tentativa_em"] == reset
@@ -0,0 +1,55 @@
+import pytest
+
+from app.utils.metricas import Metricas
+
+
+def test_span_soma_duracao_bytes_e_erros():
+    metricas = Metricas()
+    with metricas.span("drive_download", bytes=1024 * 1024, tipo="free"):
+        pass
+    with pytest.raises(RuntimeError):
+        with metricas.span("drive_download", tipo="free"):
+            raise RuntimeError("falhou")
+    with metricas.span("drive_download", tipo="free") as span:
+        span.erro = "sem espaço"
+    metricas.registrar_tentativa("drive_download", 2, tipo="free")
+
+    (etapa,) = metricas.resumo()["etapas"]
+    assert etapa["etapa"] == "drive_download" and etapa["tipo"] == "free"
+    assert (etapa["contagem"], etapa["erros"], etapa["tentativas"]) == (3, 2, 2)
+    assert etapa["mb"] == 1.0
+
+
+def test_prometheus():
+    metricas = Metricas()
+    with metricas.span("ffmpeg_corte", quadros=300, modo='co"pia'):
+        pass
+
+    texto = metricas.prometheus()
+    assert "# TYPE pipeline_etapa_duracao_segundos summary" in texto
+    assert 'pipeline_etapa_duracao_segundos_count{etapa="ffmpeg_corte",modo="co\\"pia"} 1' in texto
+    assert 'pipeline_etapa_erros_total{etapa="ffmpeg_corte",modo="co\\"pia"} 0' in texto
+    assert texto.endswith("\n")
+    for linha in texto.splitlines():
+        assert linha.startswith("#") or len(linha.rsplit(" ", 1)) == 2
+
+
+def test_nova_execucao_zera_so_o_resumo():
+    metricas = Metricas()
+    with metricas.span("telegram_upload"):
+        pass
+    metricas.nova_execucao()
+
+    assert metricas.resumo()["etapas"] == []
+    assert 'pipeline_etapa_duracao_segundos_count{etapa="telegram_upload"} 1' in metricas.prometheus()
+
+
+def test_exportar(tmp_path):
+    metricas = Metricas()
+    with metricas.span("x_postagem"):
+        pass
+    prometheus, resumo = tmp_path / "m.prom", tmp_path / "sub" / "resumo.json"
+
+    assert metricas.exportar(str(prometheus), str(resumo))["etapas"][0]["etapa"] == "x_postagem"
+    assert prometheus.read_text().startswith("# HELP")
+    assert sorted(path.name for path in tmp_path.rglob("*")) == ["m.prom", "resumo.json", "sub"]
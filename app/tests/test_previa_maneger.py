@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+from app.src import previa_maneger
+from app.src.previa_maneger import PreviaManeger
+
+
+@pytest.fixture
+def previas(tmp_path, monkeypatch):
+    def cortar_falso(entrada, saida, inicio, duracao, caminho_thumbnail=None, modo_corte=None):
+        with open(saida, "wb") as f:
+            f.write(b"\0" * 400)
+        return "SUCESSO", inicio, duracao
+
+    monkeypatch.setattr(previa_maneger, "cortar_video", cortar_falso)
+    monkeypatch.setattr(
+        PreviaManeger, "chave", staticmethod(lambda caminho, inicio, duracao, modo: os.path.basename(caminho))
+    )
+    return PreviaManeger(
+        pasta=str(tmp_path / "previas"),
+        index_path=str(tmp_path / "previas.json"),
+        limite_bytes=1000,
+    )
+
+
+def test_previa_fixada_nao_e_removida(previas):
+    _, caminho_a, _ = previas.obter("a.mp4", fixar=True)
+    previas.obter("b.mp4")
+    previas.obter("c.mp4")
+
+    # 'a' é a menos usada, mas está fixada: sai 'b' no lugar dela
+    assert os.path.exists(caminho_a)
+    assert set(previas.entradas) == {"a.mp4", "c.mp4"}
+
+    previas.soltar(caminho_a)
+    previas.obter("d.mp4")
+    assert not os.path.exists(caminho_a)
+    assert set(previas.entradas) == {"c.mp4", "d.mp4"}
+
+
+def test_fixacoes_se_acumulam(previas):
+    _, caminho_a, _ = previas.obter("a.mp4", fixar=True)
+    previas.obter("a.mp4", fixar=True)
+    previas.soltar(caminho_a)
+    previas.obter("b.mp4")
+    previas.obter("c.mp4")
+    assert "a.mp4" in previas.entradas
+
+
+def test_travas_por_chave_sao_descartadas(previas):
+    previas.obter("a.mp4")
+    previas.obter("a.mp4")
+    previas.obter("b.mp4")
+    assert previas._travas_chave == {}
@@ -0,0 +1,160 @@
+import random
+from collections import Counter
+from datetime import datetime, timezone
+
+import pytest
+
+from app.src.seletor import (
+    ALEATORIO,
+    POR_IDADE,
+    PRIMEIROS,
+    SeletorVideos,
+    escolher,
+    peso_por_idade,
+)
+
+
+class DriverFalso:
+    """Entrega as páginas informadas e conta quantas foram pedidas."""
+
+    def __init__(self, paginas):
+        self.paginas = paginas
+        self.lidas = 0
+
+    def iter_video_pages(self, service, page_size):
+        for pagina in self.paginas:
+            self.lidas += 1
+            yield pagina
+
+    @staticmethod
+    def motivo_inelegivel(video):
+        return "curto demais" if video.get("curto") else None
+
+
+class CacheFalso:
+    def __init__(self):
+        self.dados = {}
+
+    def set_many_data(self, dados):
+        self.dados.update(dados)
+
+
+class HistoricoFalso:
+    def __init__(self, baixados=()):
+        self.baixados = set(baixados)
+        self.cache = CacheFalso()
+
+    def migracao_pendente(self):
+        return False
+
+    def filtrar_novos(self, videos):
+        return [video for video in videos if video["id"] not in self.baixados]
+
+    def chaves_drive(self, video):
+        return [f"drive:{video['id']}"]
+
+
+def _video(indice, **extras):
+    return {"id": f"v{indice}", "name": f"video_{indice}.mp4", **extras}
+
+
+def _paginas(quantidade, por_pagina=10):
+    videos = [_video(indice) for indice in range(quantidade)]
+    return [videos[inicio : inicio + por_pagina] for inicio in range(0, quantidade, por_pagina)]
+
+
+def _selecionar(paginas, historico=None, **kwargs):
+    driver = DriverFalso(paginas)
+    escolhidos = SeletorVideos(driver, historico or HistoricoFalso()).selecionar(None, **kwargs)
+    return [video["id"] for video in escolhidos], driver
+
+
+def test_primeiros_para_de_listar_ao_completar():
+    ids, driver = _selecionar(_paginas(50), quantidade=3, politica=PRIMEIROS)
+    assert ids == ["v0", "v1", "v2"]
+    assert driver.lidas == 1
+
+
+def test_filtra_pagos_baixados_excluidos_e_inelegiveis():
+    paginas = [
+        [
+            _video(0),
+            {"id": "p1", "name": "paid_10_video.mp4"},
+            _video(2, curto=True),
+            _video(3),
+            _video(4),
+        ]
+    ]
+    historico = HistoricoFalso(baixados={"v0"})
+    ids, _ = _selecionar(
+        paginas, historico, quantidade=5, politica=PRIMEIROS, excluir={"v3"}
+    )
+    assert ids == ["v4"]
+    # O inelegível é registrado para não ser reavaliado
+    assert list(historico.cache.dados) == ["drive:v2"]
+
+    ids, _ = _selecionar(paginas, quantidade=5, politica=PRIMEIROS, paid=True)
+    assert ids == ["p1"]
+
+
+def test_preferidos_vem_antes_em_qualquer_politica():
+    for politica in (ALEATORIO, POR_IDADE, PRIMEIROS):
+        ids, _ = _selecionar(
+            _paginas(30), quantidade=2, politica=politica, preferir={"video_27.mp4"}
+        )
+        assert ids[0] == "v27" and len(ids) == 2
+
+
+def test_copias_do_mesmo_conteudo_nao_entram_juntas():
+    paginas = [[_video(0, md5Checksum="igual")], [_video(1, md5Checksum="igual")]]
+    for _ in range(20):
+        ids, _ = _selecionar(paginas, quantidade=2, politica=ALEATORIO)
+        assert len(ids) == 1
+
+
+def test_aleatorio_e_uniforme_sobre_todas_as_paginas():
+    random.seed(1234)
+    contagem = Counter()
+    for _ in range(4000):
+        ids, driver = _selecionar(_paginas(8, por_pagina=3), quantidade=2)
+        assert len(set(ids)) == 2
+        assert driver.lidas == 3
+        contagem.update(ids)
+
+    # Cada um dos 8 vídeos deveria sair em 1/4 das seleções (1000 vezes)
+    assert set(contagem) == {f"v{indice}" for indice in range(8)}
+    assert all(850 < vezes < 1150 for vezes in contagem.values())
+
+
+def test_idade_favorece_videos_antigos():
+    random.seed(4321)
+    agora = datetime.now(timezone.utc)
+    antigo = _video(0, modifiedTime=agora.replace(year=agora.year - 2).isoformat())
+    recente = _video(1, modifiedTime=agora.isoformat())
+    contagem = Counter(
+        _selecionar([[antigo, recente]], quantidade=1, politica=POR_IDADE)[0][0]
+        for _ in range(2000)
+    )
+    # Pesos ~25 e ~1: o antigo ganha em ~96% das vezes
+    assert contagem["v0"] > 1800
+
+
+def test_peso_por_idade():
+    agora = datetime(2025, 1, 31, tzinfo=timezone.utc)
+    assert peso_por_idade({}, agora) == 1.0
+    assert peso_por_idade({"modifiedTime": "2025-01-01T00:00:00.000Z"}, agora) == pytest.approx(2.0)
+    # Data no futuro não dá peso menor que 1
+    assert peso_por_idade({"modifiedTime": "2026-01-01T00:00:00Z"}, agora) == 1.0
+
+
+def test_politica_invalida():
+    with pytest.raises(ValueError):
+        _selecionar(_paginas(1), politica="maior")
+
+
+def test_escolher_prefere_retomadas():
+    videos = [_video(indice) for indice in range(10)]
+    escolhidos = escolher(videos, 3, preferir={"video_7.mp4"})
+    assert escolhidos[0]["id"] == "v7"
+    assert len({video["id"] for video in escolhidos}) == 3
+    assert len(escolher(videos[:2], 5)) == 2
@@ -0,0 +1,31 @@
+import asyncio
+import json
+
+from telethon import errors, types
+
+from app.src import telegram_client
+
+
+def test_peer_do_cache_recusado_e_resolvido_de_novo(tmp_path, monkeypatch):
+    caminho = tmp_path / "peers_cache.json"
+    caminho.write_text(json.dumps({"grupo": {"tipo": "channel", "id": 5, "access_hash": 111}}))
+    monkeypatch.setattr(telegram_client, "PEERS_CACHE_FILE", str(caminho))
+    monkeypatch.setattr(telegram_client, "_peers", None)
+
+    class ClienteFalso:
+        async def get_entity(self, nome):
+            return types.InputPeerChannel(5, 222)
+
+    usados = []
+
+    async def enviar(peer):
+        usados.append(peer.access_hash)
+        if peer.access_hash == 111:
+            raise errors.ChannelInvalidError(request=None)
+        return "ok"
+
+    resultado = asyncio.run(telegram_client.com_peers(ClienteFalso(), ("grupo",), enviar, "teste"))
+
+    assert resultado == "ok"
+    assert usados == [111, 222]
+    assert json.loads(caminho.read_text())["grupo"]["access_hash"] == 222
@@ -0,0 +1,114 @@
+import asyncio
+import hashlib
+import time
+
+from telethon import types
+
+from app.src import upload_cache
+from app.src.upload_cache import UploadCache
+from app.utils.hash_arquivo import md5_arquivo
+
+
+def _arquivo(tmp_path, nome, conteudo):
+    caminho = tmp_path / nome
+    caminho.write_bytes(conteudo)
+    return str(caminho)
+
+
+def test_md5_arquivo(tmp_path):
+    conteudo = b"video" * 1000
+    assert md5_arquivo(_arquivo(tmp_path, "a.mp4", conteudo)) == hashlib.md5(conteudo).hexdigest()
+
+
+def test_documento_salvo_e_reaproveitado(tmp_path):
+    caminho = str(tmp_path / "cache.json")
+    documento = types.Document(
+        id=1,
+        access_hash=2,
+        file_reference=b"\x01\x02",
+        date=None,
+        mime_type="video/mp4",
+        size=10,
+        dc_id=4,
+        attributes=[],
+    )
+    UploadCache(caminho).salvar_documento("md5:abc", documento)
+
+    cache = UploadCache(caminho)
+    assert cache.obter("md5:abc") == types.InputDocument(
+        id=1, access_hash=2, file_reference=b"\x01\x02"
+    )
+    assert cache.obter("md5:outro") is None
+
+    cache.invalidar("md5:abc")
+    assert UploadCache(caminho).obter("md5:abc") is None
+
+
+def test_input_file_expira(tmp_path, monkeypatch):
+    cache = UploadCache(str(tmp_path / "cache.json"))
+    cache.salvar_input_file("md5:grande", types.InputFileBig(id=9, parts=3, name="v.mp4"))
+    cache.salvar_input_file("md5:pequeno", types.InputFile(id=8, parts=1, name="p.mp4", md5_checksum="x"))
+
+    assert cache.obter("md5:grande") == types.InputFileBig(id=9, parts=3, name="v.mp4")
+    assert isinstance(cache.obter("md5:pequeno"), types.InputFile)
+
+    depois = time.time() + upload_cache.VALIDADE_INPUT_FILE + 1
+    monkeypatch.setattr(upload_cache.time, "time", lambda: depois)
+    assert cache.obter("md5:grande") is None
+
+
+def _documento(file_reference):
+    return types.Document(
+        id=1,
+        access_hash=2,
+        file_reference=file_reference,
+        date=None,
+        mime_type="video/mp4",
+        size=10,
+        dc_id=4,
+        attributes=[],
+    )
+
+
+def test_referencia_expirada_renovada_pela_mensagem(tmp_path, monkeypatch):
+    from telethon import errors
+
+    from app.src import subir_video
+
+    cache = UploadCache(str(tmp_path / "cache.json"))
+    mensagem = types.Message(
+        id=7,
+        peer_id=types.PeerChannel(123),
+        date=None,
+        message="",
+        media=types.MessageMediaDocument(document=_documento(b"velha")),
+    )
+    cache.salvar_mensagem("md5:abc", mensagem)
+    assert cache.origem("md5:abc") == (-1000000000123, 7)
+    monkeypatch.setattr(subir_video, "_obter_cache_uploads", lambda: cache)
+
+    class ClienteFalso:
+        async def get_messages(self, chat, ids):
+            assert (chat, ids) == (-1000000000123, 7)
+            mensagem.media.document.file_reference = b"nova"
+            return mensagem
+
+    enviados = []
+
+    async def enviar(midia):
+        enviados.append(midia)
+        if midia.file_reference == b"velha":
+            raise errors.FileReferenceExpiredError(request=None)
+        return "ok"
+
+    async def sem_upload(*args, **kwargs):
+        raise AssertionError("o arquivo não deveria ser reenviado")
+
+    monkeypatch.setattr(subir_video, "upload_rapido", sem_upload)
+    resultado = asyncio.run(
+        subir_video._enviar_com_cache(ClienteFalso(), "md5:abc", "v.mp4", enviar)
+    )
+
+    assert resultado == "ok"
+    assert [midia.file_reference for midia in enviados] == [b"velha", b"nova"]
+    assert UploadCache(cache.caminho).obter("md5:abc").file_reference == b"nova"
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.src import X_poster
+
+
+class ApiFalsa:
+    """API v1.1 falsa do upload em partes; pode falhar uma vez num segmento."""
+
+    def __init__(self, falhar_em=None):
+        self.falhar_em = falhar_em
+        self.inicios = 0
+        self.segmentos = []
+        self._trava = threading.Lock()
+
+    def chunked_upload_init(self, tamanho, mime_type, media_category=None):
+        self.inicios += 1
+        return SimpleNamespace(media_id=77, expires_after_secs=3600)
+
+    def chunked_upload_append(self, media_id, dados, indice):
+        if indice == self.falhar_em:
+            self.falhar_em = None
+            raise ConnectionError("conexão perdida")
+        with self._trava:
+            self.segmentos.append(indice)
+
+    def chunked_upload_finalize(self, media_id):
+        return SimpleNamespace(media_id=media_id, processing_info=None)
+
+    def get_media_upload_status(self, media_id):
+        return SimpleNamespace(media_id=media_id, processing_info=None)
+
+
+@pytest.fixture
+def estado_x(tmp_path, monkeypatch):
+    caminho = tmp_path / "x_uploads.json"
+    monkeypatch.setattr(X_poster, "X_UPLOAD_STATE_FILE", str(caminho))
+    monkeypatch.setattr(X_poster, "X_SEGMENTO_MB", 1)
+    monkeypatch.setattr(X_poster, "X_UPLOAD_PARALELO", 1)
+    return caminho
+
+
+def test_upload_retomado_envia_so_os_segmentos_que_faltam(tmp_path, estado_x):
+    video = tmp_path / "previa.mp4"
+    video.write_bytes(b"\0" * (3 * 1024 * 1024 + 10))  # 4 segmentos de 1 MB
+
+    api = ApiFalsa(falhar_em=2)
+    with pytest.raises(ConnectionError):
+        asyncio.run(X_poster._enviar_midia(api, str(video), "chave", X_poster._carregar_estados()))
+
+    salvo = json.loads(estado_x.read_text())["chave"]
+    assert salvo["media_id"] == 77 and salvo["total_segmentos"] == 4
+    assert not salvo["finalizado"]
+    assert 2 not in salvo["segmentos_concluidos"]
+
+    # Reinício: mesmo media_id, só os segmentos que não foram registrados
+    api_nova = ApiFalsa()
+    media = asyncio.run(
+        X_poster._enviar_midia(api_nova, str(video), "chave", X_poster._carregar_estados())
+    )
+    assert media.media_id == 77
+    assert api_nova.inicios == 0
+    assert sorted(api_nova.segmentos) == sorted(set(range(4)) - set(salvo["segmentos_concluidos"]))
+    assert json.loads(estado_x.read_text())["chave"]["finalizado"]
+
+
+def test_estados_vencidos_sao_descartados(estado_x):
+    agora = time.time()
+    estado_x.write_text(
+        json.dumps(
+            {
+                "em_andamento": {"expira_em": agora + 60, "tweet_id": None, "postado_em": None},
+                "upload_expirado": {"expira_em": agora - 60, "tweet_id": None, "postado_em": None},
+                "postado_recente": {"expira_em": agora - 60, "tweet_id": "1", "postado_em": agora},
+                "postado_antigo": {
+                    "expira_em": 0,
+                    "tweet_id": "2",
+                    "postado_em": agora - X_poster.VALIDADE_POSTAGEM - 1,
+                },
+            }
+        )
+    )
+    assert set(X_poster._carregar_estados()) == {"em_andamento", "postado_recente"}
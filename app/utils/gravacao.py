@@ -0,0 +1,29 @@
+import json
+import os
+import threading
+import uuid
+
+
+def gravar_atomico(caminho, conteudo):
+    """
+    Grava o texto no arquivo de forma atômica (arquivo temporário + rename).
+
+    O temporário tem nome único por chamada, então gravações simultâneas do mesmo
+    arquivo (threads ou processos) não escrevem umas sobre as outras: a última a
+    renomear vence, e quem lê sempre encontra um arquivo completo.
+    """
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    tmp_path = f"{caminho}.{os.getpid()}.{threading.get_ident()}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            f.write(conteudo)
+        os.replace(tmp_path, caminho)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def gravar_json_atomico(caminho, dados, **opcoes):
+    """Grava 'dados' como JSON de forma atômica (opcoes vão para json.dumps)."""
+    gravar_atomico(caminho, json.dumps(dados, **opcoes))
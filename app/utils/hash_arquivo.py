@@ -0,0 +1,15 @@
+import hashlib
+
+
+def md5_arquivo(caminho_arquivo):
+    """
+    Calcula o md5 do arquivo inteiro (em blocos de 8 MB).
+
+    É o mesmo valor do md5Checksum do Google Drive, então um arquivo local e o
+    original no Drive recebem a mesma identificação.
+    """
+    md5 = hashlib.md5()
+    with open(caminho_arquivo, "rb") as f:
+        for bloco in iter(lambda: f.read(8 * 1024 * 1024), b""):
+            md5.update(bloco)
+    return md5.hexdigest()
@@ -0,0 +1,33 @@
+import threading
+from functools import wraps
+
+
+def instancia_unica(fabrica):
+    """
+    Decorator para as funções obter_*() do processo: a fábrica roda só na primeira
+    chamada (protegida por uma trava) e as seguintes devolvem o mesmo objeto.
+
+    Exemplo:
+        @instancia_unica
+        def obter_armazem():
+            return ArmazemManeger()
+
+    obter_armazem.descartar() esquece a instância (a próxima chamada cria outra).
+    """
+    instancia = []
+    trava = threading.Lock()
+
+    @wraps(fabrica)
+    def obter():
+        if not instancia:
+            with trava:
+                if not instancia:
+                    instancia.append(fabrica())
+        return instancia[0]
+
+    def descartar():
+        with trava:
+            instancia.clear()
+
+    obter.descartar = descartar
+    return obter
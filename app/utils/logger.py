@@ -1,5 +1,7 @@
 import logging
 
+import colorlog
+
 
 class ColorLogger:
     def __init__(self, name="minha_app"):
@@ -0,0 +1,270 @@
+import inspect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from app.config import obter_config
+from app.utils.gravacao import gravar_atomico, gravar_json_atomico
+from app.utils.instancia_unica import instancia_unica
+from app.utils.logger import ColorLogger
+
+config = obter_config()
+logger = ColorLogger()
+
+PASTA_BANCO_DADOS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "banco_dados",
+)
+# Métricas no formato texto do Prometheus (ex.: para o textfile collector do node_exporter)
+METRICAS_ARQUIVO = config.metricas_arquivo or os.path.join(PASTA_BANCO_DADOS, "metricas.prom")
+# Resumo da última execução, por etapa, em JSON
+METRICAS_RESUMO = config.metricas_resumo or os.path.join(
+    PASTA_BANCO_DADOS, "metricas_execucao.json"
+)
+
+PREFIXO = "pipeline_etapa"
+
+
+class Span:
+    """Uma medição de etapa: quem mede pode preencher bytes e quadros durante o trecho."""
+
+    __slots__ = ("etapa", "rotulos", "bytes", "quadros", "erro", "duracao")
+
+    def __init__(self, etapa, rotulos, bytes=0, quadros=0):
+        self.etapa = etapa
+        self.rotulos = rotulos
+        self.bytes = bytes
+        self.quadros = quadros
+        self.erro = None
+        self.duracao = 0.0
+
+
+def _novo_agregado():
+    return {
+        "contagem": 0,
+        "duracao_total": 0.0,
+        "duracao_maxima": 0.0,
+        "bytes": 0,
+        "quadros": 0,
+        "erros": 0,
+        "tentativas": 0,
+    }
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metricas:
+    """
+    Registro, em memória, do tempo e da vazão de cada etapa do processo.
+
+    Cada trecho medido (span) soma a duração, os bytes transferidos, os quadros
+    codificados e as falhas da etapa; as retentativas são contadas à parte, por
+    registrar_tentativa(). Os totais são acumulados de duas formas: desde o início do
+    processo (exportados no formato do Prometheus) e desde o início da execução atual
+    (o resumo em JSON, que mostra qual etapa consumiu a janela do cron).
+    """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.inicio_processo = time.time()
+        self._totais = {}
+        self.nova_execucao()
+
+    def nova_execucao(self):
+        """Zera o resumo da execução; os totais do processo continuam acumulando."""
+        with self._trava:
+            self.inicio_execucao = time.time()
+            self._execucao = {}
+
+    def _agregados(self, etapa, rotulos):
+        """Agregados da etapa no processo e na execução (chamado com a trava)."""
+        chave = (etapa, tuple(sorted(rotulos.items())))
+        return (
+            self._totais.setdefault(chave, _novo_agregado()),
+            self._execucao.setdefault(chave, _novo_agregado()),
+        )
+
+    @contextmanager
+    def span(self, etapa, bytes=0, quadros=0, **rotulos):
+        """
+        Mede o trecho como uma execução de 'etapa'. Uma exceção conta como erro (e é
+        propagada); quem não usa exceções pode preencher span.erro.
+
+        Exemplo:
+            with obter_metricas().span("drive_download", bytes=tamanho) as span:
+                if not baixar():
+                    span.erro = "falha"
+        """
+        span = Span(etapa, rotulos, bytes, quadros)
+        inicio = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.erro = type(e).__name__
+            raise
+        finally:
+            span.duracao = time.perf_counter() - inicio
+            self._registrar(span)
+
+    def _registrar(self, span):
+        with self._trava:
+            for agregado in self._agregados(span.etapa, span.rotulos):
+                agregado["contagem"] += 1
+                agregado["duracao_total"] += span.duracao
+                agregado["duracao_maxima"] = max(agregado["duracao_maxima"], span.duracao)
+                agregado["bytes"] += span.bytes or 0
+                agregado["quadros"] += span.quadros or 0
+                agregado["erros"] += 1 if span.erro else 0
+
+    def registrar_tentativa(self, etapa, quantidade=1, **rotulos):
+        """Conta uma nova tentativa (retry) de uma operação da etapa."""
+        with self._trava:
+            for agregado in self._agregados(etapa, rotulos):
+                agregado["tentativas"] += quantidade
+
+    @staticmethod
+    def _derivados(agregado):
+        """MB/s e quadros/s médios da etapa (0 quando não se aplicam)."""
+        duracao = agregado["duracao_total"]
+        return (
+            agregado["bytes"] / (1024 * 1024) / duracao if duracao else 0.0,
+            agregado["quadros"] / duracao if duracao else 0.0,
+        )
+
+    def prometheus(self):
+        """Os totais do processo no formato texto do Prometheus."""
+        with self._trava:
+            itens = sorted((chave, dict(agregado)) for chave, agregado in self._totais.items())
+
+        series = {
+            "duracao_segundos": ("summary", "Duração das execuções de cada etapa."),
+            "duracao_maxima_segundos": ("gauge", "Execução mais longa de cada etapa."),
+            "bytes_total": ("counter", "Bytes transferidos ou gravados pela etapa."),
+            "erros_total": ("counter", "Execuções da etapa que falharam."),
+            "tentativas_total": ("counter", "Novas tentativas (retries) feitas na etapa."),
+            "mb_por_segundo": ("gauge", "Vazão média da etapa em MB/s."),
+            "quadros_por_segundo": ("gauge", "Velocidade média de codificação (fps)."),
+        }
+        linhas = []
+        for nome, (tipo, ajuda) in series.items():
+            linhas += [f"# HELP {PREFIXO}_{nome} {ajuda}", f"# TYPE {PREFIXO}_{nome} {tipo}"]
+            for (etapa, rotulos), agregado in itens:
+                texto_rotulos = ",".join(
+                    f'{chave}="{_escapar(valor)}"'
+                    for chave, valor in (("etapa", etapa), *rotulos)
+                )
+                mb_s, fps = self._derivados(agregado)
+                if nome == "duracao_segundos":
+                    linhas.append(f"{PREFIXO}_{nome}_sum{{{texto_rotulos}}} {agregado['duracao_total']:.6f}")
+                    linhas.append(f"{PREFIXO}_{nome}_count{{{texto_rotulos}}} {agregado['contagem']}")
+                    continue
+                valor = {
+                    "duracao_maxima_segundos": f"{agregado['duracao_maxima']:.6f}",
+                    "bytes_total": agregado["bytes"],
+                    "erros_total": agregado["erros"],
+                    "tentativas_total": agregado["tentativas"],
+                    "mb_por_segundo": f"{mb_s:.3f}",
+                    "quadros_por_segundo": f"{fps:.3f}",
+                }[nome]
+                linhas.append(f"{PREFIXO}_{nome}{{{texto_rotulos}}} {valor}")
+
+        linhas += [
+            "# HELP pipeline_inicio_processo_segundos Início do processo (Unix time).",
+            "# TYPE pipeline_inicio_processo_segundos gauge",
+            f"pipeline_inicio_processo_segundos {self.inicio_processo:.0f}",
+        ]
+        return "\n".join(linhas) + "\n"
+
+    def resumo(self):
+        """Resumo da execução atual por etapa, da que mais consumiu tempo à que menos."""
+        with self._trava:
+            itens = [(chave, dict(agregado)) for chave, agregado in self._execucao.items()]
+            inicio = self.inicio_execucao
+
+        etapas = []
+        for (etapa, rotulos), agregado in itens:
+            mb_s, fps = self._derivados(agregado)
+            etapas.append(
+                {
+                    "etapa": etapa,
+                    **dict(rotulos),
+                    "contagem": agregado["contagem"],
+                    "duracao_total_s": round(agregado["duracao_total"], 3),
+                    "duracao_media_s": round(
+                        agregado["duracao_total"] / agregado["contagem"], 3
+                    )
+                    if agregado["contagem"]
+                    else 0.0,
+                    "duracao_maxima_s": round(agregado["duracao_maxima"], 3),
+                    "mb": round(agregado["bytes"] / (1024 * 1024), 2),
+                    "mb_s": round(mb_s, 2),
+                    "fps": round(fps, 1),
+                    "erros": agregado["erros"],
+                    "tentativas": agregado["tentativas"],
+                }
+            )
+        etapas.sort(key=lambda item: item["duracao_total_s"], reverse=True)
+
+        fim = time.time()
+        return {
+            "inicio": inicio,
+            "fim": fim,
+            "duracao_s": round(fim - inicio, 3),
+            "etapas": etapas,
+        }
+
+    def exportar(self, caminho_prometheus=METRICAS_ARQUIVO, caminho_resumo=METRICAS_RESUMO):
+        """Grava (atomicamente) o arquivo do Prometheus e o resumo JSON da execução."""
+        try:
+            gravar_atomico(caminho_prometheus, self.prometheus())
+            resumo = self.resumo()
+            gravar_json_atomico(caminho_resumo, resumo, indent=2, ensure_ascii=False)
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar as métricas: {e}")
+            return None
+
+        if resumo["etapas"]:
+            mais_lenta = resumo["etapas"][0]
+            logger.info(
+                f"Métricas gravadas em '{caminho_resumo}'. Etapa mais demorada: "
+                f"{mais_lenta['etapa']} ({mais_lenta['duracao_total_s']:.1f}s de "
+                f"{resumo['duracao_s']:.1f}s)."
+            )
+        return resumo
+
+
+@instancia_unica
+def obter_metricas():
+    """Retorna o registro de métricas do processo (criado uma vez)."""
+    return Metricas()
+
+
+def medir(etapa, **rotulos):
+    """
+    Decorator que mede cada chamada da função (síncrona ou assíncrona) como 'etapa'.
+
+    Para registrar bytes ou quadros, use obter_metricas().span() diretamente.
+    """
+
+    def decorador(funcao):
+        if inspect.iscoroutinefunction(funcao):
+
+            @wraps(funcao)
+            async def envoltorio_async(*args, **kwargs):
+                with obter_metricas().span(etapa, **rotulos):
+                    return await funcao(*args, **kwargs)
+
+            return envoltorio_async
+
+        @wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            with obter_metricas().span(etapa, **rotulos):
+                return funcao(*args, **kwargs)
+
+        return envoltorio
+
+    return decorador